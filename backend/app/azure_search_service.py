@@ -1,147 +1,224 @@
 """
 Azure Search Document Management Service
 
-This module provides functionality to delete documents from the NBA Azure Search index
-when documents are deleted from the NBA Official CosmosDB container.
+This module provides clients for the Azure Search indexes behind the official
+containers (NBA index by default; MLB via index_name) and deletes documents from them
+when they are deleted from CosmosDB.
+
+Clients are async (azure.search.documents.aio) and share one aiohttp session, so every
+index client reuses the same connection pool. They are created on first use inside the
+running event loop and closed with close().
 """
 
+import asyncio
 import os
 import logging
-from typing import List, Optional
-from azure.search.documents import SearchClient
+from typing import Dict, List, Optional, Set
+
+import aiohttp
 from azure.core.credentials import AzureKeyCredential
 from azure.core.exceptions import ResourceNotFoundError
+from azure.core.pipeline.transport import AioHttpTransport
+from azure.search.documents.aio import SearchClient
+
+from .config import NBA_SEARCH_INDEX_NAME
 
 logger = logging.getLogger(__name__)
 
 
 class AzureSearchService:
     """Service for managing documents in Azure Search index."""
-    
+
+    # Azure Search accepts at most 1000 actions per indexing request
+    MAX_BATCH_SIZE = 1000
+    # Ids per search.in() existence lookup, and lookups in flight at once
+    LOOKUP_CHUNK_SIZE = 100
+    LOOKUP_CONCURRENCY = 8
+
     def __init__(self):
-        """Initialize Azure Search client."""
+        """Read Azure Search settings; clients are created lazily."""
         self.endpoint = os.getenv('AZURE_SEARCH_ENDPOINT')
         self.api_key = os.getenv('AZURE_SEARCH_API_KEY') or os.getenv('AZURE_SEARCH_KEY')
-        self.index_name = 'blitz-nba-index'
-        
+        self.index_name = NBA_SEARCH_INDEX_NAME
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._clients: Dict[str, SearchClient] = {}
+
         if not self.endpoint or not self.api_key:
             logger.warning(
                 "Azure Search credentials not configured. "
                 "Search index deletion will be skipped."
             )
-            self._client = None
         else:
-            self._client = SearchClient(
-                endpoint=self.endpoint,
-                index_name=self.index_name,
-                credential=AzureKeyCredential(self.api_key)
-            )
-            logger.info(f"Azure Search client initialized for index: {self.index_name}")
-    
+            logger.info(f"Azure Search configured for index: {self.index_name}")
+
     def is_configured(self) -> bool:
         """Check if Azure Search is properly configured."""
-        return self._client is not None
-    
-    async def verify_document_exists(self, doc_id: str) -> bool:
+        return bool(self.endpoint and self.api_key)
+
+    def get_client(self, index_name: Optional[str] = None) -> Optional[SearchClient]:
+        """
+        Async client for an index (default: the NBA index), or None if not configured.
+
+        Must be called from the running event loop; all clients share one HTTP session.
+        """
+        if not self.is_configured():
+            return None
+        index_name = index_name or self.index_name
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+            self._clients = {}
+        client = self._clients.get(index_name)
+        if client is None:
+            client = SearchClient(
+                endpoint=self.endpoint,
+                index_name=index_name,
+                credential=AzureKeyCredential(self.api_key),
+                transport=AioHttpTransport(session=self._session, session_owner=False),
+            )
+            self._clients[index_name] = client
+            logger.info(f"Azure Search client initialized for index: {index_name}")
+        return client
+
+    async def close(self) -> None:
+        """Close all index clients and the shared HTTP session."""
+        for client in self._clients.values():
+            await client.close()
+        self._clients = {}
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def verify_document_exists(self, doc_id: str, index_name: Optional[str] = None) -> bool:
         """
         Verify if a document exists in the search index.
-        
+
         Args:
             doc_id: The document ID to verify
-            
+
         Returns:
             bool: True if document exists, False otherwise
         """
-        if not self._client:
+        client = self.get_client(index_name)
+        if not client:
             logger.warning("Azure Search not configured, skipping document verification")
             return False
-        
+
         try:
-            result = self._client.get_document(key=doc_id)
+            result = await client.get_document(key=doc_id, selected_fields=["id"])
             return result is not None
         except ResourceNotFoundError:
             return False
         except Exception as e:
             logger.error(f"Error verifying document {doc_id} in search index: {str(e)}")
             return False
-    
-    async def delete_document(self, doc_id: str) -> bool:
+
+    async def get_existing_ids(self, doc_ids: List[str], index_name: Optional[str] = None) -> Set[str]:
+        """
+        Return the subset of doc_ids present in the index.
+
+        Ids are looked up in chunks with a search.in() filter, several chunks at once.
+        A chunk whose filter query fails falls back to concurrent point lookups.
+        """
+        client = self.get_client(index_name)
+        if not client or not doc_ids:
+            return set()
+        semaphore = asyncio.Semaphore(self.LOOKUP_CONCURRENCY)
+
+        async def point_lookup(doc_id: str) -> Optional[str]:
+            async with semaphore:
+                return doc_id if await self.verify_document_exists(doc_id, index_name) else None
+
+        async def lookup_chunk(chunk: List[str]) -> Set[str]:
+            # search.in() splits on the delimiter, so ids containing it need point lookups
+            plain = [doc_id for doc_id in chunk if ',' not in doc_id]
+            odd = [doc_id for doc_id in chunk if ',' in doc_id]
+            found: Set[str] = set()
+            if plain:
+                values = ','.join(plain).replace("'", "''")
+                try:
+                    async with semaphore:
+                        results = await client.search(
+                            search_text="*",
+                            filter=f"search.in(id, '{values}', ',')",
+                            select=["id"],
+                            top=len(plain),
+                        )
+                        async for doc in results:
+                            found.add(doc["id"])
+                except Exception as e:
+                    logger.warning(f"Batched id lookup failed ({e}); falling back to point lookups")
+                    odd = chunk
+            if odd:
+                found.update(doc_id for doc_id in await asyncio.gather(*(point_lookup(d) for d in odd)) if doc_id)
+            return found
+
+        chunks = [doc_ids[i:i + self.LOOKUP_CHUNK_SIZE] for i in range(0, len(doc_ids), self.LOOKUP_CHUNK_SIZE)]
+        existing: Set[str] = set()
+        for found in await asyncio.gather(*(lookup_chunk(chunk) for chunk in chunks)):
+            existing.update(found)
+        return existing
+
+    async def delete_document(self, doc_id: str, index_name: Optional[str] = None) -> bool:
         """
         Delete a document from the Azure Search index.
-        
+
+        Deletes are idempotent (a missing key succeeds), so no existence check is made.
+
         Args:
             doc_id: The ID of the document to delete
-            
+
         Returns:
             bool: True if deletion was successful, False otherwise
         """
-        if not self._client:
-            logger.warning("Azure Search not configured, skipping document deletion")
-            return False
-        
-        try:
-            # First verify the document exists
-            exists = await self.verify_document_exists(doc_id)
-            if not exists:
-                logger.info(f"Document {doc_id} not found in search index, nothing to delete")
-                return True
-            
-            # Delete the document
-            documents_to_delete = [{"id": doc_id}]
-            result = self._client.delete_documents(documents=documents_to_delete)
-            
-            # Check if deletion was successful
-            for item in result:
-                if item.succeeded:
-                    logger.info(f"Successfully deleted document {doc_id} from search index")
-                    return True
-                else:
-                    error_msg = getattr(item, 'error_message', 'Unknown error')
-                    logger.error(f"Failed to delete document {doc_id} from search index: {error_msg}")
-                    return False
-            
-            return False
-        except Exception as e:
-            logger.error(f"Error deleting document {doc_id} from search index: {str(e)}")
-            return False
-    
-    async def delete_documents(self, doc_ids: List[str]) -> dict:
+        result = await self.delete_documents([doc_id], index_name)
+        if result['succeeded']:
+            logger.info(f"Successfully deleted document {doc_id} from search index")
+            return True
+        return False
+
+    async def delete_documents(self, doc_ids: List[str], index_name: Optional[str] = None) -> dict:
         """
         Delete multiple documents from the Azure Search index.
-        
+
+        Sent as one request per 1000 ids.
+
         Args:
             doc_ids: List of document IDs to delete
-            
+
         Returns:
-            dict: {'succeeded': [...], 'failed': [...]}
+            dict: {'succeeded': [ids], 'failed': [{'id', 'error'}]}
         """
-        if not self._client:
+        client = self.get_client(index_name)
+        if not client:
             logger.warning("Azure Search not configured, skipping document deletion")
-            return {'succeeded': [], 'failed': doc_ids}
-        
+            return {
+                'succeeded': [],
+                'failed': [{'id': doc_id, 'error': 'Azure Search not configured'} for doc_id in doc_ids]
+            }
+
         succeeded = []
         failed = []
-        
-        try:
-            documents_to_delete = [{"id": doc_id} for doc_id in doc_ids]
-            result = self._client.delete_documents(documents=documents_to_delete)
-            
-            for item in result:
-                if item.succeeded:
-                    succeeded.append(item.key)
-                    logger.info(f"Successfully deleted document {item.key} from search index")
-                else:
-                    error_msg = getattr(item, 'error_message', 'Unknown error')
-                    failed.append({
-                        'id': item.key,
-                        'error': error_msg
-                    })
-                    logger.error(f"Failed to delete document {item.key} from search index: {error_msg}")
-            
-        except Exception as e:
-            logger.error(f"Error during bulk deletion from search index: {str(e)}")
-            failed.extend([{'id': doc_id, 'error': str(e)} for doc_id in doc_ids])
-        
+
+        for start in range(0, len(doc_ids), self.MAX_BATCH_SIZE):
+            chunk = doc_ids[start:start + self.MAX_BATCH_SIZE]
+            try:
+                result = await client.delete_documents(documents=[{"id": doc_id} for doc_id in chunk])
+                for item in result:
+                    if item.succeeded:
+                        succeeded.append(item.key)
+                    else:
+                        error_msg = getattr(item, 'error_message', 'Unknown error')
+                        failed.append({
+                            'id': item.key,
+                            'error': error_msg
+                        })
+                        logger.error(f"Failed to delete document {item.key} from search index: {error_msg}")
+            except Exception as e:
+                logger.error(f"Error during bulk deletion from search index: {str(e)}")
+                failed.extend([{'id': doc_id, 'error': str(e)} for doc_id in chunk])
+
+        if succeeded:
+            logger.info(f"Deleted {len(succeeded)} document(s) from search index {index_name or self.index_name}")
         return {
             'succeeded': succeeded,
             'failed': failed
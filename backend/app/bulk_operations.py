@@ -0,0 +1,179 @@
+"""
+Helpers for bulk document operations.
+
+Bulk endpoints embed every changed text in a few large requests, write to Cosmos
+with bounded concurrency, and invalidate the container cache once at the end
+instead of once per document.
+"""
+
+import asyncio
+import logging
+import zlib
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, TypeVar
+
+from azure.cosmos import exceptions as cosmos_exceptions
+
+from .config import BULK_EMBED_BATCH_SIZE, BULK_WRITE_CONCURRENCY, BULK_WRITE_MAX_ATTEMPTS
+from .embedding_cache import embedding_cache
+from .embedding_service import embedding_service
+from .rate_limit import retry_after_seconds
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+async def run_bounded(
+    items: Iterable[T],
+    worker: Callable[[T], Awaitable[R]],
+    concurrency: int = BULK_WRITE_CONCURRENCY,
+) -> List[R]:
+    """Run worker over items with at most `concurrency` in flight; results keep input order."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(item: T) -> R:
+        async with semaphore:
+            return await worker(item)
+
+    return await asyncio.gather(*(bounded(item) for item in items))
+
+
+async def cosmos_call_with_retry(fn: Callable[..., R], *args: Any, **kwargs: Any) -> R:
+    """Run a blocking Cosmos call in a thread, retrying 429s after the server's retry-after."""
+    for attempt in range(1, BULK_WRITE_MAX_ATTEMPTS + 1):
+        try:
+            return await asyncio.to_thread(fn, *args, **kwargs)
+        except cosmos_exceptions.CosmosHttpResponseError as e:
+            wait = retry_after_seconds(e)
+            if wait is None or attempt == BULK_WRITE_MAX_ATTEMPTS:
+                raise
+            logger.warning("Cosmos throttled (429); retrying in %.2fs (attempt %s)", wait, attempt)
+            await asyncio.sleep(wait)
+
+
+class PayloadTooLarge(Exception):
+    """Raised by iter_ndjson once a body passes its byte cap."""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Body exceeds {max_bytes} bytes")
+        self.max_bytes = max_bytes
+
+
+async def iter_ndjson(
+    chunks: AsyncIterator[bytes], gzipped: bool = False, max_bytes: Optional[int] = None
+) -> AsyncIterator[Tuple[int, bytes]]:
+    """
+    Yield (line number, raw line) from a streamed NDJSON body without buffering it.
+
+    Gzip bodies are decompressed incrementally; concatenated gzip members are supported.
+    Blank lines are skipped but still counted. With max_bytes, both the bytes received
+    and the bytes they decompress to are capped: PayloadTooLarge is raised as soon as
+    either passes it, without inflating more than one byte past the cap.
+    """
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS) if gzipped else None
+    buffer = b""
+    line_no = 0
+    received = 0
+    inflated = 0
+
+    def inflate(data: bytes) -> bytes:
+        nonlocal decompressor, inflated
+        out = []
+        while data:
+            budget = max_bytes - inflated + 1 if max_bytes is not None else 0
+            piece = decompressor.decompress(data, budget)
+            inflated += len(piece)
+            if max_bytes is not None and inflated > max_bytes:
+                raise PayloadTooLarge(max_bytes)
+            out.append(piece)
+            if decompressor.eof:
+                data = decompressor.unused_data
+                if data:
+                    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            else:
+                data = decompressor.unconsumed_tail
+        return b"".join(out)
+
+    async for chunk in chunks:
+        received += len(chunk)
+        if max_bytes is not None and received > max_bytes:
+            raise PayloadTooLarge(max_bytes)
+        if decompressor is not None:
+            chunk = inflate(chunk)
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_no += 1
+            if line.strip():
+                yield line_no, line
+    if decompressor is not None:
+        buffer += decompressor.flush()
+    if buffer.strip():
+        yield line_no + 1, buffer
+
+
+def _texts_to_embed(docs: Sequence[Dict[str, Any]], fields: Sequence[str], skip_existing: bool = False) -> List[tuple]:
+    return [
+        (doc, field)
+        for doc in docs
+        for field in fields
+        if doc.get(field) and not (skip_existing and doc.get(f"{field}Vector"))
+    ]
+
+
+async def embed_documents(docs: Sequence[Dict[str, Any]], fields: Sequence[str], skip_existing: bool = False) -> int:
+    """
+    Set `<field>Vector` on each document, embedding in batches of BULK_EMBED_BATCH_SIZE.
+
+    With skip_existing, fields that already carry a vector are left alone. A field whose
+    embedding fails has its (now stale) vector removed so the backfill picks it up later.
+    Returns the number of failed texts.
+    """
+    needed = _texts_to_embed(docs, fields, skip_existing)
+    failed = 0
+    for start in range(0, len(needed), BULK_EMBED_BATCH_SIZE):
+        chunk = needed[start:start + BULK_EMBED_BATCH_SIZE]
+        vectors = await embedding_service.embed_many([doc[field] for doc, field in chunk])
+        for (doc, field), vector in zip(chunk, vectors):
+            if vector is None:
+                doc.pop(f"{field}Vector", None)
+                failed += 1
+            else:
+                doc[f"{field}Vector"] = vector
+    if failed:
+        logger.warning("Bulk embedding: %s of %s text(s) failed; saved without vectors", failed, len(needed))
+    return failed
+
+
+async def attach_cached_vectors(
+    docs: Sequence[Dict[str, Any]], fields: Sequence[str], skip_existing: bool = False
+) -> Dict[str, Dict[str, str]]:
+    """
+    Attach vectors already in the embedding cache (one lookup for all documents).
+
+    Returns {doc id: {field: text}} for the texts still to embed; their stale vectors
+    are removed so the documents are saved without them until the queue patches them in.
+    """
+    needed = _texts_to_embed(docs, fields, skip_existing)
+    cached = await asyncio.to_thread(
+        embedding_cache.get_many, embedding_service.deployment, [doc[field] for doc, field in needed]
+    )
+    pending: Dict[str, Dict[str, str]] = {}
+    for (doc, field), vector in zip(needed, cached):
+        if vector is None:
+            pending.setdefault(doc["id"], {})[field] = doc[field]
+            doc.pop(f"{field}Vector", None)
+        else:
+            doc[f"{field}Vector"] = vector
+    return pending
+
+
+def document_summary(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Document fields returned by bulk endpoints (vectors are left out to keep responses small)."""
+    return {
+        "id": doc.get("id"),
+        "UserPrompt": doc.get("UserPrompt") or "",
+        "Query": doc.get("Query") or "",
+        "_ts": doc.get("_ts"),
+    }
@@ -26,6 +26,7 @@ elif DOTENV_LOADED:
 
 SEARCH_SERVICE_NAME = "blitz-ai-search"
 SEARCH_INDEX_NAME = "blitz-mlb-index"
+NBA_SEARCH_INDEX_NAME = "blitz-nba-index"
 SEARCH_ENDPOINT = f"https://{SEARCH_SERVICE_NAME}.search.windows.net"
 
 
@@ -59,6 +60,67 @@ OPENAI_API_VERSION = _env_first(
     default="2024-02-01",
 )
 OPENAI_EMBEDDING_DIMENSIONS = 1536
+OPENAI_TIMEOUT = float(_env_first("AZURE_OPENAI_TIMEOUT", default="30"))
+OPENAI_MAX_RETRIES = int(_env_first("AZURE_OPENAI_MAX_RETRIES", default="2"))
+
+# Content-addressed embedding cache: local SQLite file (set to "" to disable) + Redis when REDIS_URL is set
+EMBEDDING_CACHE_PATH = _env_first(
+    "EMBEDDING_CACHE_PATH",
+    default=str(BACKEND_ROOT / ".embedding_cache.sqlite3"),
+)
+if os.getenv("EMBEDDING_CACHE_PATH") == "":
+    EMBEDDING_CACHE_PATH = None
+EMBEDDING_CACHE_REDIS_TTL_SECONDS = int(
+    _env_first("EMBEDDING_CACHE_REDIS_TTL_SECONDS", default=str(30 * 24 * 3600))
+)
+
+# Deferred embeddings: save documents first, embed + patch vectors from a background queue.
+# EMBEDDINGS_DEFERRED sets the default; requests can override with ?defer_embeddings=.
+EMBEDDINGS_DEFERRED = _env_bool("EMBEDDINGS_DEFERRED")
+EMBEDDING_QUEUE_WORKERS = int(_env_first("EMBEDDING_QUEUE_WORKERS", default="2"))
+EMBEDDING_QUEUE_BATCH_SIZE = int(_env_first("EMBEDDING_QUEUE_BATCH_SIZE", default="16"))
+EMBEDDING_QUEUE_MAX_ATTEMPTS = int(_env_first("EMBEDDING_QUEUE_MAX_ATTEMPTS", default="3"))
+# Mirror queued jobs to a Redis list (needs REDIS_URL) so they survive restarts
+EMBEDDING_QUEUE_REDIS_ENABLED = _env_bool("EMBEDDING_QUEUE_REDIS")
+
+# Bulk document operations (bulk replace, imports, batch transfer/delete)
+BULK_WRITE_CONCURRENCY = int(_env_first("BULK_WRITE_CONCURRENCY", default="8"))
+# Texts per embeddings request during bulk operations (Azure allows up to 2048 inputs)
+BULK_EMBED_BATCH_SIZE = int(_env_first("BULK_EMBED_BATCH_SIZE", default="256"))
+# Attempts per Cosmos write when throttled (429), waiting the server's retry-after between tries
+BULK_WRITE_MAX_ATTEMPTS = int(_env_first("BULK_WRITE_MAX_ATTEMPTS", default="5"))
+# Size limit for streamed NDJSON imports, applied to the body as sent and once decompressed
+# (other requests are limited to 10MB)
+IMPORT_MAX_BYTES = int(_env_first("IMPORT_MAX_BYTES", default=str(512 * 1024 * 1024)))
+
+# Local container snapshots written by export_snapshot.py (one directory per container).
+# SNAPSHOT_MODE=source serves reads of snapshotted containers from the snapshot and refuses
+# writes to them (offline development / CI); seed only warms the Redis document cache from
+# them at startup; off (default) ignores snapshots.
+SNAPSHOT_DIR = _env_first("SNAPSHOT_DIR", default=str(BACKEND_ROOT / "snapshots"))
+SNAPSHOT_MODE = (_env_first("SNAPSHOT_MODE", default="off") or "off").lower()
+
+# Search indexing outbox: document writes on official containers are pushed to their
+# Azure Search index in batches. Opt-in with SEARCH_OUTBOX_ENABLED=true (and Azure Search
+# credentials), since an external indexer may own the index. Pending actions live in
+# memory only: after a crash or restart, run `sync_search_index.py --apply` to reconcile.
+SEARCH_OUTBOX_ENABLED = _env_bool("SEARCH_OUTBOX_ENABLED")
+SEARCH_OUTBOX_FLUSH_MS = int(_env_first("SEARCH_OUTBOX_FLUSH_MS", default="500"))
+# Azure Search accepts at most 1000 actions per indexing request
+SEARCH_OUTBOX_BATCH_SIZE = min(int(_env_first("SEARCH_OUTBOX_BATCH_SIZE", default="1000")), 1000)
+SEARCH_OUTBOX_MAX_ATTEMPTS = int(_env_first("SEARCH_OUTBOX_MAX_ATTEMPTS", default="5"))
+# Document fields copied into an index (other Cosmos fields are not in the index schema);
+# the default for every index, see SEARCH_INDEX_FIELDS_BY_INDEX for per-index overrides.
+# ContentHash and IndexedAt are sync metadata filled in on write (see search_outbox);
+# drop them from the list for an index whose schema does not have them.
+SEARCH_INDEX_FIELDS = [
+    field.strip()
+    for field in (_env_first(
+        "SEARCH_INDEX_FIELDS",
+        default="id,UserPrompt,Query,UserPromptVector,QueryVector,ContentHash,IndexedAt",
+    ) or "").split(",")
+    if field.strip()
+]
 
 # Embeddings power semantic search on official containers. Auto-on when API key is set;
 # set AZURE_OPENAI_EMBEDDINGS_ENABLED=false to force off. Saves still succeed if OpenAI is down.
@@ -119,6 +181,18 @@ POSTGRES_PORT = os.getenv("POSTGRES_PORT", "5432")
 POSTGRES_USER = os.getenv("POSTGRES_USER", "postgres")
 POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "")
 
+
+def _pool_settings(db_name: str) -> dict:
+    """Connection pool settings; POSTGRES_<DB>_* overrides the global POSTGRES_* value."""
+    prefix = f"POSTGRES_{db_name.upper()}_"
+    return {
+        "pool_size": int(_env_first(f"{prefix}POOL_SIZE", "POSTGRES_POOL_SIZE", default="2")),
+        "max_overflow": int(_env_first(f"{prefix}MAX_OVERFLOW", "POSTGRES_MAX_OVERFLOW", default="3")),
+        "pool_timeout": int(_env_first(f"{prefix}POOL_TIMEOUT", "POSTGRES_POOL_TIMEOUT", default="30")),
+        "pool_recycle": int(_env_first(f"{prefix}POOL_RECYCLE", "POSTGRES_POOL_RECYCLE", default="3600")),
+    }
+
+
 # Available PostgreSQL databases for queries
 AVAILABLE_DATABASES = {
     "mlb": {
@@ -126,20 +200,55 @@ AVAILABLE_DATABASES = {
         "port": POSTGRES_PORT,
         "database": "mlb",
         "user": POSTGRES_USER,
-        "password": POSTGRES_PASSWORD
+        "password": POSTGRES_PASSWORD,
+        "pool": _pool_settings("mlb")
     },
     "mlbfinal": {
         "host": POSTGRES_HOST,
         "port": POSTGRES_PORT,
         "database": "mlbfinal",
         "user": POSTGRES_USER,
-        "password": POSTGRES_PASSWORD
+        "password": POSTGRES_PASSWORD,
+        "pool": _pool_settings("mlbfinal")
     },
     "nba": {
         "host": POSTGRES_HOST,
         "port": POSTGRES_PORT,
         "database": "nba",
         "user": POSTGRES_USER,
-        "password": POSTGRES_PASSWORD
+        "password": POSTGRES_PASSWORD,
+        "pool": _pool_settings("nba")
     }
 }
+# Background ping of idle pooled connections (replaces pool_pre_ping on every checkout)
+POSTGRES_LIVENESS_INTERVAL_SECONDS = int(_env_first("POSTGRES_LIVENESS_INTERVAL_SECONDS", default="30"))
+
+# Schema catalog cache (GET /api/databases/{database}/schema). Cached catalogs are
+# re-fetched after the TTL, or sooner when the background poll sees a DDL change.
+SCHEMA_CACHE_TTL_SECONDS = int(_env_first("SCHEMA_CACHE_TTL_SECONDS", default="900"))
+SCHEMA_DDL_POLL_SECONDS = int(_env_first("SCHEMA_DDL_POLL_SECONDS", default="60"))
+
+# Azure Search index fed by each official container (indexing outbox and index deletes)
+SEARCH_INDEX_BY_CONTAINER = {
+    NBA_OFFICIAL_DOCUMENTS_CONTAINER_NAME: NBA_SEARCH_INDEX_NAME,
+    MLB_OFFICIAL_DOCUMENTS_CONTAINER_NAME: SEARCH_INDEX_NAME,
+    # Legacy API name for the MLB official container
+    "mlb": SEARCH_INDEX_NAME,
+}
+
+# Fields copied into each index: SEARCH_INDEX_FIELDS_<INDEX> (name upper-cased, dashes as
+# underscores, e.g. SEARCH_INDEX_FIELDS_BLITZ_NBA_INDEX) overrides SEARCH_INDEX_FIELDS
+SEARCH_INDEX_FIELDS_BY_INDEX = {
+    index_name: [
+        field.strip()
+        for field in (_env_first(f"SEARCH_INDEX_FIELDS_{index_name.upper().replace('-', '_')}") or "").split(",")
+        if field.strip()
+    ] or SEARCH_INDEX_FIELDS
+    for index_name in set(SEARCH_INDEX_BY_CONTAINER.values())
+}
+
+# PostgreSQL database each official container's stored queries run against
+POSTGRES_DATABASE_BY_CONTAINER = {
+    NBA_OFFICIAL_DOCUMENTS_CONTAINER_NAME: "nba",
+    MLB_OFFICIAL_DOCUMENTS_CONTAINER_NAME: "mlbfinal",
+}
@@ -19,6 +19,8 @@ from .config import (
     DATABASE_NAME,
     DOTENV_LOADED,
     ENV_FILE,
+    MLB_OFFICIAL_COSMOS_CONTAINER_ID,
+    MLB_OFFICIAL_DOCUMENTS_CONTAINER_NAME,
 )
 from .models import FeedbackDocument
 
@@ -295,6 +297,13 @@ def get_container_client(container_name: str):
         ) from exc
 
 
+def resolve_cosmos_container_id(container_name: str) -> str:
+    """Map API container names to actual Cosmos container ids."""
+    if container_name == MLB_OFFICIAL_DOCUMENTS_CONTAINER_NAME:
+        return MLB_OFFICIAL_COSMOS_CONTAINER_ID or container_name
+    return container_name
+
+
 def get_partition_key_field(container_client) -> str:
     """Return partition key path without leading slash (e.g. 'id' or 'UserPrompt')."""
     props = container_client.read()
@@ -305,9 +314,19 @@ def get_partition_key_field(container_client) -> str:
     return pk_field
 
 
-def create_item_logged(container_client, doc_dict: dict, *, context: str) -> dict:
-    """Create a Cosmos item with partition key + step logging."""
-    pk_field = get_partition_key_field(container_client)
+def create_item_logged(
+    container_client,
+    doc_dict: dict,
+    *,
+    context: str,
+    partition_key_field: Optional[str] = None,
+) -> dict:
+    """Create a Cosmos item with partition key + step logging.
+
+    Pass partition_key_field when it was already looked up (e.g. concurrently with
+    embeddings) to skip the container read().
+    """
+    pk_field = partition_key_field or get_partition_key_field(container_client)
     if pk_field not in doc_dict:
         logger.error(
             "Cosmos create_item FAILED | missing partition key field '%s' in document | "
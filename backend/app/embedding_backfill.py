@@ -0,0 +1,287 @@
+"""
+Resumable embedding backfill for official containers.
+
+Streams documents that are missing UserPromptVector/QueryVector in id order,
+embeds their text in large rate-limited batches (embedding cache first), patches
+the vectors back with bounded concurrency and checkpoints the last finished id
+so an interrupted run resumes where it stopped.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from azure.core import MatchConditions
+from azure.cosmos import exceptions as cosmos_exceptions
+
+from .cache_service import cache_service
+from .config import BACKEND_ROOT
+from .cosmos_service import get_partition_key_field
+from .embedding_cache import embedding_cache
+from .embedding_service import embedding_service
+from .rate_limit import TokenBucket, estimate_tokens, retry_after_seconds
+from .search_outbox import search_outbox
+
+logger = logging.getLogger(__name__)
+
+EMBEDDED_FIELDS = ("UserPrompt", "Query")
+
+# Documents with a non-empty text field whose vector is missing or null
+MISSING_VECTOR_FILTER = " OR ".join(
+    f"((NOT IS_DEFINED(c.{field}Vector) OR IS_NULL(c.{field}Vector)) "
+    f"AND IS_STRING(c.{field}) AND LENGTH(c.{field}) > 0)"
+    for field in EMBEDDED_FIELDS
+)
+
+
+def checkpoint_path_for(container: str) -> Path:
+    return BACKEND_ROOT / f"embedding_backfill_{container}.json"
+
+
+class EmbeddingBackfill:
+    """One backfill run over one container."""
+
+    MAX_ATTEMPTS = 6
+    MAX_FAILED_IDS_KEPT = 1000
+    # Azure OpenAI accepts at most 2048 inputs per embeddings request
+    MAX_INPUTS_PER_REQUEST = 2048
+
+    def __init__(
+        self,
+        container: str,
+        container_client,
+        *,
+        batch_size: int = 256,
+        write_concurrency: int = 8,
+        requests_per_minute: float = 60,
+        tokens_per_minute: float = 120_000,
+        restart: bool = False,
+        limit: Optional[int] = None,
+        checkpoint_path: Optional[Path] = None,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ):
+        self.container = container
+        self.container_client = container_client
+        self.batch_size = min(batch_size, self.MAX_INPUTS_PER_REQUEST // len(EMBEDDED_FIELDS))
+        self.write_concurrency = write_concurrency
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.limit = limit
+        self.checkpoint_path = checkpoint_path or checkpoint_path_for(container)
+        self.on_progress = on_progress
+        self.status: Dict[str, Any] = {
+            "container": container,
+            "state": "pending",
+            "last_id": "",
+            "scanned": 0,
+            "patched": 0,
+            "skipped": 0,
+            "failed": 0,
+            "texts_embedded": 0,
+            "cache_hits": 0,
+            "embedding_requests": 0,
+            "throttled": 0,
+            "failed_ids": [],
+            "started_at": None,
+            "finished_at": None,
+            "error": None,
+        }
+        if not restart:
+            self._load_checkpoint()
+
+    def _load_checkpoint(self) -> None:
+        if not self.checkpoint_path.exists():
+            return
+        with open(self.checkpoint_path, "r") as f:
+            saved = json.load(f)
+        if saved.get("state") == "completed":
+            # Ids are random UUIDs, so new documents can sort anywhere; finished runs restart
+            return
+        for key in ("last_id", "scanned", "patched", "skipped", "failed", "texts_embedded",
+                    "cache_hits", "embedding_requests", "throttled", "failed_ids"):
+            if key in saved:
+                self.status[key] = saved[key]
+        logger.info("Resuming embedding backfill for %s after id=%r", self.container, self.status["last_id"])
+
+    def _save_checkpoint(self) -> None:
+        # Write-then-rename so an interruption never leaves a truncated checkpoint
+        tmp_path = self.checkpoint_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({**self.status, "updated_at": time.time()}, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _query(self, pk_field: str) -> str:
+        projection = ["c.id", "c._etag"] + [f"c.{field}" for field in EMBEDDED_FIELDS]
+        projection += [
+            f"(IS_DEFINED(c.{field}Vector) AND NOT IS_NULL(c.{field}Vector)) AS has{field}Vector"
+            for field in EMBEDDED_FIELDS
+        ]
+        if pk_field not in ("id",) + EMBEDDED_FIELDS:
+            projection.append(f'c["{pk_field}"] AS _pk')
+        return (
+            f"SELECT {', '.join(projection)} FROM c "
+            f"WHERE c.id > @last_id AND ({MISSING_VECTOR_FILTER}) "
+            f"ORDER BY c.id"
+        )
+
+    async def run(self) -> Dict[str, Any]:
+        self.status.update(state="running", started_at=time.time(), finished_at=None, error=None)
+        try:
+            pk_field = await asyncio.to_thread(get_partition_key_field, self.container_client)
+            pager = self.container_client.query_items(
+                query=self._query(pk_field),
+                parameters=[{"name": "@last_id", "value": self.status["last_id"]}],
+                enable_cross_partition_query=True,
+                max_item_count=self.batch_size,
+            ).by_page()
+
+            processed = 0
+            state = "completed"
+            while True:
+                if self.limit is not None and processed >= self.limit:
+                    # Stopped early; the checkpoint lets the next run continue from here
+                    state = "limit_reached"
+                    break
+                page = await asyncio.to_thread(lambda: list(next(pager, [])))
+                if not page:
+                    break
+                if self.limit is not None:
+                    page = page[: self.limit - processed]
+                await self._process_page(page, pk_field)
+                processed += len(page)
+                self.status["last_id"] = page[-1]["id"]
+                self._save_checkpoint()
+                if self.on_progress:
+                    self.on_progress(self.status)
+
+            self.status["state"] = state
+        except asyncio.CancelledError:
+            self.status["state"] = "cancelled"
+            raise
+        except Exception as e:
+            logger.error("Embedding backfill for %s failed: %s", self.container, e, exc_info=True)
+            self.status.update(state="failed", error=f"{type(e).__name__}: {e}")
+        finally:
+            self.status["finished_at"] = time.time()
+            self._save_checkpoint()
+            if self.status["patched"]:
+                cache_service.invalidate_container_cache(self.container)
+        return self.status
+
+    async def _process_page(self, page: List[Dict[str, Any]], pk_field: str) -> None:
+        self.status["scanned"] += len(page)
+        needed = [
+            (doc, field)
+            for doc in page
+            for field in EMBEDDED_FIELDS
+            if doc.get(field) and not doc.get(f"has{field}Vector")
+        ]
+        vectors = await self._embed([doc[field] for doc, field in needed])
+
+        updates: Dict[str, Dict[str, List[float]]] = {}
+        for (doc, field), vector in zip(needed, vectors):
+            if vector is not None:
+                updates.setdefault(doc["id"], {})[f"{field}Vector"] = vector
+
+        semaphore = asyncio.Semaphore(self.write_concurrency)
+
+        async def write(doc: Dict[str, Any]) -> None:
+            fields = updates.get(doc["id"])
+            if not fields:
+                self._record_failure(doc["id"])
+                return
+            partition_key = doc["id"] if pk_field == "id" else doc.get("_pk", doc.get(pk_field))
+            async with semaphore:
+                outcome = await self._patch(doc, partition_key, fields)
+            if outcome == "patched":
+                self.status["patched"] += 1
+            elif outcome == "skipped":
+                self.status["skipped"] += 1
+            else:
+                self._record_failure(doc["id"])
+
+        docs_needing_work = {doc["id"]: doc for doc, _ in needed}
+        await asyncio.gather(*(write(doc) for doc in docs_needing_work.values()))
+
+    def _record_failure(self, doc_id: str) -> None:
+        self.status["failed"] += 1
+        if len(self.status["failed_ids"]) < self.MAX_FAILED_IDS_KEPT:
+            self.status["failed_ids"].append(doc_id)
+
+    async def _embed(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Vectors for texts: cache first, then one rate-limited request for the misses."""
+        if not texts:
+            return []
+        vectors = await asyncio.to_thread(embedding_cache.get_many, embedding_service.deployment, texts)
+        self.status["cache_hits"] += sum(1 for vector in vectors if vector is not None)
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        if not missing:
+            return vectors
+
+        fresh_vectors = await self._request_with_retry(missing)
+        if fresh_vectors is None:
+            return vectors
+        fresh = dict(zip(missing, fresh_vectors))
+        await asyncio.to_thread(embedding_cache.put_many, embedding_service.deployment, list(fresh), list(fresh.values()))
+        self.status["texts_embedded"] += len(missing)
+        return [vector if vector is not None else fresh.get(text) for text, vector in zip(texts, vectors)]
+
+    async def _request_with_retry(self, texts: List[str]) -> Optional[List[List[float]]]:
+        tokens = sum(estimate_tokens(text) for text in texts)
+        for attempt in range(1, self.MAX_ATTEMPTS + 1):
+            await self.request_bucket.acquire(1)
+            await self.token_bucket.acquire(tokens)
+            try:
+                self.status["embedding_requests"] += 1
+                return await embedding_service.request_embeddings(texts, max_retries=0)
+            except Exception as e:
+                wait = retry_after_seconds(e)
+                if wait is not None:
+                    self.status["throttled"] += 1
+                    self.request_bucket.penalize(wait)
+                    logger.warning("Embeddings throttled (429); retrying after %.1fs", wait)
+                else:
+                    wait = min(2 ** attempt, 60)
+                    logger.warning(
+                        "Embedding request failed (attempt %s/%s): %s; retrying in %ss",
+                        attempt, self.MAX_ATTEMPTS, e, wait,
+                    )
+                if attempt < self.MAX_ATTEMPTS:
+                    await asyncio.sleep(wait)
+        logger.error("Giving up on embedding batch of %s texts after %s attempts", len(texts), self.MAX_ATTEMPTS)
+        return None
+
+    async def _patch(self, doc: Dict[str, Any], partition_key: Any, fields: Dict[str, List[float]]) -> str:
+        """Patch vectors into one document; returns 'patched', 'skipped' (changed meanwhile) or 'failed'."""
+        operations = [{"op": "set", "path": f"/{name}", "value": vector} for name, vector in fields.items()]
+        for attempt in range(1, self.MAX_ATTEMPTS + 1):
+            try:
+                patched = await asyncio.to_thread(
+                    self.container_client.patch_item,
+                    item=doc["id"],
+                    partition_key=partition_key,
+                    patch_operations=operations,
+                    etag=doc["_etag"],
+                    match_condition=MatchConditions.IfNotModified,
+                )
+                search_outbox.enqueue_upsert(self.container, patched)
+                return "patched"
+            except (cosmos_exceptions.CosmosAccessConditionFailedError, cosmos_exceptions.CosmosResourceNotFoundError):
+                # Edited or deleted since it was read; a later run picks it up if still missing vectors
+                return "skipped"
+            except cosmos_exceptions.CosmosHttpResponseError as e:
+                wait = retry_after_seconds(e)
+                if wait is None or attempt == self.MAX_ATTEMPTS:
+                    logger.error("Patch failed for %s/%s: %s", self.container, doc["id"], e)
+                    return "failed"
+                self.status["throttled"] += 1
+                await asyncio.sleep(wait)
+        return "failed"
+
+
+# Running/finished backfills started through the API, by container
+backfill_runs: Dict[str, EmbeddingBackfill] = {}
@@ -0,0 +1,170 @@
+"""
+Content-addressed embedding cache.
+
+Vectors are keyed by sha256(deployment + text) and stored as packed float32,
+in a local SQLite file and (when REDIS_URL is set) in Redis, so unchanged
+text is never sent to Azure OpenAI twice.
+"""
+
+import hashlib
+import logging
+import sqlite3
+import threading
+from array import array
+from typing import Dict, Iterable, List, Optional
+
+from .cache_service import cache_service
+from .config import EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_REDIS_TTL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+def embedding_key(deployment: str, text: str) -> str:
+    """Content address for one (deployment, text) pair."""
+    return hashlib.sha256(f"{deployment}\0{text}".encode("utf-8")).hexdigest()
+
+
+def pack_vector(vector: List[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def unpack_vector(blob: bytes) -> List[float]:
+    vector = array("f")
+    vector.frombytes(blob)
+    return vector.tolist()
+
+
+class EmbeddingCache:
+    """Two-level (local SQLite + Redis) cache of embedding vectors."""
+
+    REDIS_PREFIX = "embedding:"
+    # Stay well under SQLite's bound-parameter limit
+    LOCAL_LOOKUP_CHUNK = 500
+
+    def __init__(self, path: Optional[str] = EMBEDDING_CACHE_PATH):
+        self.path = path
+        self.redis_client = cache_service.redis_client
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.stats = {
+            "lookups": 0,
+            "local_hits": 0,
+            "redis_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "api_calls_saved": 0,
+        }
+        if path:
+            try:
+                self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+                )
+                logger.info("Embedding cache using local store at %s", path)
+            except Exception as e:
+                logger.error("Could not open local embedding cache at %s: %s", path, e)
+                self._db = None
+
+    def _local_get(self, keys: List[str]) -> Dict[str, bytes]:
+        if self._db is None or not keys:
+            return {}
+        found = {}
+        for start in range(0, len(keys), self.LOCAL_LOOKUP_CHUNK):
+            chunk = keys[start:start + self.LOCAL_LOOKUP_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            with self._lock:
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+            found.update(rows)
+        return found
+
+    def _local_put(self, items: Dict[str, bytes]) -> None:
+        if self._db is None or not items:
+            return
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", items.items()
+            )
+
+    def _redis_get(self, keys: List[str]) -> Dict[str, bytes]:
+        if self.redis_client is None or not keys:
+            return {}
+        try:
+            values = self.redis_client.mget([self.REDIS_PREFIX + key for key in keys])
+            return {key: value for key, value in zip(keys, values) if value is not None}
+        except Exception as e:
+            logger.error(f"Error reading embedding cache from Redis: {e}")
+            return {}
+
+    def _redis_put(self, items: Dict[str, bytes]) -> None:
+        if self.redis_client is None or not items:
+            return
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for key, blob in items.items():
+                pipe.setex(self.REDIS_PREFIX + key, EMBEDDING_CACHE_REDIS_TTL_SECONDS, blob)
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Error writing embedding cache to Redis: {e}")
+
+    def get_many(self, deployment: str, texts: Iterable[str]) -> List[Optional[List[float]]]:
+        """Cached vector for each text (None for misses)."""
+        texts = list(texts)
+        keys = [embedding_key(deployment, text) for text in texts]
+        found = self._local_get(keys)
+        local_hits = len(found)
+
+        missing = [key for key in keys if key not in found]
+        from_redis = self._redis_get(missing)
+        if from_redis:
+            # Promote to the local store so the next lookup stays on this machine
+            self._local_put(from_redis)
+            found.update(from_redis)
+
+        self.stats["lookups"] += len(keys)
+        self.stats["local_hits"] += local_hits
+        self.stats["redis_hits"] += len(from_redis)
+        self.stats["misses"] += len(keys) - len(found)
+        return [unpack_vector(found[key]) if key in found else None for key in keys]
+
+    def get(self, deployment: str, text: str) -> Optional[List[float]]:
+        return self.get_many(deployment, [text])[0]
+
+    def put_many(self, deployment: str, texts: Iterable[str], vectors: Iterable[Optional[List[float]]]) -> None:
+        """Store vectors for texts; None vectors (failed embeddings) are skipped."""
+        items = {
+            embedding_key(deployment, text): pack_vector(vector)
+            for text, vector in zip(texts, vectors)
+            if vector is not None
+        }
+        self._local_put(items)
+        self._redis_put(items)
+        self.stats["stores"] += len(items)
+
+    def put(self, deployment: str, text: str, vector: Optional[List[float]]) -> None:
+        self.put_many(deployment, [text], [vector])
+
+    def record_saved_call(self) -> None:
+        """Count an embeddings API request that was avoided entirely by cache hits."""
+        self.stats["api_calls_saved"] += 1
+
+    def get_stats(self) -> Dict[str, object]:
+        lookups = self.stats["lookups"]
+        hits = self.stats["local_hits"] + self.stats["redis_hits"]
+        local_entries = None
+        if self._db is not None:
+            with self._lock:
+                local_entries = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        return {
+            **self.stats,
+            "hit_rate": round(hits / lookups, 4) if lookups else None,
+            "local_store": self.path,
+            "local_entries": local_entries,
+            "redis_enabled": self.redis_client is not None,
+        }
+
+
+# Global embedding cache instance
+embedding_cache = EmbeddingCache()
@@ -0,0 +1,374 @@
+"""
+Deferred embedding work queue.
+
+When embeddings are deferred, documents are saved without vectors and a job is
+queued here. Worker tasks embed queued jobs in batches (one Azure OpenAI request
+per batch) and patch the vectors into the Cosmos documents. Jobs can also be
+mirrored to Redis so they survive a restart.
+
+In Redis every job belongs to exactly one process: jobs a process enqueues go to its
+own processing list, and at startup it claims leftover jobs one at a time with LMOVE
+(from the shared pending list, and from processing lists whose owner stopped sending
+heartbeats), so several workers starting together never pick up the same job.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+from uuid import uuid4
+
+from azure.core import MatchConditions
+from azure.cosmos import exceptions as cosmos_exceptions
+
+from .cache_service import cache_service
+from .config import (
+    EMBEDDING_QUEUE_BATCH_SIZE,
+    EMBEDDING_QUEUE_MAX_ATTEMPTS,
+    EMBEDDING_QUEUE_REDIS_ENABLED,
+    EMBEDDING_QUEUE_WORKERS,
+)
+from .cosmos_service import get_partition_key_field
+from .embedding_service import embedding_service
+from .search_outbox import search_outbox
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingQueue:
+    """In-process queue of pending embedding jobs with a batching worker pool."""
+
+    REDIS_KEY = "embedding_jobs:pending"
+    PROCESSING_KEY_PREFIX = "embedding_jobs:processing:"
+    OWNER_KEY_PREFIX = "embedding_jobs:owner:"
+    # A processing list is orphaned once its owner's heartbeat key expires
+    OWNER_TTL_SECONDS = 60
+    HEARTBEAT_SECONDS = 20
+    RETRY_DELAY_SECONDS = 5
+    # Window used to report throughput
+    THROUGHPUT_WINDOW_SECONDS = 60
+
+    def __init__(self):
+        self.redis_client = cache_service.redis_client if EMBEDDING_QUEUE_REDIS_ENABLED else None
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._heartbeat: Optional[asyncio.Task] = None
+        self.owner_id = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+        self.processing_key = self.PROCESSING_KEY_PREFIX + self.owner_id
+        self._get_container_client: Optional[Callable[[str], Any]] = None
+        self._pk_fields: Dict[str, str] = {}
+        self._completed_at: Deque[float] = deque(maxlen=10000)
+        self._recent_failures: Deque[Dict[str, Any]] = deque(maxlen=20)
+        self.in_flight = 0
+        self.stats = {
+            "enqueued": 0,
+            "completed": 0,
+            "failed": 0,
+            "retried": 0,
+            "stale_skipped": 0,
+            "batches": 0,
+            "recovered": 0,
+        }
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    def start(self, get_container_client: Callable[[str], Any]) -> None:
+        """Start the worker pool; get_container_client maps API container names to Cosmos clients."""
+        self._get_container_client = get_container_client
+        self._queue = asyncio.Queue()
+        self._recover_from_redis()
+        if self.redis_client is not None:
+            self._heartbeat = asyncio.create_task(self._heartbeat_loop())
+        self._workers = [
+            asyncio.create_task(self._worker(i)) for i in range(EMBEDDING_QUEUE_WORKERS)
+        ]
+        logger.info(
+            "Embedding queue started: workers=%s batch_size=%s redis=%s",
+            EMBEDDING_QUEUE_WORKERS,
+            EMBEDDING_QUEUE_BATCH_SIZE,
+            self.redis_client is not None,
+        )
+
+    async def stop(self) -> None:
+        tasks = self._workers + ([self._heartbeat] if self._heartbeat else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._heartbeat = None
+        await asyncio.to_thread(self._release_to_redis)
+
+    def _owner_key(self, owner_id: str) -> str:
+        return self.OWNER_KEY_PREFIX + owner_id
+
+    def _beat(self) -> None:
+        self.redis_client.set(self._owner_key(self.owner_id), int(time.time()), ex=self.OWNER_TTL_SECONDS)
+
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.HEARTBEAT_SECONDS)
+            try:
+                await asyncio.to_thread(self._beat)
+            except Exception as e:
+                logger.error(f"Error refreshing embedding queue heartbeat in Redis: {e}")
+
+    def _claim(self, source: str) -> int:
+        """Move jobs one at a time from a Redis list into this process's processing list and queue them."""
+        claimed = 0
+        while True:
+            raw = self.redis_client.lmove(source, self.processing_key, "LEFT", "RIGHT")
+            if raw is None:
+                return claimed
+            job = json.loads(raw)
+            job["_raw"] = raw
+            self._queue.put_nowait(job)
+            claimed += 1
+
+    def _recover_from_redis(self) -> None:
+        """Claim jobs left in Redis by stopped or crashed processes."""
+        if self.redis_client is None:
+            return
+        try:
+            # Announce this owner first so nobody treats our (empty) list as orphaned
+            self._beat()
+            recovered = self._claim(self.REDIS_KEY)
+            for key in self.redis_client.scan_iter(match=self.PROCESSING_KEY_PREFIX + "*"):
+                key = key.decode() if isinstance(key, bytes) else key
+                owner_id = key[len(self.PROCESSING_KEY_PREFIX):]
+                if owner_id != self.owner_id and not self.redis_client.exists(self._owner_key(owner_id)):
+                    recovered += self._claim(key)
+            self.stats["recovered"] += recovered
+            if recovered:
+                logger.info("Recovered %s embedding job(s) from Redis", recovered)
+        except Exception as e:
+            logger.error(f"Error recovering embedding jobs from Redis: {e}")
+
+    def _release_to_redis(self) -> None:
+        """Hand unfinished jobs back to the shared pending list at shutdown."""
+        if self.redis_client is None:
+            return
+        try:
+            while self.redis_client.lmove(self.processing_key, self.REDIS_KEY, "LEFT", "RIGHT") is not None:
+                pass
+            self.redis_client.delete(self._owner_key(self.owner_id))
+        except Exception as e:
+            logger.error(f"Error releasing embedding jobs to Redis: {e}")
+
+    async def enqueue(
+        self,
+        container: str,
+        doc_id: str,
+        fields: Dict[str, str],
+        partition_key: Any = None,
+    ) -> None:
+        """
+        Queue embedding of `fields` (field name -> text) for one document.
+
+        partition_key is the document's partition key value; it is stored with the job
+        (and its Redis copy) because `fields` only holds the texts still to embed.
+        """
+        await self.enqueue_many(container, [(doc_id, fields, partition_key)])
+
+    async def enqueue_many(self, container: str, items: Iterable[Tuple[str, Dict[str, str], Any]]) -> None:
+        """Queue (doc_id, fields, partition_key) jobs for one container, persisted with a single RPUSH."""
+        now = time.time()
+        jobs = [
+            {
+                "container": container,
+                "id": doc_id,
+                "fields": fields,
+                "partition_key": partition_key,
+                "attempts": 0,
+                "enqueued_at": now,
+            }
+            for doc_id, fields, partition_key in items
+            if fields
+        ]
+        if not jobs:
+            return
+        if self.redis_client is not None:
+            try:
+                raws = [json.dumps(job) for job in jobs]
+                await asyncio.to_thread(self.redis_client.rpush, self.processing_key, *raws)
+                for job, raw in zip(jobs, raws):
+                    job["_raw"] = raw
+            except Exception as e:
+                logger.error(f"Error persisting embedding jobs to Redis: {e}")
+        for job in jobs:
+            self._queue.put_nowait(job)
+        self.stats["enqueued"] += len(jobs)
+
+    def _remove_from_redis(self, raws: List[str]) -> None:
+        pipeline = self.redis_client.pipeline(transaction=False)
+        for raw in raws:
+            pipeline.lrem(self.processing_key, 1, raw)
+        pipeline.execute()
+
+    async def _forget(self, jobs: List[Dict[str, Any]]) -> None:
+        """Drop finished jobs from this process's Redis processing list (one round trip)."""
+        raws = [job["_raw"] for job in jobs if job.get("_raw") is not None]
+        if not raws or self.redis_client is None:
+            return
+        try:
+            await asyncio.to_thread(self._remove_from_redis, raws)
+        except Exception as e:
+            logger.error(f"Error removing embedding jobs from Redis: {e}")
+
+    async def _next_batch(self) -> List[Dict[str, Any]]:
+        """Wait for one job, then take whatever else is already queued up to the batch size."""
+        batch = [await self._queue.get()]
+        while len(batch) < EMBEDDING_QUEUE_BATCH_SIZE:
+            try:
+                batch.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return batch
+
+    async def _worker(self, worker_id: int) -> None:
+        while True:
+            batch = await self._next_batch()
+            self.in_flight += len(batch)
+            try:
+                await self._process_batch(batch)
+            except Exception as e:
+                logger.error(f"Embedding worker {worker_id} batch error: {e}", exc_info=True)
+                for job in batch:
+                    await self._retry_or_fail(job, str(e))
+            finally:
+                self.in_flight -= len(batch)
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _process_batch(self, batch: List[Dict[str, Any]]) -> None:
+        self.stats["batches"] += 1
+        texts = [text for job in batch for text in job["fields"].values()]
+        vectors = iter(await embedding_service.embed_many(texts))
+
+        touched_containers = set()
+        clients: Dict[str, Any] = {}
+        finished: List[Dict[str, Any]] = []
+        for job in batch:
+            job_vectors = {field: next(vectors) for field in job["fields"]}
+            if any(vector is None for vector in job_vectors.values()):
+                await self._retry_or_fail(job, "embedding request failed")
+                continue
+            try:
+                container = job["container"]
+                if container not in clients:
+                    clients[container] = await asyncio.to_thread(self._get_container_client, container)
+                patched = await asyncio.to_thread(self._patch_document, clients[container], job, job_vectors)
+            except Exception as e:
+                await self._retry_or_fail(job, f"{type(e).__name__}: {e}")
+                continue
+            finished.append(job)
+            if patched is not None:
+                self.stats["completed"] += 1
+                self._completed_at.append(time.time())
+                touched_containers.add(job["container"])
+                search_outbox.enqueue_upsert(job["container"], patched)
+            else:
+                self.stats["stale_skipped"] += 1
+
+        await self._forget(finished)
+        for container in touched_containers:
+            cache_service.invalidate_container_cache(container)
+
+    def _partition_key(self, container_client, job: Dict[str, Any]) -> Any:
+        # Jobs queued without a partition key fall back to what the job itself carries
+        if job.get("partition_key") is not None:
+            return job["partition_key"]
+        container = job["container"]
+        if container not in self._pk_fields:
+            self._pk_fields[container] = get_partition_key_field(container_client)
+        pk_field = self._pk_fields[container]
+        if pk_field == "id":
+            return job["id"]
+        return job["fields"].get(pk_field)
+
+    def _patch_document(
+        self, container_client, job: Dict[str, Any], vectors: Dict[str, List[float]]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Set the vector fields on the stored document and return the patched document.
+
+        Returns None (and leaves the document alone) if the text changed since the
+        job was queued; a newer job covers the new text.
+        """
+        try:
+            doc = container_client.read_item(item=job["id"], partition_key=self._partition_key(container_client, job))
+        except cosmos_exceptions.CosmosResourceNotFoundError:
+            return None
+        if any(doc.get(field) != text for field, text in job["fields"].items()):
+            return None
+        operations = [
+            {"op": "set", "path": f"/{field}Vector", "value": vector}
+            for field, vector in vectors.items()
+        ]
+        try:
+            return container_client.patch_item(
+                item=job["id"],
+                partition_key=self._partition_key(container_client, job),
+                patch_operations=operations,
+                etag=doc["_etag"],
+                match_condition=MatchConditions.IfNotModified,
+            )
+        except cosmos_exceptions.CosmosAccessConditionFailedError:
+            # Document was rewritten between read and patch
+            return None
+
+    async def _retry_or_fail(self, job: Dict[str, Any], error: str) -> None:
+        job["attempts"] += 1
+        if job["attempts"] < EMBEDDING_QUEUE_MAX_ATTEMPTS:
+            self.stats["retried"] += 1
+            asyncio.get_running_loop().call_later(self.RETRY_DELAY_SECONDS, self._queue.put_nowait, job)
+            return
+        self.stats["failed"] += 1
+        await self._forget([job])
+        self._recent_failures.append({
+            "container": job["container"],
+            "id": job["id"],
+            "error": error,
+            "attempts": job["attempts"],
+            "failed_at": time.time(),
+        })
+        logger.error(
+            "Embedding job failed | container=%s | id=%s | attempts=%s | error=%s",
+            job["container"],
+            job["id"],
+            job["attempts"],
+            error,
+        )
+
+    def _redis_depth(self) -> int:
+        return self.redis_client.llen(self.REDIS_KEY) + self.redis_client.llen(self.processing_key)
+
+    async def get_status(self) -> Dict[str, Any]:
+        now = time.time()
+        recent = sum(1 for t in self._completed_at if now - t <= self.THROUGHPUT_WINDOW_SECONDS)
+        redis_depth = None
+        if self.redis_client is not None:
+            try:
+                redis_depth = await asyncio.to_thread(self._redis_depth)
+            except Exception as e:
+                logger.error(f"Error reading embedding queue depth from Redis: {e}")
+        return {
+            "running": self.running,
+            "workers": len(self._workers),
+            "batch_size": EMBEDDING_QUEUE_BATCH_SIZE,
+            "depth": self._queue.qsize() if self._queue else 0,
+            "in_flight": self.in_flight,
+            "redis_depth": redis_depth,
+            "throughput_per_minute": round(recent * 60 / self.THROUGHPUT_WINDOW_SECONDS, 1),
+            **self.stats,
+            "recent_failures": list(self._recent_failures),
+        }
+
+
+# Global embedding queue instance
+embedding_queue = EmbeddingQueue()
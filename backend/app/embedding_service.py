@@ -0,0 +1,134 @@
+"""
+Shared Azure OpenAI embedding client.
+
+One AsyncAzureOpenAI client (and its HTTP connection pool) is created at startup
+and reused by every request that needs embeddings.
+"""
+
+import asyncio
+import logging
+import os
+from typing import List, Optional
+
+from openai import AsyncAzureOpenAI
+
+from .embedding_cache import embedding_cache
+from .config import (
+    AZURE_OPENAI_EMBEDDINGS_ENABLED,
+    OPENAI_API_VERSION,
+    OPENAI_DEPLOYMENT,
+    OPENAI_ENDPOINT,
+    OPENAI_MAX_RETRIES,
+    OPENAI_TIMEOUT,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingService:
+    """Process-wide embedding client with batched requests."""
+
+    def __init__(self):
+        self.deployment = OPENAI_DEPLOYMENT
+        self._client: Optional[AsyncAzureOpenAI] = None
+
+    @property
+    def api_key(self) -> Optional[str]:
+        return os.getenv("AZURE_OPENAI_API_KEY")
+
+    def is_configured(self) -> bool:
+        """Check if embeddings are enabled and an API key is available."""
+        return AZURE_OPENAI_EMBEDDINGS_ENABLED and bool(self.api_key)
+
+    def skip_reason(self) -> Optional[str]:
+        """Why embeddings are skipped, or None when they are configured."""
+        if not AZURE_OPENAI_EMBEDDINGS_ENABLED:
+            return "AZURE_OPENAI_EMBEDDINGS_ENABLED is false"
+        if not self.api_key:
+            return "AZURE_OPENAI_API_KEY not set"
+        return None
+
+    @property
+    def client(self) -> AsyncAzureOpenAI:
+        """The shared client, created on first use if startup did not create it."""
+        if self._client is None:
+            self._client = AsyncAzureOpenAI(
+                azure_endpoint=OPENAI_ENDPOINT,
+                api_version=OPENAI_API_VERSION,
+                api_key=self.api_key,
+                timeout=OPENAI_TIMEOUT,
+                max_retries=OPENAI_MAX_RETRIES,
+            )
+            logger.info(
+                "Created shared Azure OpenAI client (endpoint=%s deployment=%s timeout=%s max_retries=%s)",
+                OPENAI_ENDPOINT,
+                self.deployment,
+                OPENAI_TIMEOUT,
+                OPENAI_MAX_RETRIES,
+            )
+        return self._client
+
+    def start(self) -> None:
+        """Create the shared client at application startup."""
+        if self.is_configured():
+            _ = self.client
+
+    async def close(self) -> None:
+        """Close the shared client's HTTP connection pool."""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    async def request_embeddings(self, texts: List[str], *, max_retries: Optional[int] = None) -> List[List[float]]:
+        """
+        Embed texts in one API request, bypassing the cache. Errors are raised.
+
+        Pass max_retries=0 when the caller handles throttling (retry-after) itself.
+        """
+        client = self.client if max_retries is None else self.client.with_options(max_retries=max_retries)
+        response = await client.embeddings.create(model=self.deployment, input=texts)
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+        for item in response.data:
+            vectors[item.index] = item.embedding
+        return vectors
+
+    async def embed_many(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """
+        Embed several texts, serving what it can from the embedding cache.
+
+        Cache misses are sent in a single request. Returns one vector per input,
+        in order; misses are None if the request failed. Cache reads and writes (SQLite,
+        Redis) run in a worker thread so they do not block the event loop.
+        """
+        if not texts:
+            return []
+        vectors = await asyncio.to_thread(embedding_cache.get_many, self.deployment, texts)
+        # Unique uncached texts, in first-seen order
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        if not missing:
+            embedding_cache.record_saved_call()
+            return vectors
+
+        try:
+            fresh_vectors = await self.request_embeddings(missing)
+        except Exception as e:
+            logger.error(
+                "Error generating embeddings (endpoint=%s deployment=%s batch=%s): %s",
+                OPENAI_ENDPOINT,
+                self.deployment,
+                len(missing),
+                e,
+            )
+            return vectors
+
+        fresh = dict(zip(missing, fresh_vectors))
+        await asyncio.to_thread(embedding_cache.put_many, self.deployment, list(fresh), list(fresh.values()))
+        return [vector if vector is not None else fresh.get(text) for text, vector in zip(texts, vectors)]
+
+    async def embed(self, text: str) -> Optional[List[float]]:
+        """Embed a single text."""
+        return (await self.embed_many([text]))[0]
+
+
+# Global embedding service instance
+embedding_service = EmbeddingService()
@@ -1,15 +1,17 @@
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from openai import AsyncAzureOpenAI
 from typing import List, Optional, Dict
 from uuid import uuid4
 import logging
 import json
+import zlib
 import redis
+from azure.core import MatchConditions
+from azure.cosmos import exceptions as cosmos_exceptions
 import os
 import time
 from datetime import datetime
-from .models import FeedbackDocument
+from .models import BatchIdsRequest, BulkReplaceRequest, FeedbackDocument
 from .config import (
     OFFICIAL_DOCUMENTS_CONTAINER_NAME,
     UNOFFICIAL_PARTNER_FEEDBACK_HELPFUL_CONTAINER_NAME,
@@ -20,22 +22,45 @@ from .config import (
     NBA_UNOFFICIAL_DOCUMENTS_CONTAINER_NAME,
     MLB_UNOFFICIAL_DOCUMENTS_CONTAINER_NAME,
     MLB_OFFICIAL_DOCUMENTS_CONTAINER_NAME,
-    MLB_OFFICIAL_COSMOS_CONTAINER_ID,
     CONTAINER_DISPLAY_NAMES,
     AZURE_OPENAI_EMBEDDINGS_ENABLED,
     OPENAI_ENDPOINT,
     OPENAI_API_VERSION,
     OPENAI_DEPLOYMENT,
-    AVAILABLE_DATABASES
+    AVAILABLE_DATABASES,
+    EMBEDDINGS_DEFERRED,
+    SCHEMA_DDL_POLL_SECONDS,
+    POSTGRES_LIVENESS_INTERVAL_SECONDS,
+    BULK_EMBED_BATCH_SIZE,
+    BULK_WRITE_CONCURRENCY,
+    IMPORT_MAX_BYTES,
+    SEARCH_INDEX_BY_CONTAINER,
 )
 from .postgres_service import postgres_service
 from .azure_search_service import azure_search_service
+from .search_outbox import search_outbox
 from .cache_service import cache_service
+from .snapshot_store import snapshot_store
+from .bulk_operations import (
+    PayloadTooLarge,
+    attach_cached_vectors,
+    cosmos_call_with_retry,
+    document_summary,
+    embed_documents,
+    iter_ndjson,
+    run_bounded,
+)
+from .embedding_backfill import EmbeddingBackfill, backfill_runs
+from .embedding_cache import embedding_cache
+from .embedding_queue import embedding_queue
+from .embedding_service import embedding_service
 from .cosmos_service import (
     cosmos_item_to_feedback,
     create_item_logged,
     get_container_client as _get_cosmos_container_client,
+    get_partition_key_field,
     log_cosmos_config_probe,
+    resolve_cosmos_container_id,
 )
 from .middleware import log_requests_middleware
 
@@ -90,27 +115,76 @@ app.add_middleware(
 # Add request size limiting middleware
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
-from starlette.responses import Response, JSONResponse
+from starlette.responses import Response, JSONResponse, StreamingResponse
+from starlette.routing import Match
 import asyncio
 
 class RequestSizeLimitMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, max_size: int = 10 * 1024 * 1024):  # 10MB limit
+    def __init__(self, app, max_size: int = 10 * 1024 * 1024, path_limits: Optional[Dict[str, int]] = None):  # 10MB limit
         super().__init__(app)
         self.max_size = max_size
+        self.path_limits = path_limits or {}
 
     async def dispatch(self, request: Request, call_next):
         if request.headers.get("content-length"):
             content_length = int(request.headers["content-length"])
-            if content_length > self.max_size:
+            max_size = self.path_limits.get(request.url.path, self.max_size)
+            if content_length > max_size:
                 return JSONResponse(
                     status_code=413,
-                    content={"error": "Request too large", "max_size_mb": self.max_size // (1024 * 1024)}
+                    content={"error": "Request too large", "max_size_mb": max_size // (1024 * 1024)}
                 )
         return await call_next(request)
 
-app.add_middleware(RequestSizeLimitMiddleware, max_size=10 * 1024 * 1024)  # 10MB limit
+app.add_middleware(
+    RequestSizeLimitMiddleware,
+    max_size=10 * 1024 * 1024,  # 10MB limit
+    path_limits={"/api/feedback/documents/import": IMPORT_MAX_BYTES},
+)
+
+# Query parameters through which write endpoints name the containers they change
+SNAPSHOT_CONTAINER_PARAMS = ("container", "source_container", "target_container")
+
+def _route_container_params(request: Request) -> Dict[str, Optional[str]]:
+    """
+    Containers a request names, with the matched endpoint's defaults for those it omits.
+
+    Middleware runs before routing, so the route is matched here; only the container
+    parameters the endpoint actually declares are returned.
+    """
+    for route in app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match != Match.FULL or not hasattr(route, "dependant"):
+            continue
+        containers = {}
+        for param in route.dependant.query_params:
+            if param.name in SNAPSHOT_CONTAINER_PARAMS:
+                default = param.default if isinstance(param.default, str) else None
+                containers[param.name] = request.query_params.get(param.name, default)
+        return containers
+    return {}
+
+async def snapshot_write_guard(request: Request, call_next):
+    """Refuse writes to containers served from a read-only snapshot (SNAPSHOT_MODE=source)."""
+    if (
+        snapshot_store.mode == "source"
+        and request.method in ("POST", "PUT", "PATCH", "DELETE")
+        and request.url.path.startswith("/api/feedback/documents")
+    ):
+        for name in _route_container_params(request).values():
+            if name and snapshot_store.source_for(name) is not None:
+                return JSONResponse(
+                    status_code=409,
+                    content={"detail": f"{name} is served from a read-only snapshot"},
+                )
+    return await call_next(request)
+
+app.middleware("http")(snapshot_write_guard)
 app.middleware("http")(log_requests_middleware)
 
+# Long-running asyncio tasks started at startup and cancelled at shutdown
+background_tasks: List[asyncio.Task] = []
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize application without memory-intensive operations."""
@@ -122,11 +196,63 @@ async def startup_event():
         OPENAI_DEPLOYMENT,
         OPENAI_API_VERSION,
     )
+    embedding_service.start()
+    if embedding_service.is_configured():
+        embedding_queue.start(get_container_client)
+    search_outbox.start()
+    snapshot_store.load()
+    if snapshot_store.mode == "seed":
+        await asyncio.to_thread(_seed_cache_from_snapshots)
     logger.info("Application startup - memory-optimized mode")
     if cache_service.cache_enabled:
         logger.info("Cache service ready - warming will happen on-demand")
     else:
         logger.info("Cache service disabled - Redis not configured")
+    background_tasks.append(asyncio.create_task(_schema_refresh_loop()))
+    for database in AVAILABLE_DATABASES:
+        background_tasks.append(asyncio.create_task(_pool_liveness_loop(database)))
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background tasks."""
+    for task in background_tasks:
+        task.cancel()
+    await embedding_queue.stop()
+    await embedding_service.close()
+    await search_outbox.stop()
+    await azure_search_service.close()
+    snapshot_store.close()
+
+
+def _seed_cache_from_snapshots() -> None:
+    """Warm the document cache of each snapshotted container that has nothing cached yet."""
+    if not cache_service.cache_enabled:
+        logger.info("Snapshot seeding skipped - Redis not configured")
+        return
+    for container, snapshot in snapshot_store.snapshots.items():
+        if cache_service.get_all_cache(container) is None:
+            cache_service.warm_cache_for_container(container, snapshot.newest(0, 1000))
+
+
+async def _pool_liveness_loop(database: str) -> None:
+    """Validate idle pooled connections for one database engine on an interval."""
+    while True:
+        await asyncio.sleep(POSTGRES_LIVENESS_INTERVAL_SECONDS)
+        try:
+            await asyncio.to_thread(postgres_service.check_idle_connections, database)
+        except Exception as e:
+            logger.error(f"Pool liveness check error for {database}: {e}")
+
+
+async def _schema_refresh_loop() -> None:
+    """Poll DDL fingerprints of cached schema catalogs and refresh the ones that changed."""
+    while True:
+        await asyncio.sleep(SCHEMA_DDL_POLL_SECONDS)
+        try:
+            await asyncio.to_thread(postgres_service.refresh_changed_schemas)
+        except Exception as e:
+            logger.error(f"Schema refresh loop error: {e}")
 
 OFFICIAL_EMBEDDING_CONTAINERS = {
     OFFICIAL_DOCUMENTS_CONTAINER_NAME,
@@ -135,80 +261,82 @@ OFFICIAL_EMBEDDING_CONTAINERS = {
 }
 
 
-async def _maybe_add_embeddings(container: str, doc_dict: dict) -> None:
-    """Add embedding vectors for official containers when OpenAI is enabled and reachable."""
+async def _maybe_add_embeddings(container: str, doc_dict: dict, reuse_existing: bool = False) -> None:
+    """
+    Add embedding vectors for official containers when OpenAI is enabled and reachable.
+
+    Unchanged text is served from the embedding cache. With reuse_existing (transfers,
+    where the text is not edited) fields that already carry a vector are left alone.
+    """
     if container not in OFFICIAL_EMBEDDING_CONTAINERS:
         return
 
-    if not AZURE_OPENAI_EMBEDDINGS_ENABLED:
-        logger.info(
-            "Skipping embeddings for container=%s (AZURE_OPENAI_EMBEDDINGS_ENABLED is false)",
-            container,
-        )
+    skip_reason = embedding_service.skip_reason()
+    if skip_reason:
+        logger.info("Skipping embeddings for container=%s (%s)", container, skip_reason)
         return
 
-    api_key = os.getenv("AZURE_OPENAI_API_KEY")
-    if not api_key:
-        logger.info(
-            "Skipping embeddings for container=%s (AZURE_OPENAI_API_KEY not set)",
-            container,
-        )
+    # UserPrompt and Query are embedded together in one batched request
+    fields = [
+        field for field in ("UserPrompt", "Query")
+        if doc_dict.get(field) and not (reuse_existing and doc_dict.get(f"{field}Vector"))
+    ]
+    if not fields:
         return
-
-    openai_client = AsyncAzureOpenAI(
-        azure_endpoint=OPENAI_ENDPOINT,
-        api_version=OPENAI_API_VERSION,
-        api_key=api_key,
-    )
-    if doc_dict.get("UserPrompt"):
-        user_prompt_vec = await get_embedding(
-            openai_client, doc_dict["UserPrompt"], OPENAI_DEPLOYMENT
-        )
-        if user_prompt_vec is None:
+    vectors = await embedding_service.embed_many([doc_dict[field] for field in fields])
+    for field, vector in zip(fields, vectors):
+        if vector is None:
             logger.warning(
-                "UserPrompt embedding failed for container=%s — saving without UserPromptVector",
+                "%s embedding failed for container=%s — saving without %sVector",
+                field,
                 container,
+                field,
             )
         else:
-            doc_dict["UserPromptVector"] = user_prompt_vec
-    if doc_dict.get("Query"):
-        query_vec = await get_embedding(openai_client, doc_dict["Query"], OPENAI_DEPLOYMENT)
-        if query_vec is None:
-            logger.warning(
-                "Query embedding failed for container=%s — saving without QueryVector",
-                container,
-            )
-        else:
-            doc_dict["QueryVector"] = query_vec
+            doc_dict[f"{field}Vector"] = vector
 
 
-async def get_embedding(client: AsyncAzureOpenAI, text: str, model: str) -> List[float]:
-    """Generate embeddings for a given text using Azure OpenAI."""
-    try:
-        response = await client.embeddings.create(
-            model=model,
-            input=text
-        )
-        return response.data[0].embedding
-    except Exception as e:
-        logger.error(
-            "Error generating embedding (endpoint=%s deployment=%s): %s",
-            OPENAI_ENDPOINT,
-            model,
-            e,
-        )
-        return None
+def _should_defer_embeddings(container: str, defer_embeddings: Optional[bool]) -> bool:
+    """Whether this save should skip inline embeddings and queue them instead."""
+    if container not in OFFICIAL_EMBEDDING_CONTAINERS or not embedding_queue.running:
+        return False
+    return EMBEDDINGS_DEFERRED if defer_embeddings is None else defer_embeddings
+
 
-def resolve_cosmos_container_id(container_name: str) -> str:
-    """Map API container names to actual Cosmos container ids."""
-    if container_name == MLB_OFFICIAL_DOCUMENTS_CONTAINER_NAME:
-        return MLB_OFFICIAL_COSMOS_CONTAINER_ID or container_name
-    return container_name
+async def _attach_cached_embeddings(doc_dict: dict) -> Dict[str, str]:
+    """
+    Attach vectors already in the embedding cache; return the fields still to embed.
+
+    Vectors for fields still pending are removed so the document is saved without them
+    until the queue patches them in.
+    """
+    fields = [field for field in ("UserPrompt", "Query") if doc_dict.get(field)]
+    cached = await asyncio.to_thread(
+        embedding_cache.get_many, embedding_service.deployment, [doc_dict[f] for f in fields]
+    )
+    pending = {}
+    for field, vector in zip(fields, cached):
+        if vector is None:
+            pending[field] = doc_dict[field]
+            doc_dict.pop(f"{field}Vector", None)
+        else:
+            doc_dict[f"{field}Vector"] = vector
+    return pending
 
 
+async def _prepare_create(container: str, container_client, doc_dict: dict, reuse_existing: bool = False) -> str:
+    """Run the partition-key lookup and embeddings concurrently; returns the partition key field."""
+    pk_field, _ = await asyncio.gather(
+        asyncio.to_thread(get_partition_key_field, container_client),
+        _maybe_add_embeddings(container, doc_dict, reuse_existing=reuse_existing),
+    )
+    return pk_field
+
 def get_container_client(container_name: str):
     """Get a container client with validation and verbose Cosmos diagnostics."""
     validate_container_name(container_name)
+    if snapshot_store.source_for(container_name) is not None:
+        raise HTTPException(status_code=409, detail=f"{container_name} is served from a read-only snapshot")
     cosmos_id = resolve_cosmos_container_id(container_name)
     if cosmos_id != container_name:
         logger.info("Cosmos container alias: %s -> %s", container_name, cosmos_id)
@@ -221,6 +349,9 @@ async def get_documents(
     container: str = Query(OFFICIAL_DOCUMENTS_CONTAINER_NAME, description="Container name to fetch documents from")
 ):
     validate_container_name(container)
+    snapshot = snapshot_store.source_for(container)
+    if snapshot is not None:
+        return snapshot.newest((page - 1) * limit, limit)
     try:
         logger.info(f"Attempting to fetch documents from container: {container}")
         start_time = time.time()
@@ -272,6 +403,10 @@ async def search_documents(
         if field not in {"UserPrompt", "Query"}:
             raise HTTPException(status_code=400, detail="Invalid field")
 
+        snapshot = snapshot_store.source_for(container)
+        if snapshot is not None:
+            return snapshot.search(field, q)
+
         # Try to get from cache first
         cached_data = cache_service.get_search_cache(container, q, field)
         if cached_data:
@@ -304,6 +439,47 @@ async def search_documents(
         logger.error(f"Error in search_documents: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def _load_all_documents(container: str, limit: int) -> tuple:
+    """
+    Up to `limit` newest documents of a container, from the cache when possible.
+
+    Returns (items, served_from_cache). Blocking Cosmos work runs in a thread so
+    several containers can load concurrently. Snapshot-served containers count as cached.
+    """
+    snapshot = snapshot_store.source_for(container)
+    if snapshot is not None:
+        return snapshot.newest(0, limit), True
+
+    # Try to get from enhanced cache first (only if reasonable limit)
+    if limit <= 1000:
+        cached_data = cache_service.get_all_cache(container)
+        if cached_data:
+            logger.info(f"Retrieved documents from cache for {container}")
+            return cached_data[:limit], True  # Return only requested amount
+
+    query = """
+        SELECT * FROM c 
+        ORDER BY c._ts DESC
+        OFFSET 0 LIMIT @limit
+    """
+    parameters = [{"name": "@limit", "value": limit}]
+
+    def fetch():
+        container_client = get_container_client(container)
+        return list(container_client.query_items(
+            query=query,
+            parameters=parameters,
+            enable_cross_partition_query=True
+        ))
+
+    items = await asyncio.to_thread(fetch)
+
+    # Only cache if result is reasonable size
+    if len(items) <= 1000:
+        cache_service.set_all_cache(container, items)
+    return items, False
+
+
 @app.get("/api/feedback/documents/all", response_model=List[FeedbackDocument])
 async def get_all_documents(
     container: str = Query(OFFICIAL_DOCUMENTS_CONTAINER_NAME, description="Container name to fetch all documents from"),
@@ -321,31 +497,7 @@ async def get_all_documents(
         logger.info(f"Attempting to fetch up to {limit} documents from container: {container}")
         start_time = time.time()
 
-        # Try to get from enhanced cache first (only if reasonable limit)
-        if limit <= 1000:
-            cached_data = cache_service.get_all_cache(container)
-            if cached_data:
-                logger.info(f"Retrieved documents from cache for {container}")
-                return cached_data[:limit]  # Return only requested amount
-
-        container_client = get_container_client(container)
-        
-        query = """
-            SELECT * FROM c 
-            ORDER BY c._ts DESC
-            OFFSET 0 LIMIT @limit
-        """
-        parameters = [{"name": "@limit", "value": limit}]
-        
-        items = list(container_client.query_items(
-            query=query,
-            parameters=parameters,
-            enable_cross_partition_query=True
-        ))
-
-        # Only cache if result is reasonable size
-        if len(items) <= 1000:
-            cache_service.set_all_cache(container, items)
+        items, _ = await _load_all_documents(container, limit)
         
         end_time = time.time()
         logger.info(f"Limited documents fetch completed in {end_time - start_time:.2f} seconds")
@@ -356,10 +508,86 @@ async def get_all_documents(
         logger.error(f"Error in get_all_documents: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+DEFAULT_MULTI_FIELDS = "id,UserPrompt,Query,_ts"
+
+@app.get("/api/feedback/documents/multi")
+async def get_documents_multi(
+    containers: str = Query(..., description="Comma-separated container names"),
+    fields: str = Query(DEFAULT_MULTI_FIELDS, description="Comma-separated document fields to return ('*' for all)"),
+    limit: int = Query(1000, description="Maximum number of documents per container (max: 5000)")
+):
+    """
+    Fetch documents from several containers at once.
+
+    Containers are loaded concurrently (each through the same cache as /all) and the
+    response is NDJSON: one line per container, written as soon as that container is
+    ready, e.g. {"container": "nba-official", "count": 2, "cached": true, "documents": [...]}.
+    A container that fails produces a line with "error" instead of "documents".
+    """
+    names = list(dict.fromkeys(name.strip() for name in containers.split(",") if name.strip()))
+    if not names:
+        raise HTTPException(status_code=400, detail="containers must not be empty")
+    for name in names:
+        validate_container_name(name)
+    field_list = None if fields.strip() == "*" else [f.strip() for f in fields.split(",") if f.strip()]
+    limit = min(limit, 5000)
+
+    async def load(container: str) -> Dict:
+        start_time = time.time()
+        try:
+            items, cached = await _load_all_documents(container, limit)
+        except Exception as e:
+            logger.error(f"Error loading container {container} in get_documents_multi: {e}")
+            return {"container": container, "error": str(e)}
+        if field_list is not None:
+            items = [{field: item[field] for field in field_list if field in item} for item in items]
+        return {
+            "container": container,
+            "count": len(items),
+            "cached": cached,
+            "elapsed_ms": round((time.time() - start_time) * 1000, 1),
+            "documents": items,
+        }
+
+    async def stream():
+        tasks = [asyncio.create_task(load(name)) for name in names]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield json.dumps(await next_done, default=str) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+@app.get("/api/feedback/documents/{doc_id}", response_model=FeedbackDocument)
+async def get_document(
+    doc_id: str,
+    container: str = Query(OFFICIAL_DOCUMENTS_CONTAINER_NAME, description="Container name to read the document from")
+):
+    validate_container_name(container)
+    snapshot = snapshot_store.source_for(container)
+    if snapshot is not None:
+        doc = snapshot.get(doc_id)
+        if doc is None:
+            raise HTTPException(status_code=404, detail=f"Document {doc_id} not found in {container}")
+        return doc
+    try:
+        container_client = get_container_client(container)
+        return await asyncio.to_thread(container_client.read_item, item=doc_id, partition_key=doc_id)
+    except cosmos_exceptions.CosmosResourceNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Document {doc_id} not found in {container}")
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in get_document: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/api/feedback/documents", response_model=FeedbackDocument)
 async def create_document(
     document: FeedbackDocument,
-    container: str = Query(OFFICIAL_DOCUMENTS_CONTAINER_NAME, description="Container name to create document in")
+    container: str = Query(OFFICIAL_DOCUMENTS_CONTAINER_NAME, description="Container name to create document in"),
+    defer_embeddings: Optional[bool] = Query(None, description="Save now and embed in the background (default: EMBEDDINGS_DEFERRED)")
 ):
     validate_container_name(container)
     try:
@@ -375,11 +603,22 @@ async def create_document(
             len(doc_dict.get("Query") or ""),
         )
 
-        await _maybe_add_embeddings(container, doc_dict)
+        defer = _should_defer_embeddings(container, defer_embeddings)
+        if defer:
+            pending = await _attach_cached_embeddings(doc_dict)
+            pk_field = await asyncio.to_thread(get_partition_key_field, container_client)
+        else:
+            pk_field = await _prepare_create(container, container_client, doc_dict)
 
         created = create_item_logged(
-            container_client, doc_dict, context=f"create_document:{container}"
+            container_client,
+            doc_dict,
+            context=f"create_document:{container}",
+            partition_key_field=pk_field,
         )
+        if defer:
+            await embedding_queue.enqueue(container, created["id"], pending, partition_key=created.get(pk_field))
+        search_outbox.enqueue_upsert(container, created)
 
         cache_service.invalidate_container_cache(container)
         logger.info("Created document and invalidated cache for container: %s", container)
@@ -401,7 +640,8 @@ async def create_document(
 async def update_document(
     doc_id: str,
     document: FeedbackDocument,
-    container: str = Query(OFFICIAL_DOCUMENTS_CONTAINER_NAME, description="Container name to update document in")
+    container: str = Query(OFFICIAL_DOCUMENTS_CONTAINER_NAME, description="Container name to update document in"),
+    defer_embeddings: Optional[bool] = Query(None, description="Save now and embed in the background (default: EMBEDDINGS_DEFERRED)")
 ):
     validate_container_name(container)
     try:
@@ -410,9 +650,17 @@ async def update_document(
         doc_dict = document.model_dump()
         doc_dict["id"] = doc_id
 
-        await _maybe_add_embeddings(container, doc_dict)
+        defer = _should_defer_embeddings(container, defer_embeddings)
+        if defer:
+            pending = await _attach_cached_embeddings(doc_dict)
+        else:
+            await _maybe_add_embeddings(container, doc_dict)
 
         response = container_client.upsert_item(doc_dict)
+        if defer:
+            pk_field = await asyncio.to_thread(get_partition_key_field, container_client)
+            await embedding_queue.enqueue(container, doc_id, pending, partition_key=response.get(pk_field))
+        search_outbox.enqueue_upsert(container, response)
         
         # Invalidate cache for this container since we updated a document
         cache_service.invalidate_container_cache(container)
@@ -444,16 +692,8 @@ async def delete_document(
         container_client.delete_item(item=doc_id, partition_key=doc_id)
         logger.info(f"Successfully deleted document {doc_id} from CosmosDB container {container}")
         
-        # Also delete from Azure Search index if this is the NBA Official container
-        if container == NBA_OFFICIAL_DOCUMENTS_CONTAINER_NAME:
-            if azure_search_service.is_configured():
-                search_deletion_success = await azure_search_service.delete_document(doc_id)
-                if search_deletion_success:
-                    logger.info(f"Successfully deleted document {doc_id} from Azure Search index")
-                else:
-                    logger.warning(f"Failed to delete document {doc_id} from Azure Search index, but CosmosDB deletion succeeded")
-            else:
-                logger.warning("Azure Search not configured, skipping search index deletion")
+        # Also delete from the container's Azure Search index (official containers)
+        await _delete_from_search_index(container, [doc_id])
         
         # Invalidate cache for this container since we deleted a document
         cache_service.invalidate_container_cache(container)
@@ -485,15 +725,20 @@ async def transfer_document(
         # Generate new ID for the target document
         doc["id"] = str(uuid4())
         
-        await _maybe_add_embeddings(target_container, doc)
+        pk_field = await _prepare_create(target_container, target_container_client, doc, reuse_existing=True)
 
         # Create in target container
         response = create_item_logged(
-            target_container_client, doc, context=f"transfer_document:{target_container}"
+            target_container_client,
+            doc,
+            context=f"transfer_document:{target_container}",
+            partition_key_field=pk_field,
         )
         
         # Delete from source container
         source_container_client.delete_item(item=doc_id, partition_key=doc_id)
+        search_outbox.enqueue_upsert(target_container, response)
+        await _delete_from_search_index(source_container, [doc_id])
         
         # Invalidate caches for both containers
         cache_service.invalidate_container_cache(source_container)
@@ -505,6 +750,408 @@ async def transfer_document(
         logger.error(f"Error in transfer_document: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/feedback/documents/bulk-replace")
+async def bulk_replace_documents(
+    request: BulkReplaceRequest,
+    container: str = Query(OFFICIAL_DOCUMENTS_CONTAINER_NAME, description="Container name to edit documents in"),
+    defer_embeddings: Optional[bool] = Query(None, description="Save now and embed in the background (default: EMBEDDINGS_DEFERRED)")
+):
+    """
+    Find-and-replace text in one field across a container.
+
+    With apply=false returns the proposed changes. With apply=true re-embeds the changed
+    texts in batches, writes the documents with bounded concurrency (skipping any that
+    changed since they were read) and invalidates the container cache once.
+    """
+    validate_container_name(container)
+    if not request.find:
+        raise HTTPException(status_code=400, detail="find must not be empty")
+    field = request.field
+    try:
+        container_client = get_container_client(container)
+
+        # CONTAINS is case-sensitive, matching the replacement below
+        query = f"SELECT * FROM c WHERE CONTAINS(c.{field}, @find)"
+        parameters = [{"name": "@find", "value": request.find}]
+        if request.ids is not None:
+            query += " AND ARRAY_CONTAINS(@ids, c.id)"
+            parameters.append({"name": "@ids", "value": request.ids})
+        items = await asyncio.to_thread(lambda: list(container_client.query_items(
+            query=query,
+            parameters=parameters,
+            enable_cross_partition_query=True
+        )))
+
+        overrides = request.overrides or {}
+        changes = []
+        for doc in items:
+            old_value = doc.get(field) or ""
+            new_value = overrides.get(doc["id"], old_value.replace(request.find, request.replace))
+            if new_value != old_value:
+                changes.append((doc, old_value, new_value))
+
+        if not request.apply:
+            return {
+                "applied": False,
+                "field": field,
+                "matched": len(items),
+                "changes": [
+                    {"id": doc["id"], "field": field, "oldValue": old_value, "newValue": new_value}
+                    for doc, old_value, new_value in changes
+                ],
+            }
+
+        docs = []
+        for doc, _, new_value in changes:
+            doc[field] = new_value
+            docs.append(doc)
+
+        pending: Dict[str, Dict[str, str]] = {}
+        defer = _should_defer_embeddings(container, defer_embeddings)
+        if defer:
+            pending = await attach_cached_vectors(docs, [field])
+            pk_field = await asyncio.to_thread(get_partition_key_field, container_client)
+        elif container in OFFICIAL_EMBEDDING_CONTAINERS and embedding_service.is_configured():
+            await embed_documents(docs, [field])
+
+        async def write(doc: dict):
+            try:
+                return await cosmos_call_with_retry(
+                    container_client.replace_item,
+                    item=doc["id"],
+                    body=doc,
+                    etag=doc["_etag"],
+                    match_condition=MatchConditions.IfNotModified,
+                )
+            except cosmos_exceptions.CosmosAccessConditionFailedError:
+                return "conflict"
+            except cosmos_exceptions.CosmosResourceNotFoundError:
+                return "not_found"
+            except Exception as e:
+                logger.error("bulk_replace write failed | container=%s | id=%s | %s", container, doc["id"], e)
+                return e
+
+        results = await run_bounded(docs, write)
+
+        updated, conflicts, failed = [], [], []
+        deferred = []
+        for doc, result in zip(docs, results):
+            if isinstance(result, dict):
+                updated.append(document_summary(result))
+                search_outbox.enqueue_upsert(container, result)
+                if doc["id"] in pending:
+                    deferred.append((doc["id"], pending[doc["id"]], result.get(pk_field)))
+            elif result in ("conflict", "not_found"):
+                conflicts.append({"id": doc["id"], "reason": result})
+            else:
+                failed.append({"id": doc["id"], "error": str(result)})
+        await embedding_queue.enqueue_many(container, deferred)
+
+        if updated:
+            cache_service.invalidate_container_cache(container)
+        logger.info(
+            "bulk_replace | container=%s | field=%s | matched=%s | updated=%s | conflicts=%s | failed=%s",
+            container, field, len(items), len(updated), len(conflicts), len(failed),
+        )
+        return {
+            "applied": True,
+            "field": field,
+            "matched": len(items),
+            "updated": len(updated),
+            "documents": updated,
+            "conflicts": conflicts,
+            "failed": failed,
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("bulk_replace failed | container=%s | %s", container, e, exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+async def _delete_from_search_index(container: str, doc_ids: List[str]) -> Optional[Dict]:
+    """
+    Remove deleted documents from the container's search index.
+
+    Goes through the indexing outbox when it runs (so a pending upload cannot land
+    after the delete), otherwise one batched delete call.
+    """
+    index_name = SEARCH_INDEX_BY_CONTAINER.get(container)
+    if index_name is None or not doc_ids:
+        return None
+    if search_outbox.running:
+        return {"queued": search_outbox.enqueue_deletes(container, doc_ids)}
+    if not azure_search_service.is_configured():
+        logger.warning("Azure Search not configured, skipping search index deletion")
+        return None
+    result = await azure_search_service.delete_documents(doc_ids, index_name)
+    if result["failed"]:
+        logger.warning(
+            "Failed to delete %s of %s document(s) from Azure Search index, but CosmosDB deletion succeeded",
+            len(result["failed"]),
+            len(doc_ids),
+        )
+    return {"deleted": len(result["succeeded"]), "failed": result["failed"]}
+
+
+def _batch_summary(results: List[Dict]) -> Dict:
+    """Request count plus the number of results per status."""
+    statuses: Dict[str, int] = {}
+    for result in results:
+        statuses[result["status"]] = statuses.get(result["status"], 0) + 1
+    return {"requested": len(results), "statuses": statuses}
+
+
+@app.post("/api/feedback/documents/transfer-batch")
+async def transfer_documents_batch(
+    request: BatchIdsRequest,
+    source_container: str = Query(..., description="Source container name"),
+    target_container: str = Query(OFFICIAL_DOCUMENTS_CONTAINER_NAME, description="Target container name")
+):
+    """
+    Transfer many documents between containers.
+
+    Reads, creates and deletes run concurrently (bounded), embeddings for documents
+    without vectors go out in batched requests, and each container's cache is
+    invalidated once.
+    """
+    validate_container_name(source_container)
+    validate_container_name(target_container)
+    if source_container == target_container:
+        raise HTTPException(status_code=400, detail="source_container and target_container must differ")
+    doc_ids = list(dict.fromkeys(request.ids))
+    try:
+        logger.info(f"Transferring {len(doc_ids)} documents from {source_container} to {target_container}")
+        source_container_client = get_container_client(source_container)
+        target_container_client = get_container_client(target_container)
+        pk_field = await asyncio.to_thread(get_partition_key_field, target_container_client)
+
+        async def read(doc_id: str):
+            try:
+                return await cosmos_call_with_retry(source_container_client.read_item, item=doc_id, partition_key=doc_id)
+            except cosmos_exceptions.CosmosResourceNotFoundError:
+                return None
+            except Exception as e:
+                return e
+
+        results: Dict[str, Dict] = {}
+        docs = []
+        for doc_id, doc in zip(doc_ids, await run_bounded(doc_ids, read)):
+            if doc is None:
+                results[doc_id] = {"id": doc_id, "status": "not_found"}
+            elif isinstance(doc, Exception):
+                results[doc_id] = {"id": doc_id, "status": "error", "error": f"read failed: {doc}"}
+            else:
+                doc["_source_id"] = doc_id
+                doc["id"] = str(uuid4())
+                docs.append(doc)
+
+        if target_container in OFFICIAL_EMBEDDING_CONTAINERS and embedding_service.is_configured():
+            await embed_documents(docs, ("UserPrompt", "Query"), skip_existing=True)
+
+        async def move(doc: dict) -> Dict:
+            source_id = doc.pop("_source_id")
+            if pk_field not in doc:
+                return {"id": source_id, "status": "error", "error": f"missing partition key field '{pk_field}'"}
+            try:
+                created = await cosmos_call_with_retry(target_container_client.create_item, body=doc)
+            except Exception as e:
+                return {"id": source_id, "status": "error", "error": f"create failed: {e}"}
+            search_outbox.enqueue_upsert(target_container, created)
+            try:
+                await cosmos_call_with_retry(source_container_client.delete_item, item=source_id, partition_key=source_id)
+            except Exception as e:
+                # The copy exists; report it so the source can be cleaned up by hand
+                return {"id": source_id, "status": "copied", "new_id": doc["id"], "error": f"source delete failed: {e}"}
+            return {"id": source_id, "status": "transferred", "new_id": doc["id"]}
+
+        for result in await run_bounded(docs, move):
+            results[result["id"]] = result
+
+        ordered = [results[doc_id] for doc_id in doc_ids]
+        created = [result for result in ordered if result["status"] in ("transferred", "copied")]
+        if created:
+            cache_service.invalidate_container_cache(target_container)
+        removed = [result["id"] for result in ordered if result["status"] == "transferred"]
+        if removed:
+            cache_service.invalidate_container_cache(source_container)
+        search_index = await _delete_from_search_index(source_container, removed)
+
+        summary = _batch_summary(ordered)
+        logger.info("transfer_batch | %s -> %s | %s", source_container, target_container, summary)
+        return {**summary, "search_index": search_index, "results": ordered}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in transfer_documents_batch: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/feedback/documents/delete-batch")
+async def delete_documents_batch(
+    request: BatchIdsRequest,
+    container: str = Query(OFFICIAL_DOCUMENTS_CONTAINER_NAME, description="Container name to delete documents from")
+):
+    """
+    Delete many documents: concurrent Cosmos deletes, one batched search index delete
+    (NBA Official) and one cache invalidation.
+    """
+    validate_container_name(container)
+    doc_ids = list(dict.fromkeys(request.ids))
+    try:
+        container_client = get_container_client(container)
+
+        async def delete(doc_id: str) -> Dict:
+            try:
+                await cosmos_call_with_retry(container_client.delete_item, item=doc_id, partition_key=doc_id)
+                return {"id": doc_id, "status": "deleted"}
+            except cosmos_exceptions.CosmosResourceNotFoundError:
+                return {"id": doc_id, "status": "not_found"}
+            except Exception as e:
+                return {"id": doc_id, "status": "error", "error": str(e)}
+
+        results = await run_bounded(doc_ids, delete)
+        if any(result["status"] == "deleted" for result in results):
+            cache_service.invalidate_container_cache(container)
+        # Missing documents may still be in the index; deleting an absent key is a no-op there
+        search_index = await _delete_from_search_index(
+            container, [result["id"] for result in results if result["status"] != "error"]
+        )
+
+        summary = _batch_summary(results)
+        logger.info("delete_batch | container=%s | %s", container, summary)
+        return {**summary, "search_index": search_index, "results": results}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in delete_documents_batch for container {container}: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/feedback/documents/import")
+async def import_documents(
+    request: Request,
+    container: str = Query(OFFICIAL_DOCUMENTS_CONTAINER_NAME, description="Container name to import documents into"),
+    concurrency: int = Query(BULK_WRITE_CONCURRENCY, ge=1, le=64, description="Concurrent Cosmos writes"),
+    defer_embeddings: Optional[bool] = Query(None, description="Save now and embed in the background (default: EMBEDDINGS_DEFERRED)")
+):
+    """
+    Import documents from a streamed NDJSON body (one document per line; gzip allowed).
+
+    Lines are parsed as they arrive and written in batches: embeddings for a batch go out
+    in one request, writes run `concurrency` at a time with 429 retries, and the container
+    cache is invalidated once at the end. Lines with an id are upserted (re-importing is
+    idempotent); lines without one get a new id. Returns one result per line.
+
+    The body is capped at IMPORT_MAX_BYTES both as received and once decompressed; the
+    import stops with 413 when either is passed.
+    """
+    validate_container_name(container)
+    content_type = request.headers.get("content-type", "").lower()
+    gzipped = "gzip" in request.headers.get("content-encoding", "").lower() or "gzip" in content_type
+
+    start_time = time.time()
+    results: List[Dict] = []
+    batch: List[tuple] = []
+    aborted = None
+    try:
+        container_client = get_container_client(container)
+        pk_field = await asyncio.to_thread(get_partition_key_field, container_client)
+        defer = _should_defer_embeddings(container, defer_embeddings)
+        embed = not defer and container in OFFICIAL_EMBEDDING_CONTAINERS and embedding_service.is_configured()
+
+        async def write(item: tuple):
+            line_no, doc, upsert = item
+            try:
+                if upsert:
+                    written = await cosmos_call_with_retry(container_client.upsert_item, body=doc)
+                else:
+                    written = await cosmos_call_with_retry(container_client.create_item, body=doc)
+                search_outbox.enqueue_upsert(container, written)
+                return {"line": line_no, "status": "upserted" if upsert else "created", "id": doc["id"]}
+            except Exception as e:
+                return {"line": line_no, "status": "error", "id": doc["id"], "error": f"{type(e).__name__}: {e}"}
+
+        async def flush() -> None:
+            if not batch:
+                return
+            docs = [doc for _, doc, _ in batch]
+            pending: Dict[str, Dict[str, str]] = {}
+            if defer:
+                pending = await attach_cached_vectors(docs, ("UserPrompt", "Query"), skip_existing=True)
+            elif embed:
+                await embed_documents(docs, ("UserPrompt", "Query"), skip_existing=True)
+            partition_keys = {doc["id"]: doc.get(pk_field) for doc in docs}
+            deferred = []
+            for result in await run_bounded(batch, write, concurrency):
+                results.append(result)
+                if result["status"] != "error" and result["id"] in pending:
+                    deferred.append((result["id"], pending[result["id"]], partition_keys[result["id"]]))
+            await embedding_queue.enqueue_many(container, deferred)
+            batch.clear()
+
+        try:
+            async for line_no, raw in iter_ndjson(request.stream(), gzipped=gzipped, max_bytes=IMPORT_MAX_BYTES):
+                try:
+                    payload = json.loads(raw)
+                    if not isinstance(payload, dict):
+                        raise ValueError("line is not a JSON object")
+                    # Validate the required fields, but write the line as sent: containers
+                    # carry fields the model does not declare (partition keys, metadata)
+                    FeedbackDocument.model_validate(payload)
+                    doc = payload
+                except Exception as e:
+                    results.append({"line": line_no, "status": "error", "error": f"Invalid document: {e}"})
+                    continue
+                upsert = bool(doc.get("id"))
+                if not upsert:
+                    doc["id"] = str(uuid4())
+                if pk_field not in doc:
+                    results.append({
+                        "line": line_no,
+                        "status": "error",
+                        "id": doc["id"],
+                        "error": f"Document missing partition key field '{pk_field}'",
+                    })
+                    continue
+                batch.append((line_no, doc, upsert))
+                if len(batch) >= BULK_EMBED_BATCH_SIZE:
+                    await flush()
+        except zlib.error as e:
+            aborted = f"Invalid gzip body: {e}"
+        except PayloadTooLarge as e:
+            # Content-Length is only checked by the middleware when the client sends it;
+            # chunked and gzip bodies are capped here. Lines already written stay written.
+            written = sum(1 for result in results if result["status"] != "error")
+            raise HTTPException(
+                status_code=413,
+                detail={
+                    "error": "Request too large",
+                    "max_size_mb": e.max_bytes // (1024 * 1024),
+                    "lines_written": written,
+                },
+            ) from e
+        await flush()
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("import_documents failed | container=%s | %s", container, e, exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e)) from e
+    finally:
+        if any(result["status"] != "error" for result in results):
+            cache_service.invalidate_container_cache(container)
+
+    results.sort(key=lambda result: result["line"])
+    failed = sum(1 for result in results if result["status"] == "error")
+    summary = {
+        "container": container,
+        "lines": len(results),
+        "succeeded": len(results) - failed,
+        "failed": failed,
+        "aborted": aborted,
+        "duration_seconds": round(time.time() - start_time, 2),
+    }
+    logger.info("import_documents | %s", summary)
+    return {**summary, "results": results}
+
 @app.get("/api/feedback/containers")
 async def get_feedback_containers():
     """Get list of available feedback containers with display names."""
@@ -529,6 +1176,15 @@ async def get_available_databases():
         logger.error(f"Error getting available databases: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/databases/pool-stats")
+async def get_database_pool_stats():
+    """Get connection pool occupancy and checkout latency per database engine."""
+    try:
+        return postgres_service.get_pool_stats()
+    except Exception as e:
+        logger.error(f"Error getting pool stats: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/api/query")
 async def execute_query(
     request: Dict[str, str]
@@ -556,13 +1212,16 @@ async def execute_query(
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/databases/{database}/test")
-async def test_database_connection(database: str):
+async def test_database_connection(
+    database: str,
+    live: bool = Query(False, description="Open a new connection instead of reporting the last background check")
+):
     """Test connection to a specific database."""
     try:
         if not postgres_service.validate_database(database):
             raise HTTPException(status_code=400, detail=f"Invalid database: {database}")
         
-        result = postgres_service.test_connection(database)
+        result = postgres_service.test_connection(database, live=live)
         return result
     except HTTPException:
         raise
@@ -585,6 +1244,32 @@ async def get_database_tables(database: str):
         logger.error(f"Error getting database tables: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/databases/{database}/schema")
+async def get_database_schema(
+    database: str,
+    request: Request,
+    refresh: bool = Query(False, description="Bypass the cached catalog and re-read pg_catalog")
+):
+    """Get tables, columns, indexes and row estimates for a database (cached, ETag-aware)."""
+    try:
+        if not postgres_service.validate_database(database):
+            raise HTTPException(status_code=400, detail=f"Invalid database: {database}")
+        
+        result = postgres_service.get_schema(database, force_refresh=refresh)
+        if not result.get("success"):
+            return result
+        
+        etag = f'"{result["etag"]}"'
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+        return JSONResponse(content=result, headers=headers)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting database schema: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 # Cache Management Endpoints
 
 @app.post("/api/feedback/cache/warm/{container}")
@@ -653,8 +1338,81 @@ async def invalidate_cache(container: str):
         logger.error(f"Error invalidating cache for {container}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# Embedding Endpoints
+
+@app.get("/api/embeddings/stats")
+async def get_embedding_stats():
+    """Get embedding cache hit-rate and saved-call counters."""
+    try:
+        return {"cache": embedding_cache.get_stats()}
+    except Exception as e:
+        logger.error(f"Error getting embedding stats: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/embeddings/queue")
+async def get_embedding_queue_status():
+    """Get deferred embedding queue depth, throughput and recent failures."""
+    try:
+        return await embedding_queue.get_status()
+    except Exception as e:
+        logger.error(f"Error getting embedding queue status: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/embeddings/backfill/{container}")
+async def start_embedding_backfill(
+    container: str,
+    batch_size: int = Query(256, description="Documents per page / embedding request"),
+    write_concurrency: int = Query(8, description="Concurrent Cosmos patch calls"),
+    requests_per_minute: float = Query(60, description="Embedding requests per minute"),
+    tokens_per_minute: float = Query(120000, description="Estimated embedding tokens per minute"),
+    restart: bool = Query(False, description="Ignore the saved checkpoint and start from the beginning"),
+    limit: Optional[int] = Query(None, description="Stop after this many documents")
+):
+    """Start a background backfill of missing vectors for an official container."""
+    validate_container_name(container)
+    if container not in OFFICIAL_EMBEDDING_CONTAINERS:
+        raise HTTPException(status_code=400, detail="Embeddings are only stored for official containers")
+    if not embedding_service.is_configured():
+        raise HTTPException(status_code=400, detail=f"Embeddings disabled: {embedding_service.skip_reason()}")
+
+    running = backfill_runs.get(container)
+    if running and running.status["state"] == "running":
+        return running.status
+
+    try:
+        container_client = get_container_client(container)
+        backfill = EmbeddingBackfill(
+            container,
+            container_client,
+            batch_size=batch_size,
+            write_concurrency=write_concurrency,
+            requests_per_minute=requests_per_minute,
+            tokens_per_minute=tokens_per_minute,
+            restart=restart,
+            limit=limit,
+        )
+        backfill_runs[container] = backfill
+        background_tasks.append(asyncio.create_task(backfill.run()))
+        logger.info(f"Started embedding backfill for {container}")
+        return backfill.status
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error starting embedding backfill for {container}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/embeddings/backfill")
+async def get_embedding_backfill_status():
+    """Get progress of backfills started through the API."""
+    return {container: run.status for container, run in backfill_runs.items()}
+
 # Health and monitoring endpoints
 
+@app.get("/api/search/outbox")
+async def get_search_outbox_status():
+    """Pending index actions per index, indexing lag and recent batch sizes."""
+    return search_outbox.get_status()
+
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint with basic memory monitoring."""
@@ -688,7 +1446,8 @@ async def health_check():
             "databases": {
                 "available": postgres_service.get_available_databases(),
                 "engines_initialized": len(postgres_service.engines)
-            }
+            },
+            "snapshots": snapshot_store.get_status() if snapshot_store.enabled else None
         }
     except Exception as e:
         logger.error(f"Health check error: {e}")
@@ -19,6 +19,9 @@ if not logger.handlers:
     handler.setFormatter(formatter)
     logger.addHandler(handler)
 
+# Streamed uploads: the body is consumed incrementally by the endpoint, so it is not captured here
+STREAMING_BODY_PATHS = {"/api/feedback/documents/import"}
+
 async def log_requests_middleware(request: Request, call_next: Callable) -> Response:
     """
     Middleware to log all incoming requests and outgoing responses.
@@ -45,7 +48,7 @@ async def log_requests_middleware(request: Request, call_next: Callable) -> Resp
     
     # Try to read request body for POST/PUT requests
     request_body = None
-    if request.method in ["POST", "PUT", "PATCH"]:
+    if request.method in ["POST", "PUT", "PATCH"] and request.url.path not in STREAMING_BODY_PATHS:
         try:
             # Read the body
             body_bytes = await request.body()
@@ -1,5 +1,5 @@
-from typing import Optional, List
-from pydantic import BaseModel
+from typing import Dict, List, Literal, Optional
+from pydantic import BaseModel, Field
 
 class FeedbackDocument(BaseModel):
     id: Optional[str] = None
@@ -10,4 +10,22 @@ class FeedbackDocument(BaseModel):
     _ts: Optional[int] = None
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True 
+
+
+class BulkReplaceRequest(BaseModel):
+    """Find-and-replace across the documents of one container."""
+    field: Literal["UserPrompt", "Query"] = "Query"
+    find: str
+    replace: str = ""
+    # False returns a preview; True writes the changes
+    apply: bool = False
+    # Limit apply to these document ids (the previews the user kept selected)
+    ids: Optional[List[str]] = None
+    # Per-document replacement values edited in the preview (id -> new field value)
+    overrides: Optional[Dict[str, str]] = None
+
+
+class BatchIdsRequest(BaseModel):
+    """Document ids for the batch transfer/delete endpoints."""
+    ids: List[str] = Field(..., min_length=1, max_length=1000)
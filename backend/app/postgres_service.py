@@ -1,79 +1,469 @@
 import psycopg2
 import psycopg2.extras
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import sessionmaker
-from typing import Dict, List, Any, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+import hashlib
+import json
 import logging
-from datetime import timedelta
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import date, datetime, time as dt_time, timedelta
 from decimal import Decimal
-from .config import AVAILABLE_DATABASES
+from .config import AVAILABLE_DATABASES, POSTGRES_LIVENESS_INTERVAL_SECONDS, SCHEMA_CACHE_TTL_SECONDS
 
 logger = logging.getLogger(__name__)
 
+# PostgreSQL type OIDs whose psycopg2 values are not JSON-serializable as-is
+INTERVAL_OID = 1186
+NUMERIC_OID = 1700
+# SQLSTATE classes for connection, resource and operator-intervention errors (timeouts
+# included): a query failing with one of these was not judged either way
+TRANSIENT_SQLSTATE_CLASSES = {"08", "53", "57", "58"}
+
+
+def format_interval(value: timedelta) -> str:
+    """Render an interval as a compact readable string (e.g. '1h 5m 3s')."""
+    total_seconds = int(value.total_seconds())
+    
+    if total_seconds < 60:
+        return f"{total_seconds}s"
+    elif total_seconds < 3600:
+        minutes = total_seconds // 60
+        seconds = total_seconds % 60
+        if seconds == 0:
+            return f"{minutes}m"
+        else:
+            return f"{minutes}m {seconds}s"
+    else:
+        hours = total_seconds // 3600
+        minutes = (total_seconds % 3600) // 60
+        seconds = total_seconds % 60
+        
+        if minutes == 0 and seconds == 0:
+            return f"{hours}h"
+        elif seconds == 0:
+            return f"{hours}h {minutes}m"
+        else:
+            return f"{hours}h {minutes}m {seconds}s"
+
+
+_SQL_COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+_READ_ONLY_START = re.compile(r"(select|with|show|values|table|explain)\b", re.IGNORECASE)
+# Anything that could write, lock or advance state when run twice
+_NOT_RETRY_SAFE = re.compile(
+    r"\b(insert|update|delete|merge|into|copy|call|do|create|alter|drop|truncate|grant|revoke|"
+    r"lock|analyze|refresh|vacuum|nextval|setval|pg_advisory_\w+|for\s+share|pg_\w*terminate\w*|"
+    r"pg_cancel_backend|set_config|dblink\w*)\b",
+    re.IGNORECASE,
+)
+
+
+def is_retry_safe(query: str) -> bool:
+    """
+    True if the SQL is a single statement that only reads, so re-running it is harmless.
+
+    Deliberately conservative: a keyword inside a string literal also makes it unsafe,
+    which only costs the retry.
+    """
+    statement = _SQL_COMMENTS.sub(" ", query).strip().rstrip(";").strip()
+    if ";" in statement:
+        return False
+    return bool(_READ_ONLY_START.match(statement)) and not _NOT_RETRY_SAFE.search(statement)
+
+
+_CONVERTERS_BY_OID: Dict[int, Callable[[Any], Any]] = {
+    INTERVAL_OID: format_interval,
+    NUMERIC_OID: float,
+}
+
+_CONVERTERS_BY_TYPE: Dict[type, Callable[[Any], Any]] = {
+    timedelta: format_interval,
+    Decimal: float,
+}
+
+
+def _column_converter(index: int, type_code: Optional[int], rows: Sequence[Sequence[Any]]) -> Optional[Callable[[Any], Any]]:
+    """Pick the converter for one column from its type OID, else from its first non-null value."""
+    if type_code is not None and type_code in _CONVERTERS_BY_OID:
+        return _CONVERTERS_BY_OID[type_code]
+    for row in rows:
+        value = row[index]
+        if value is not None:
+            return _CONVERTERS_BY_TYPE.get(type(value))
+    return None
+
+
+def build_row_converter(
+    columns: List[str],
+    description: Optional[Sequence[Any]],
+    rows: Sequence[Sequence[Any]],
+) -> Callable[[Sequence[Any]], Dict[str, Any]]:
+    """
+    Build a row -> dict function with converters resolved once per column.
+    
+    Columns that need no conversion are passed through untouched; when no
+    column needs conversion rows are zipped straight into dicts.
+    """
+    type_codes = [getattr(col, "type_code", None) for col in description] if description else []
+    converters = []
+    for i in range(len(columns)):
+        type_code = type_codes[i] if i < len(type_codes) else None
+        converter = _column_converter(i, type_code, rows)
+        if converter is not None:
+            converters.append((i, converter))
+    
+    if not converters:
+        return lambda row: dict(zip(columns, row))
+    
+    def convert_row(row: Sequence[Any]) -> Dict[str, Any]:
+        values = list(row)
+        for i, converter in converters:
+            value = values[i]
+            if value is not None:
+                values[i] = converter(value)
+        return dict(zip(columns, values))
+    
+    return convert_row
+
+
+# Fingerprint of the public schema's catalog rows. DDL rewrites pg_class/pg_attribute
+# tuples (new xmin) while ANALYZE/VACUUM update them in place, so this only changes on DDL.
+SCHEMA_FINGERPRINT_SQL = """
+    SELECT md5(COALESCE(string_agg(c.oid::text || ':' || c.xmin::text, ',' ORDER BY c.oid), ''))
+        || md5(COALESCE((
+            SELECT string_agg(a.attrelid::text || '.' || a.attnum::text || ':' || a.xmin::text, ','
+                              ORDER BY a.attrelid, a.attnum)
+            FROM pg_attribute a
+            JOIN pg_class ac ON ac.oid = a.attrelid
+            JOIN pg_namespace an ON an.oid = ac.relnamespace
+            WHERE an.nspname = 'public' AND a.attnum > 0
+        ), ''))
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname = 'public'
+"""
+
+# Tables, columns, indexes and row estimates for the public schema in one round trip
+SCHEMA_CATALOG_SQL = f"""
+    SELECT
+        COALESCE((
+            SELECT json_agg(t ORDER BY t.name)
+            FROM (
+                SELECT
+                    c.relname AS name,
+                    CASE c.relkind
+                        WHEN 'r' THEN 'table'
+                        WHEN 'p' THEN 'partitioned table'
+                        WHEN 'v' THEN 'view'
+                        WHEN 'm' THEN 'materialized view'
+                        WHEN 'f' THEN 'foreign table'
+                    END AS kind,
+                    CASE WHEN c.reltuples < 0 THEN NULL ELSE c.reltuples::bigint END AS row_estimate,
+                    COALESCE((
+                        SELECT json_agg(json_build_object(
+                            'name', a.attname,
+                            'type', format_type(a.atttypid, a.atttypmod),
+                            'nullable', NOT a.attnotnull,
+                            'position', a.attnum
+                        ) ORDER BY a.attnum)
+                        FROM pg_attribute a
+                        WHERE a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+                    ), '[]'::json) AS columns,
+                    COALESCE((
+                        SELECT json_agg(json_build_object(
+                            'name', i.relname,
+                            'unique', x.indisunique,
+                            'primary', x.indisprimary,
+                            'definition', pg_get_indexdef(x.indexrelid)
+                        ) ORDER BY i.relname)
+                        FROM pg_index x
+                        JOIN pg_class i ON i.oid = x.indexrelid
+                        WHERE x.indrelid = c.oid
+                    ), '[]'::json) AS indexes
+                FROM pg_class c
+                JOIN pg_namespace n ON n.oid = c.relnamespace
+                WHERE n.nspname = 'public' AND c.relkind IN ('r', 'p', 'v', 'm', 'f')
+            ) t
+        ), '[]'::json) AS tables,
+        ({SCHEMA_FINGERPRINT_SQL}) AS fingerprint
+"""
+
+
+# Single-quoted SQL string literal ('' escapes included)
+_STRING_LITERAL_PATTERN = re.compile(r"'[^']*(?:''[^']*)*'")
+
+
+def _single_statement(query: str) -> str:
+    """The query without trailing semicolons; ValueError if it is empty or holds several statements."""
+    statement = query.strip().rstrip(";").strip()
+    if not statement:
+        raise ValueError("Empty query")
+    if ";" in _STRING_LITERAL_PATTERN.sub("", statement):
+        raise ValueError("Multiple statements are not checked")
+    return statement
+
+
+def _hash_value(value: Any) -> str:
+    """Canonical text of a value for result hashing; equal numbers hash alike across int/numeric/float."""
+    if value is None:
+        return "\x00"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, (float, Decimal)):
+        try:
+            if value == int(value):
+                return str(int(value))
+        except (OverflowError, ValueError):
+            pass  # inf / nan
+        return f"{float(value):.9g}"
+    if isinstance(value, timedelta):
+        return format_interval(value)
+    if isinstance(value, (datetime, date, dt_time)):
+        return value.isoformat()
+    if isinstance(value, (bytes, memoryview)):
+        return bytes(value).hex()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, sort_keys=True, default=str)
+    return str(value)
+
+
+def _row_hash(row: Sequence[Any]) -> int:
+    text = "\x1f".join(_hash_value(value) for value in row)
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest(), "big")
+
+
+class PoolStats:
+    """Checkout latency / wait counters for one engine's connection pool."""
+    
+    SAMPLE_SIZE = 500
+    
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+        self.timeouts = 0
+        self.connections_created = 0
+        self.checkout_ms_max = 0.0
+        self._checkout_ms = deque(maxlen=self.SAMPLE_SIZE)
+        self._lock = threading.Lock()
+    
+    def record_checkout(self, elapsed_ms: float, waited: bool) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self._checkout_ms.append(elapsed_ms)
+            self.checkout_ms_max = max(self.checkout_ms_max, elapsed_ms)
+            if waited:
+                self.waits += 1
+                self.wait_ms_total += elapsed_ms
+                self.wait_ms_max = max(self.wait_ms_max, elapsed_ms)
+    
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+    
+    def record_connect(self) -> None:
+        with self._lock:
+            self.connections_created += 1
+    
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            samples = sorted(self._checkout_ms)
+        
+        def percentile(p: float) -> Optional[float]:
+            if not samples:
+                return None
+            return round(samples[min(len(samples) - 1, int(len(samples) * p))], 2)
+        
+        return {
+            "checkouts": self.checkouts,
+            "connections_created": self.connections_created,
+            "waits": self.waits,
+            "wait_ms_total": round(self.wait_ms_total, 2),
+            "wait_ms_avg": round(self.wait_ms_total / self.waits, 2) if self.waits else None,
+            "wait_ms_max": round(self.wait_ms_max, 2),
+            "timeouts": self.timeouts,
+            "checkout_ms_avg": round(sum(samples) / len(samples), 2) if samples else None,
+            "checkout_ms_p50": percentile(0.5),
+            "checkout_ms_p95": percentile(0.95),
+            "checkout_ms_max": round(self.checkout_ms_max, 2),
+        }
+
+
 class PostgresService:
     def __init__(self):
+        # Engines are created on first use (see _get_engine), so importing this module is cheap
         self.engines = {}
         self.sessions = {}
-        self._initialize_engines()
+        self.pool_stats: Dict[str, PoolStats] = {}
+        # Last background liveness check per database (see check_idle_connections)
+        self.liveness: Dict[str, Dict[str, Any]] = {}
+        self._engine_lock = threading.Lock()
+        self._schema_cache: Dict[str, Dict[str, Any]] = {}
     
     def _convert_value(self, value: Any) -> Any:
-        """Convert PostgreSQL data types to JSON-serializable formats."""
+        """Convert a single PostgreSQL value to a JSON-serializable format."""
         if value is None:
             return None
+        converter = _CONVERTERS_BY_TYPE.get(type(value))
+        return converter(value) if converter else value
+    
+    def _create_engine(self, db_name: str):
+        """Create a SQLAlchemy engine for one database with its configured pool settings."""
+        config = AVAILABLE_DATABASES[db_name]
+        pool = config["pool"]
+        connection_string = (
+            f"postgresql://{config['user']}:{config['password']}@"
+            f"{config['host']}:{config['port']}/{config['database']}"
+        )
+        # No pool_pre_ping: idle connections are validated by check_idle_connections in
+        # the background instead of paying a SELECT 1 round trip on every checkout.
+        engine = create_engine(
+            connection_string, 
+            pool_size=pool["pool_size"],
+            max_overflow=pool["max_overflow"],
+            pool_recycle=pool["pool_recycle"],
+            pool_timeout=pool["pool_timeout"]
+        )
+        stats = PoolStats(capacity=pool["pool_size"] + pool["max_overflow"])
+        event.listen(engine, "connect", lambda dbapi_connection, connection_record: stats.record_connect())
+        self.pool_stats[db_name] = stats
+        logger.info(f"Initialized engine for database: {db_name} (pool: {pool})")
+        return engine
+    
+    def _get_engine(self, database: str):
+        """Return the engine for a database, creating it on first use."""
+        engine = self.engines.get(database)
+        if engine is not None:
+            return engine
+        with self._engine_lock:
+            if database not in self.engines:
+                self.engines[database] = self._create_engine(database)
+            return self.engines[database]
+    
+    @contextmanager
+    def _connect(self, database: str) -> Iterator[Any]:
+        """Check a connection out of the database's pool, recording checkout latency."""
+        engine = self._get_engine(database)
+        stats = self.pool_stats[database]
+        # Pool exhausted at request time: this checkout will queue behind others
+        waited = engine.pool.checkedout() >= stats.capacity
+        start = time.perf_counter()
+        try:
+            connection = engine.connect()
+        except PoolTimeoutError:
+            stats.record_timeout()
+            raise
+        stats.record_checkout((time.perf_counter() - start) * 1000, waited)
+        try:
+            yield connection
+        finally:
+            connection.close()
+    
+    def _execute(self, connection, statement, retry_safe: bool = False):
+        """
+        Execute a statement, retrying once if the pooled connection turned out to be dead.
+
+        Only statements marked retry_safe (read-only) are retried: the server may have run
+        a write before the connection dropped, and running it again could apply it twice.
+        """
+        try:
+            return connection.execute(statement)
+        except DBAPIError as e:
+            if not e.connection_invalidated or not retry_safe:
+                raise
+            # Connection died since the last liveness check; SQLAlchemy reconnects after rollback
+            logger.warning(f"Stale pooled connection invalidated, retrying: {e.orig}")
+            connection.rollback()
+            return connection.execute(statement)
+    
+    def check_idle_connections(self, database: str) -> Optional[Dict[str, Any]]:
+        """
+        Ping each idle pooled connection and evict the dead ones.
         
-        # Handle interval/timedelta objects
-        if isinstance(value, timedelta):
-            total_seconds = int(value.total_seconds())
-            
-            # Convert to a readable format
-            if total_seconds < 60:
-                return f"{total_seconds}s"
-            elif total_seconds < 3600:
-                minutes = total_seconds // 60
-                seconds = total_seconds % 60
-                if seconds == 0:
-                    return f"{minutes}m"
-                else:
-                    return f"{minutes}m {seconds}s"
-            else:
-                hours = total_seconds // 3600
-                minutes = (total_seconds % 3600) // 60
-                seconds = total_seconds % 60
-                
-                if minutes == 0 and seconds == 0:
-                    return f"{hours}h"
-                elif seconds == 0:
-                    return f"{hours}h {minutes}m"
-                else:
-                    return f"{hours}h {minutes}m {seconds}s"
+        Runs in the background per engine (replacing pool_pre_ping). Returns the
+        check result, also kept in self.liveness, or None if the engine is unused.
+        """
+        engine = self.engines.get(database)
+        if engine is None:
+            return None
+        pool = engine.pool
+        idle = pool.checkedin()
+        if idle == 0 and pool.checkedout() > 0:
+            # Every connection is busy serving requests; nothing idle to validate
+            return self.liveness.get(database)
         
-        # Handle Decimal objects
-        if isinstance(value, Decimal):
-            return float(value)
+        start = time.perf_counter()
+        checked = evicted = 0
+        error = None
+        # Idle connections are handed out FIFO, so one-at-a-time checkouts visit each once.
+        # With nothing idle, or every idle connection evicted, one fresh connection verifies the server.
+        attempts = max(idle, 1)
+        while attempts > 0:
+            attempts -= 1
+            try:
+                pooled = pool.connect()
+            except Exception as e:
+                error = str(e)
+                break
+            try:
+                cursor = pooled.cursor()
+                cursor.execute("SELECT 1")
+                cursor.close()
+                checked += 1
+            except Exception as e:
+                pooled.invalidate()
+                evicted += 1
+                error = str(e)
+                if attempts == 0 and checked == 0 and evicted == idle:
+                    attempts = 1
+            finally:
+                pooled.close()
         
-        # For other types, return as-is (they should be JSON-serializable)
-        return value
+        previous = self.liveness.get(database, {})
+        result = {
+            "success": checked > 0,
+            "checked_at": datetime.utcnow().isoformat() + "Z",
+            "checked": checked,
+            "evicted": evicted,
+            "evicted_total": previous.get("evicted_total", 0) + evicted,
+            "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+        }
+        if checked == 0:
+            result["error"] = error
+        if evicted:
+            logger.warning(f"Evicted {evicted} dead idle connection(s) from {database} pool: {error}")
+        self.liveness[database] = result
+        return result
     
-    def _initialize_engines(self):
-        """Initialize SQLAlchemy engines for each database with memory-efficient settings."""
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Pool occupancy and checkout latency for every configured database."""
+        pools = {}
         for db_name, config in AVAILABLE_DATABASES.items():
-            try:
-                connection_string = (
-                    f"postgresql://{config['user']}:{config['password']}@"
-                    f"{config['host']}:{config['port']}/{config['database']}"
-                )
-                # Memory-efficient connection pool settings
-                self.engines[db_name] = create_engine(
-                    connection_string, 
-                    pool_pre_ping=True,
-                    pool_size=2,  # Limit connection pool size
-                    max_overflow=3,  # Limit overflow connections
-                    pool_recycle=3600,  # Recycle connections after 1 hour
-                    pool_timeout=30  # Timeout for getting connection
-                )
-                logger.info(f"Initialized memory-efficient engine for database: {db_name}")
-            except Exception as e:
-                logger.error(f"Failed to initialize engine for {db_name}: {e}")
+            engine = self.engines.get(db_name)
+            if engine is None:
+                pools[db_name] = {"initialized": False, "settings": config["pool"]}
+                continue
+            pool = engine.pool
+            pools[db_name] = {
+                "initialized": True,
+                "settings": config["pool"],
+                "checked_out": pool.checkedout(),
+                "idle": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "status": pool.status(),
+                **self.pool_stats[db_name].snapshot(),
+                "liveness": self.liveness.get(db_name),
+            }
+        return {"success": True, "pools": pools}
     
     def get_available_databases(self) -> List[str]:
         """Get list of available database names."""
@@ -88,18 +478,15 @@ class PostgresService:
         if not self.validate_database(database):
             raise ValueError(f"Invalid database: {database}")
         
-        if database not in self.engines:
-            raise ValueError(f"Engine not available for database: {database}")
-        
         try:
-            engine = self.engines[database]
-            with engine.connect() as connection:
+            with self._connect(database) as connection:
                 # Execute the query
-                result = connection.execute(text(query))
+                result = self._execute(connection, text(query), retry_safe=is_retry_safe(query))
                 
                 # Fetch results with memory-safe limits
                 if result.returns_rows:
                     columns = list(result.keys())
+                    description = result.cursor.description if result.cursor is not None else None
                     
                     # Fetch rows with limit to prevent memory issues
                     rows = result.fetchmany(max_rows)
@@ -113,13 +500,9 @@ class PostgresService:
                         if additional_rows:
                             has_more = True
                     
-                    # Convert rows to list of dictionaries
-                    data = []
-                    for row in rows:
-                        row_dict = {}
-                        for i, column in enumerate(columns):
-                            row_dict[column] = self._convert_value(row[i])
-                        data.append(row_dict)
+                    # Convert rows to list of dictionaries (converters picked once per column)
+                    row_to_dict = build_row_converter(columns, description, rows)
+                    data = [row_to_dict(row) for row in rows]
                     
                     response = {
                         "success": True,
@@ -156,33 +539,221 @@ class PostgresService:
                 "database": database
             }
     
-    def test_connection(self, database: str) -> Dict[str, Any]:
-        """Test connection to a specific database."""
+    @contextmanager
+    def _read_only_cursor(self, database: str, timeout_ms: int, name: Optional[str] = None) -> Iterator[Any]:
+        """
+        Raw DBAPI cursor in a read-only transaction with a statement timeout; always rolled back.
+
+        A raw cursor skips SQLAlchemy bind-parameter parsing of ':name' in stored queries.
+        Pass `name` for a server-side cursor that streams rows instead of buffering them.
+        """
+        with self._connect(database) as connection:
+            dbapi_connection = connection.connection
+            setup = dbapi_connection.cursor()
+            cursor = None
+            try:
+                setup.execute("SET TRANSACTION READ ONLY")
+                setup.execute(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+                cursor = dbapi_connection.cursor(name=name) if name else setup
+                yield cursor
+            finally:
+                if cursor is not None and cursor is not setup:
+                    try:
+                        cursor.close()
+                    except Exception:
+                        pass
+                setup.close()
+                dbapi_connection.rollback()
+    
+    @staticmethod
+    def _query_error(e: Exception) -> Dict[str, Any]:
+        orig = getattr(e, "orig", None) or e
+        message = str(orig).strip().splitlines()
+        sqlstate = getattr(orig, "pgcode", None)
+        return {
+            "success": False,
+            "error": message[0] if message else type(orig).__name__,
+            "sqlstate": sqlstate,
+            # No SQLSTATE means the server never judged the query (pool or connection failure)
+            "transient": not sqlstate or sqlstate[:2] in TRANSIENT_SQLSTATE_CLASSES,
+        }
+    
+    def explain_query(self, database: str, query: str, timeout_ms: int = 5000) -> Dict[str, Any]:
+        """
+        Check a query against the live schema by planning it with EXPLAIN (never executed).
+
+        Runs in a read-only transaction with a statement timeout and is always rolled
+        back. Queries holding more than one statement are rejected, since a second
+        statement could end the read-only transaction. Returns {"success": True} or
+        {"success": False, "error", "sqlstate", "transient"}; transient failures
+        (connection, resources, timeouts) say nothing about the query itself.
+        """
+        if not self.validate_database(database):
+            raise ValueError(f"Invalid database: {database}")
+        try:
+            statement = _single_statement(query)
+        except ValueError as e:
+            return {"success": False, "error": str(e), "sqlstate": None, "transient": False}
+
+        try:
+            with self._read_only_cursor(database, timeout_ms) as cursor:
+                cursor.execute(f"EXPLAIN {statement}")
+            return {"success": True}
+        except Exception as e:
+            return self._query_error(e)
+    
+    def fingerprint_query(self, database: str, query: str, timeout_ms: int = 60000,
+                          fetch_size: int = 2000) -> Dict[str, Any]:
+        """
+        Run a query and summarise its result without keeping it in memory.
+
+        Rows stream through a server-side cursor in a read-only transaction. The digest
+        is the sum of per-row hashes (mod 2**128), so it ignores row order but counts
+        duplicates; values are hashed by position, not column name. Returns
+        {"success", "row_count", "columns", "digest"} or an error like explain_query.
+        """
+        if not self.validate_database(database):
+            raise ValueError(f"Invalid database: {database}")
+        try:
+            statement = _single_statement(query)
+        except ValueError as e:
+            return {"success": False, "error": str(e), "sqlstate": None, "transient": False}
+
+        started = time.perf_counter()
+        try:
+            with self._read_only_cursor(database, timeout_ms, name="result_fingerprint") as cursor:
+                cursor.itersize = fetch_size
+                cursor.execute(statement)
+                digest = 0
+                row_count = 0
+                while True:
+                    rows = cursor.fetchmany(fetch_size)
+                    if not rows:
+                        break
+                    row_count += len(rows)
+                    digest = (digest + sum(_row_hash(row) for row in rows)) % (1 << 128)
+                columns = [column.name for column in cursor.description or []]
+        except Exception as e:
+            return self._query_error(e)
+        return {
+            "success": True,
+            "row_count": row_count,
+            "columns": columns,
+            "digest": format(digest, "032x"),
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+    
+    def test_connection(self, database: str, live: bool = False) -> Dict[str, Any]:
+        """
+        Test connection to a specific database.
+        
+        Unless live=True, a recent background liveness check is reported instead of
+        opening a new connection.
+        """
         if not self.validate_database(database):
             return {"success": False, "error": f"Invalid database: {database}"}
         
+        last_check = self.liveness.get(database)
+        if not live and last_check:
+            checked_at = datetime.fromisoformat(last_check["checked_at"].rstrip("Z"))
+            age_seconds = (datetime.utcnow() - checked_at).total_seconds()
+            if age_seconds <= 2 * POSTGRES_LIVENESS_INTERVAL_SECONDS:
+                result = {"database": database, "source": "background_check", **last_check}
+                result["age_seconds"] = round(age_seconds, 1)
+                return result
+        
         try:
-            engine = self.engines[database]
-            with engine.connect() as connection:
+            with self._connect(database) as connection:
                 connection.execute(text("SELECT 1"))
-            return {"success": True, "database": database}
+            return {"success": True, "database": database, "source": "live"}
         except Exception as e:
             logger.error(f"Connection test failed for {database}: {e}")
             return {"success": False, "error": str(e), "database": database}
     
+    def _fetch_schema(self, database: str) -> Dict[str, Any]:
+        """Read the public schema catalog from pg_catalog and stamp it with an ETag."""
+        start_time = time.time()
+        with self._connect(database) as connection:
+            tables, fingerprint = self._execute(connection, text(SCHEMA_CATALOG_SQL), retry_safe=True).one()
+        
+        catalog = {
+            "success": True,
+            "database": database,
+            "schema": "public",
+            "tables": tables,
+            "table_count": len(tables),
+            "fingerprint": fingerprint,
+        }
+        catalog["etag"] = hashlib.sha1(
+            json.dumps(catalog, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        catalog["generated_at"] = datetime.utcnow().isoformat() + "Z"
+        
+        self._schema_cache[database] = {"catalog": catalog, "fetched_at": time.time()}
+        logger.info(
+            f"Loaded schema catalog for {database}: {len(tables)} relations "
+            f"in {time.time() - start_time:.2f}s"
+        )
+        return catalog
+    
+    def get_schema(self, database: str, force_refresh: bool = False) -> Dict[str, Any]:
+        """Get the cached schema catalog (tables, columns, indexes, row estimates)."""
+        if not self.validate_database(database):
+            return {"success": False, "error": f"Invalid database: {database}"}
+        
+        cached = self._schema_cache.get(database)
+        if cached and not force_refresh and time.time() - cached["fetched_at"] < SCHEMA_CACHE_TTL_SECONDS:
+            return cached["catalog"]
+        
+        try:
+            return self._fetch_schema(database)
+        except Exception as e:
+            logger.error(f"Error loading schema catalog for {database}: {e}")
+            if cached:
+                # Serve the last good catalog rather than failing the request
+                return cached["catalog"]
+            return {"success": False, "error": str(e), "database": database}
+    
+    def get_schema_fingerprint(self, database: str) -> str:
+        """Cheap DDL fingerprint used to decide whether a cached catalog is stale."""
+        with self._connect(database) as connection:
+            return self._execute(connection, text(SCHEMA_FINGERPRINT_SQL), retry_safe=True).scalar()
+    
+    def refresh_changed_schemas(self) -> List[str]:
+        """Re-fetch cached catalogs whose DDL fingerprint changed. Returns refreshed databases."""
+        refreshed = []
+        for database, cached in list(self._schema_cache.items()):
+            try:
+                fingerprint = self.get_schema_fingerprint(database)
+                if fingerprint != cached["catalog"]["fingerprint"]:
+                    logger.info(f"DDL change detected for {database}, refreshing schema catalog")
+                    self._fetch_schema(database)
+                    refreshed.append(database)
+            except Exception as e:
+                logger.warning(f"Schema fingerprint check failed for {database}: {e}")
+        return refreshed
+    
     def get_tables(self, database: str) -> Dict[str, Any]:
-        """Get list of tables in the specified database."""
+        """Get list of tables in the specified database (served from the schema catalog)."""
         if not self.validate_database(database):
             return {"success": False, "error": f"Invalid database: {database}"}
         
-        query = """
-        SELECT table_name 
-        FROM information_schema.tables 
-        WHERE table_schema = 'public' 
-        ORDER BY table_name;
-        """
+        catalog = self.get_schema(database)
+        if not catalog.get("success"):
+            return catalog
         
-        return self.execute_query(database, query)
+        data = [
+            {"table_name": table["name"]}
+            for table in catalog["tables"]
+            if table["kind"] != "materialized view"
+        ]
+        return {
+            "success": True,
+            "data": data,
+            "columns": ["table_name"],
+            "row_count": len(data),
+            "database": database
+        }
 
 # Global instance
 postgres_service = PostgresService() 
\ No newline at end of file
@@ -0,0 +1,67 @@
+"""
+Rate limiting helpers shared by bulk embedding and Cosmos write jobs.
+"""
+
+import asyncio
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """Async token bucket refilled continuously at `rate_per_minute`."""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate_per_second)
+        self._updated = now
+
+    async def acquire(self, amount: float = 1) -> None:
+        """Wait until `amount` tokens are available and take them."""
+        # Requests larger than the bucket would never fit; let them through once it is full
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate_per_second)
+
+    def penalize(self, seconds: float) -> None:
+        """Drain the bucket so callers pause for roughly `seconds` (e.g. after a 429)."""
+        self._refill()
+        self.tokens = min(self.tokens, 0) - seconds * self.rate_per_second
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for embedding input (~4 characters per token)."""
+    return max(1, len(text) // 4)
+
+
+def retry_after_seconds(exc: Exception, default: float = 1.0) -> Optional[float]:
+    """
+    Seconds to wait before retrying a throttled call, or None if `exc` is not a throttle.
+
+    Understands OpenAI 429s (retry-after-ms / retry-after headers) and Cosmos 429s
+    (x-ms-retry-after-ms).
+    """
+    status = getattr(exc, "status_code", None)
+    if status != 429:
+        return None
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or getattr(exc, "headers", None) or {}
+    for name, scale in (("retry-after-ms", 0.001), ("x-ms-retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = headers.get(name)
+        if value is not None:
+            try:
+                return float(value) * scale
+            except (TypeError, ValueError):
+                continue
+    return default
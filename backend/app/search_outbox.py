@@ -0,0 +1,308 @@
+"""
+Search indexing outbox.
+
+Document writes on official containers enqueue index actions here instead of
+waiting on Azure Search. A background flusher sends them per index in batches of
+up to SEARCH_OUTBOX_BATCH_SIZE actions (as soon as a batch is full, otherwise every
+SEARCH_OUTBOX_FLUSH_MS), and re-queues actions that failed with a retriable status.
+
+Pending actions are coalesced per document id: only the latest upload/delete for a
+document is sent, so a delete queued after an upload can never be overtaken by it.
+
+The outbox is opt-in (SEARCH_OUTBOX_ENABLED) and keeps pending actions in memory
+only. Actions still pending when the process dies, and actions that failed for good,
+are not replayed; `sync_search_index.py --apply` is the recovery path, as it uploads
+documents missing from the index and deletes orphans.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Iterable, List, Optional
+
+from azure.search.documents import IndexDocumentsBatch
+
+from .azure_search_service import azure_search_service
+from .config import (
+    SEARCH_INDEX_BY_CONTAINER,
+    SEARCH_INDEX_FIELDS,
+    SEARCH_INDEX_FIELDS_BY_INDEX,
+    SEARCH_OUTBOX_BATCH_SIZE,
+    SEARCH_OUTBOX_ENABLED,
+    SEARCH_OUTBOX_FLUSH_MS,
+    SEARCH_OUTBOX_MAX_ATTEMPTS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Per-document statuses worth retrying (conflict, throttling, service unavailable)
+RETRIABLE_STATUS_CODES = {409, 422, 429, 503}
+
+
+# Sync metadata written alongside the document fields when listed in an index's fields:
+# a hash of the indexed text and the epoch second the document was last sent. They let
+# sync_search_index.py --checksum read only recently indexed documents.
+CONTENT_HASH_FIELD = "ContentHash"
+INDEXED_AT_FIELD = "IndexedAt"
+
+
+def content_hash(doc: Dict[str, Any]) -> str:
+    """Hash of the indexed text fields, comparable between CosmosDB and the index."""
+    payload = json.dumps([doc.get("UserPrompt"), doc.get("Query")], ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def to_index_document(doc: Dict[str, Any], index_name: str) -> Dict[str, Any]:
+    """The subset of a Cosmos document that the search index `index_name` stores."""
+    fields = SEARCH_INDEX_FIELDS_BY_INDEX.get(index_name, SEARCH_INDEX_FIELDS)
+    document = {field: doc[field] for field in fields if doc.get(field) is not None}
+    if CONTENT_HASH_FIELD in fields:
+        document[CONTENT_HASH_FIELD] = content_hash(doc)
+    if INDEXED_AT_FIELD in fields:
+        document[INDEXED_AT_FIELD] = int(time.time())
+    return document
+
+
+class SearchIndexOutbox:
+    """Buffered, coalescing queue of index actions with a batching flusher."""
+
+    RETRY_DELAY_SECONDS = 2
+    # Recent batches kept for the batch-size and lag metrics
+    METRICS_WINDOW = 200
+
+    def __init__(self):
+        self._pending: Dict[str, "OrderedDict[str, Dict[str, Any]]"] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._batches: Deque[Dict[str, Any]] = deque(maxlen=self.METRICS_WINDOW)
+        self._recent_failures: Deque[Dict[str, Any]] = deque(maxlen=20)
+        self.stats = {
+            "enqueued": 0,
+            "coalesced": 0,
+            "indexed": 0,
+            "deleted": 0,
+            "retried": 0,
+            "failed": 0,
+            "flushes": 0,
+            "request_errors": 0,
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if not SEARCH_OUTBOX_ENABLED or not azure_search_service.is_configured():
+            logger.info("Search indexing outbox disabled")
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            "Search indexing outbox started: indexes=%s batch_size=%s flush_ms=%s",
+            sorted(set(SEARCH_INDEX_BY_CONTAINER.values())),
+            SEARCH_OUTBOX_BATCH_SIZE,
+            SEARCH_OUTBOX_FLUSH_MS,
+        )
+
+    async def stop(self) -> None:
+        """Send what is still pending, then stop the flusher."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        try:
+            await self.flush_all()
+        except Exception as e:
+            logger.error(f"Error flushing search outbox at shutdown: {e}")
+
+    def index_for(self, container: str) -> Optional[str]:
+        return SEARCH_INDEX_BY_CONTAINER.get(container)
+
+    def _enqueue(self, index_name: str, doc_id: str, action: str, document: Dict[str, Any], attempts: int = 0,
+                 enqueued_at: Optional[float] = None) -> None:
+        pending = self._pending.setdefault(index_name, OrderedDict())
+        previous = pending.pop(doc_id, None)
+        if previous is not None:
+            self.stats["coalesced"] += 1
+            # Lag is measured from the oldest write not yet in the index
+            enqueued_at = min(enqueued_at or previous["enqueued_at"], previous["enqueued_at"])
+        pending[doc_id] = {
+            "action": action,
+            "document": document,
+            "attempts": attempts,
+            "enqueued_at": enqueued_at or time.time(),
+        }
+        if self._wakeup is not None and len(pending) >= SEARCH_OUTBOX_BATCH_SIZE:
+            self._wakeup.set()
+
+    def enqueue_upserts(self, container: str, docs: Iterable[Dict[str, Any]]) -> int:
+        """Queue merge-or-upload actions for documents written to `container`."""
+        index_name = self.index_for(container)
+        if index_name is None or not self.running:
+            return 0
+        count = 0
+        for doc in docs:
+            if doc.get("id"):
+                self._enqueue(index_name, doc["id"], "upload", to_index_document(doc, index_name))
+                count += 1
+        self.stats["enqueued"] += count
+        return count
+
+    def enqueue_upsert(self, container: str, doc: Dict[str, Any]) -> int:
+        return self.enqueue_upserts(container, [doc])
+
+    def enqueue_deletes(self, container: str, doc_ids: Iterable[str]) -> int:
+        """Queue delete actions for documents removed from `container`."""
+        index_name = self.index_for(container)
+        if index_name is None or not self.running:
+            return 0
+        count = 0
+        for doc_id in doc_ids:
+            self._enqueue(index_name, doc_id, "delete", {"id": doc_id})
+            count += 1
+        self.stats["enqueued"] += count
+        return count
+
+    async def _run(self) -> None:
+        interval = SEARCH_OUTBOX_FLUSH_MS / 1000
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush_all()
+            except Exception as e:
+                logger.error(f"Search outbox flush error: {e}", exc_info=True)
+
+    async def flush_all(self) -> None:
+        """Send every pending action, one batch per request."""
+        for index_name in list(self._pending):
+            while self._pending.get(index_name):
+                if not await self._flush_batch(index_name):
+                    break
+
+    def _take_batch(self, index_name: str) -> List[tuple]:
+        pending = self._pending[index_name]
+        batch = []
+        while pending and len(batch) < SEARCH_OUTBOX_BATCH_SIZE:
+            batch.append(pending.popitem(last=False))
+        return batch
+
+    async def _flush_batch(self, index_name: str) -> bool:
+        """Send one batch; returns False if the whole request failed (retry later)."""
+        batch = self._take_batch(index_name)
+        if not batch:
+            return True
+        index_batch = IndexDocumentsBatch()
+        uploads = [entry["document"] for _, entry in batch if entry["action"] == "upload"]
+        deletes = [entry["document"] for _, entry in batch if entry["action"] == "delete"]
+        if uploads:
+            index_batch.add_merge_or_upload_actions(uploads)
+        if deletes:
+            index_batch.add_delete_actions(deletes)
+
+        client = azure_search_service.get_client(index_name)
+        started = time.time()
+        self.stats["flushes"] += 1
+        try:
+            results = await client.index_documents(index_batch)
+        except Exception as e:
+            self.stats["request_errors"] += 1
+            logger.error(f"Search outbox batch to {index_name} failed ({len(batch)} actions): {e}")
+            for doc_id, entry in batch:
+                self._retry_or_fail(index_name, doc_id, entry, str(e))
+            return False
+
+        entries = dict(batch)
+        succeeded = 0
+        for result in results:
+            entry = entries.get(result.key)
+            if entry is None:
+                continue
+            if result.succeeded:
+                succeeded += 1
+                self.stats["deleted" if entry["action"] == "delete" else "indexed"] += 1
+            elif result.status_code in RETRIABLE_STATUS_CODES:
+                self._retry_or_fail(index_name, result.key, entry, result.error_message)
+            else:
+                self._fail(index_name, result.key, entry, result.error_message)
+
+        now = time.time()
+        self._batches.append({
+            "index": index_name,
+            "size": len(batch),
+            "succeeded": succeeded,
+            "duration_ms": round((now - started) * 1000, 1),
+            "max_lag_ms": round((now - min(entry["enqueued_at"] for _, entry in batch)) * 1000, 1),
+            "sent_at": now,
+        })
+        return True
+
+    def _retry_or_fail(self, index_name: str, doc_id: str, entry: Dict[str, Any], error: str) -> None:
+        attempts = entry["attempts"] + 1
+        if attempts >= SEARCH_OUTBOX_MAX_ATTEMPTS:
+            self._fail(index_name, doc_id, entry, error)
+            return
+        self.stats["retried"] += 1
+
+        def requeue() -> None:
+            pending = self._pending.get(index_name, {})
+            # A newer action for this document supersedes the failed one
+            if doc_id not in pending:
+                self._enqueue(index_name, doc_id, entry["action"], entry["document"], attempts, entry["enqueued_at"])
+
+        asyncio.get_running_loop().call_later(self.RETRY_DELAY_SECONDS * attempts, requeue)
+
+    def _fail(self, index_name: str, doc_id: str, entry: Dict[str, Any], error: str) -> None:
+        self.stats["failed"] += 1
+        self._recent_failures.append({
+            "index": index_name,
+            "id": doc_id,
+            "action": entry["action"],
+            "error": error,
+            "attempts": entry["attempts"] + 1,
+            "failed_at": time.time(),
+        })
+        logger.error(
+            "Search index action failed | index=%s | id=%s | action=%s | error=%s",
+            index_name, doc_id, entry["action"], error,
+        )
+
+    def get_status(self) -> Dict[str, Any]:
+        now = time.time()
+        indexes = {}
+        for index_name in sorted(set(SEARCH_INDEX_BY_CONTAINER.values()) | set(self._pending)):
+            pending = self._pending.get(index_name) or {}
+            oldest = min((entry["enqueued_at"] for entry in pending.values()), default=None)
+            indexes[index_name] = {
+                "pending": len(pending),
+                "oldest_pending_age_ms": round((now - oldest) * 1000, 1) if oldest else 0,
+            }
+        sizes = [batch["size"] for batch in self._batches]
+        lags = [batch["max_lag_ms"] for batch in self._batches]
+        return {
+            "running": self.running,
+            "batch_size_limit": SEARCH_OUTBOX_BATCH_SIZE,
+            "flush_interval_ms": SEARCH_OUTBOX_FLUSH_MS,
+            "indexes": indexes,
+            "batches": {
+                "recent": len(sizes),
+                "avg_size": round(sum(sizes) / len(sizes), 1) if sizes else None,
+                "max_size": max(sizes) if sizes else None,
+                "avg_lag_ms": round(sum(lags) / len(lags), 1) if lags else None,
+                "max_lag_ms": max(lags) if lags else None,
+                "last": self._batches[-1] if self._batches else None,
+            },
+            **self.stats,
+            "recent_failures": list(self._recent_failures),
+        }
+
+
+# Global search indexing outbox instance
+search_outbox = SearchIndexOutbox()
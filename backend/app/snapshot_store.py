@@ -0,0 +1,334 @@
+"""
+Local, read-only container snapshots.
+
+A snapshot is one directory per container, written by export_snapshot.py:
+
+    manifest.json           counts, columns, vector dimensions, byte order
+    <field>.txt / .idx      text columns: UTF-8 values back to back + uint64 offsets (rows + 1)
+    <field>.mask            per text field (not _extra), one byte per row: missing, string or null
+    _ts.i64                 int64 _ts per row
+    order.u32               rows newest first (the order every feedback endpoint returns)
+    by_id.u32               rows sorted by id, for binary-search lookups by document id
+    <field>.f32 / .mask     float32 vector block (rows x dimensions) + one presence byte per row
+
+Everything except the manifest is memory-mapped read-only, so opening a snapshot
+costs a few syscalls and every worker process shares the same page-cache pages.
+Fields other than the text columns and vectors are kept as JSON in the _extra column,
+as are text fields holding something other than a string.
+"""
+
+import json
+import logging
+import mmap
+import os
+import shutil
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from .config import SNAPSHOT_DIR, SNAPSHOT_MODE
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 3
+TEXT_FIELDS = ("id", "UserPrompt", "Query")
+VECTOR_FIELDS = ("UserPromptVector", "QueryVector")
+EXTRA_FIELD = "_extra"
+MANIFEST_FILE = "manifest.json"
+# Text mask values: the field was absent, held a string, or was null
+TEXT_MISSING, TEXT_STRING, TEXT_NULL = 0, 1, 2
+
+
+def write_snapshot(directory: str, container: str, documents: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Write documents as the snapshot for one container; returns its manifest.
+
+    Columns are streamed to disk as documents arrive; only ids and _ts are held in
+    memory (to build the sort order). The snapshot is built in a temporary directory
+    and swapped in at the end, so readers never see a partial one. Vectors whose length
+    differs from the field's first vector are dropped and counted in the manifest.
+    """
+    target = Path(directory) / container
+    building = Path(directory) / f".{container}.building-{os.getpid()}"
+    shutil.rmtree(building, ignore_errors=True)
+    building.mkdir(parents=True)
+
+    columns = TEXT_FIELDS + (EXTRA_FIELD,)
+    text_files = {field: open(building / f"{field}.txt", "wb") for field in columns}
+    offsets = {field: array("Q", [0]) for field in columns}
+    vector_files = {field: open(building / f"{field}.f32", "wb") for field in VECTOR_FIELDS}
+    masks = {field: bytearray() for field in VECTOR_FIELDS}
+    text_masks = {field: bytearray() for field in TEXT_FIELDS}
+    dropped = {field: 0 for field in VECTOR_FIELDS}
+    dimensions: Dict[str, Optional[int]] = {field: None for field in VECTOR_FIELDS}
+    ids: List[bytes] = []
+    timestamps = array("q")
+
+    try:
+        for doc in documents:
+            row = len(ids)
+            doc_id = str(doc.get("id", ""))
+            ids.append(doc_id.encode("utf-8"))
+            timestamps.append(int(doc.get("_ts") or 0))
+            extra = {
+                key: value for key, value in doc.items()
+                if key not in VECTOR_FIELDS and key != "_ts"
+                and not (key in TEXT_FIELDS and (value is None or isinstance(value, str)))
+            }
+            values = {field: doc.get(field) for field in TEXT_FIELDS}
+            for field in TEXT_FIELDS:
+                if field not in doc:
+                    text_masks[field].append(TEXT_MISSING)
+                elif doc[field] is None:
+                    text_masks[field].append(TEXT_NULL)
+                else:
+                    # Non-string values went to _extra above
+                    text_masks[field].append(TEXT_STRING if isinstance(doc[field], str) else TEXT_MISSING)
+            values[EXTRA_FIELD] = json.dumps(extra, separators=(",", ":"), default=str)
+            for field in columns:
+                value = values[field]
+                data = value.encode("utf-8") if isinstance(value, str) else b""
+                text_files[field].write(data)
+                offsets[field].append(offsets[field][-1] + len(data))
+
+            for field in VECTOR_FIELDS:
+                vector = doc.get(field)
+                if vector and dimensions[field] is None:
+                    # Rows before the first vector were all missing: back-fill their zero rows
+                    dimensions[field] = len(vector)
+                    vector_files[field].write(bytes(4 * len(vector) * row))
+                size = dimensions[field]
+                if size is None:
+                    masks[field].append(0)
+                elif vector and len(vector) == size:
+                    vector_files[field].write(array("f", vector).tobytes())
+                    masks[field].append(1)
+                else:
+                    if vector:
+                        dropped[field] += 1
+                    vector_files[field].write(bytes(4 * size))
+                    masks[field].append(0)
+    finally:
+        for f in list(text_files.values()) + list(vector_files.values()):
+            f.close()
+
+    count = len(ids)
+    for field in columns:
+        with open(building / f"{field}.idx", "wb") as f:
+            offsets[field].tofile(f)
+    for field in TEXT_FIELDS:
+        with open(building / f"{field}.mask", "wb") as f:
+            f.write(text_masks[field])
+    for field in VECTOR_FIELDS:
+        with open(building / f"{field}.mask", "wb") as f:
+            f.write(masks[field])
+        if dropped[field]:
+            logger.warning(
+                "Snapshot %s: dropped %s %s value(s) not %s-dimensional",
+                container, dropped[field], field, dimensions[field],
+            )
+    with open(building / "_ts.i64", "wb") as f:
+        timestamps.tofile(f)
+    with open(building / "order.u32", "wb") as f:
+        array("I", sorted(range(count), key=lambda row: (-timestamps[row], ids[row]))).tofile(f)
+    with open(building / "by_id.u32", "wb") as f:
+        array("I", sorted(range(count), key=lambda row: ids[row])).tofile(f)
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "container": container,
+        "count": count,
+        "text_fields": list(columns),
+        "vector_fields": {field: dimensions[field] for field in VECTOR_FIELDS},
+        "dropped_vectors": dropped,
+        "byteorder": sys.byteorder,
+        "created_at": time.time(),
+    }
+    with open(building / MANIFEST_FILE, "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    previous = Path(directory) / f".{container}.previous-{os.getpid()}"
+    if target.exists():
+        os.replace(target, previous)
+    os.replace(building, target)
+    shutil.rmtree(previous, ignore_errors=True)
+    return manifest
+
+
+class ContainerSnapshot:
+    """One container's snapshot, memory-mapped read-only."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path / MANIFEST_FILE, "r") as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot format {self.manifest.get('format_version')} in {self.path}")
+        if self.manifest.get("byteorder") != sys.byteorder:
+            raise ValueError(f"Snapshot {self.path} was written on a {self.manifest.get('byteorder')}-endian host")
+        self.container = self.manifest["container"]
+        self.count = self.manifest["count"]
+        self._maps: List[mmap.mmap] = []
+        self._views: List[memoryview] = []
+
+        self.text = {field: self._map(f"{field}.txt") for field in self.manifest["text_fields"]}
+        self.offsets = {field: self._map(f"{field}.idx", "Q") for field in self.manifest["text_fields"]}
+        self.timestamps = self._map("_ts.i64", "q")
+        self.text_masks = {field: self._map(f"{field}.mask") for field in TEXT_FIELDS}
+        self.order = self._map("order.u32", "I")
+        self.by_id = self._map("by_id.u32", "I")
+        self.dimensions = {field: size for field, size in self.manifest["vector_fields"].items() if size}
+        self.vectors = {field: self._map(f"{field}.f32", "f") for field in self.dimensions}
+        self.masks = {field: self._map(f"{field}.mask") for field in self.dimensions}
+
+    def _map(self, name: str, fmt: Optional[str] = None) -> memoryview:
+        with open(self.path / name, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                view = memoryview(b"")
+            else:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._maps.append(mapped)
+                view = memoryview(mapped)
+        self._views.append(view)
+        if fmt:
+            view = view.cast(fmt)
+            self._views.append(view)
+        return view
+
+    def close(self) -> None:
+        # Views must be released (cast views first) before their maps can be closed
+        for view in reversed(self._views):
+            view.release()
+        for mapped in self._maps:
+            mapped.close()
+        self._views, self._maps = [], []
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _bytes(self, field: str, row: int) -> bytes:
+        offsets = self.offsets[field]
+        return self.text[field][offsets[row]:offsets[row + 1]].tobytes()
+
+    def value(self, field: str, row: int) -> str:
+        """A text column's value; "" when the document had no string there."""
+        return self._bytes(field, row).decode("utf-8")
+
+    def vector(self, field: str, row: int) -> Optional[memoryview]:
+        """Zero-copy float32 view of one row's vector, or None if the document had none."""
+        if field not in self.dimensions or not self.masks[field][row]:
+            return None
+        size = self.dimensions[field]
+        return self.vectors[field][row * size:(row + 1) * size]
+
+    def document(self, row: int, include_vectors: bool = True) -> Dict[str, Any]:
+        doc: Dict[str, Any] = json.loads(self._bytes(EXTRA_FIELD, row) or b"{}")
+        for field in TEXT_FIELDS:
+            state = self.text_masks[field][row]
+            if state == TEXT_STRING:
+                doc[field] = self.value(field, row)
+            elif state == TEXT_NULL:
+                doc[field] = None
+        doc["_ts"] = self.timestamps[row]
+        if include_vectors:
+            for field in self.dimensions:
+                vector = self.vector(field, row)
+                if vector is not None:
+                    doc[field] = vector.tolist()
+        return doc
+
+    def find_row(self, doc_id: str) -> Optional[int]:
+        """Row of a document id, by binary search over by_id (O(log n), no decoding)."""
+        key = doc_id.encode("utf-8")
+        position = bisect_left(range(self.count), key, key=lambda i: self._bytes("id", self.by_id[i]))
+        if position < self.count and self._bytes("id", self.by_id[position]) == key:
+            return self.by_id[position]
+        return None
+
+    def get(self, doc_id: str, include_vectors: bool = True) -> Optional[Dict[str, Any]]:
+        """One document by id, or None if the snapshot does not have it."""
+        row = self.find_row(doc_id)
+        return None if row is None else self.document(row, include_vectors)
+
+    def newest(self, offset: int = 0, limit: int = 20, include_vectors: bool = True) -> List[Dict[str, Any]]:
+        """Documents ordered by _ts descending, like the feedback endpoints' queries."""
+        rows = self.order[max(offset, 0):max(offset, 0) + max(limit, 0)]
+        return [self.document(row, include_vectors) for row in rows]
+
+    def search(self, field: str, term: str, include_vectors: bool = True) -> List[Dict[str, Any]]:
+        """Case-insensitive substring match on a text column, newest first."""
+        term = term.lower()
+        return [
+            self.document(row, include_vectors)
+            for row in self.order
+            if term in self.value(field, row).lower()
+        ]
+
+
+class SnapshotStore:
+    """Snapshots found in SNAPSHOT_DIR, loaded once at startup."""
+
+    def __init__(self, directory: Optional[str] = SNAPSHOT_DIR, mode: str = SNAPSHOT_MODE):
+        self.directory = directory
+        self.mode = mode
+        self.snapshots: Dict[str, ContainerSnapshot] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode in ("source", "seed")
+
+    def load(self) -> None:
+        """Open every container snapshot in the directory (no-op unless SNAPSHOT_MODE is set)."""
+        if not self.enabled or not self.directory or not os.path.isdir(self.directory):
+            return
+        started = time.perf_counter()
+        for entry in sorted(Path(self.directory).iterdir()):
+            if entry.name.startswith(".") or not (entry / MANIFEST_FILE).is_file():
+                continue
+            try:
+                snapshot = ContainerSnapshot(entry)
+            except Exception as e:
+                logger.error("Could not open snapshot %s: %s", entry, e)
+                continue
+            self.snapshots[snapshot.container] = snapshot
+        logger.info(
+            "Loaded %s container snapshot(s) from %s in %.1fms (mode=%s): %s",
+            len(self.snapshots),
+            self.directory,
+            (time.perf_counter() - started) * 1000,
+            self.mode,
+            {name: len(snapshot) for name, snapshot in self.snapshots.items()},
+        )
+
+    def source_for(self, container: str) -> Optional[ContainerSnapshot]:
+        """The snapshot serving reads for a container, when running with SNAPSHOT_MODE=source."""
+        if self.mode != "source":
+            return None
+        return self.snapshots.get(container)
+
+    def close(self) -> None:
+        for snapshot in self.snapshots.values():
+            snapshot.close()
+        self.snapshots = {}
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "directory": self.directory,
+            "containers": {
+                name: {
+                    "count": len(snapshot),
+                    "created_at": snapshot.manifest.get("created_at"),
+                    "vector_dimensions": snapshot.dimensions,
+                }
+                for name, snapshot in self.snapshots.items()
+            },
+        }
+
+
+# Global instance
+snapshot_store = SnapshotStore()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Embedding Backfill - fill in missing UserPromptVector/QueryVector on official containers"""
+
+import os
+import sys
+import asyncio
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+load_dotenv()
+
+try:
+    from app.cosmos_service import get_container_client, resolve_cosmos_container_id
+    from app.embedding_backfill import EmbeddingBackfill
+    from app.embedding_service import embedding_service
+    from app.config import (
+        MLB_OFFICIAL_DOCUMENTS_CONTAINER_NAME,
+        NBA_OFFICIAL_DOCUMENTS_CONTAINER_NAME,
+    )
+except ImportError as e:
+    print(f"Error importing: {e}")
+    sys.exit(1)
+
+
+def print_progress(status: dict) -> None:
+    print(
+        f"  scanned={status['scanned']} patched={status['patched']} skipped={status['skipped']} "
+        f"failed={status['failed']} embedded={status['texts_embedded']} cache_hits={status['cache_hits']} "
+        f"throttled={status['throttled']} last_id={status['last_id'][:8]}..."
+    )
+
+
+async def main():
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--container",
+        required=True,
+        choices=[MLB_OFFICIAL_DOCUMENTS_CONTAINER_NAME, NBA_OFFICIAL_DOCUMENTS_CONTAINER_NAME],
+    )
+    parser.add_argument("--batch-size", type=int, default=256, help="Documents per page / embedding request")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent Cosmos patch calls")
+    parser.add_argument("--rpm", type=float, default=60, help="Embedding requests per minute")
+    parser.add_argument("--tpm", type=float, default=120000, help="Estimated embedding tokens per minute")
+    parser.add_argument("--limit", type=int, default=None, help="Stop after this many documents")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start over")
+    args = parser.parse_args()
+
+    if not embedding_service.is_configured():
+        print(f"❌ Embeddings disabled: {embedding_service.skip_reason()}")
+        sys.exit(1)
+
+    container_client = get_container_client(resolve_cosmos_container_id(args.container))
+    backfill = EmbeddingBackfill(
+        args.container,
+        container_client,
+        batch_size=args.batch_size,
+        write_concurrency=args.concurrency,
+        requests_per_minute=args.rpm,
+        tokens_per_minute=args.tpm,
+        restart=args.restart,
+        limit=args.limit,
+        on_progress=print_progress,
+    )
+    print(f"Backfilling embeddings for {args.container} (checkpoint: {backfill.checkpoint_path})")
+    if backfill.status["last_id"]:
+        print(f"Resuming after id {backfill.status['last_id']}")
+
+    try:
+        status = await backfill.run()
+    finally:
+        await embedding_service.close()
+
+    print(f"\nState: {status['state']}")
+    print_progress(status)
+    if status["error"]:
+        print(f"Error: {status['error']}")
+    if status["failed_ids"]:
+        print(f"Failed ids (first {len(status['failed_ids'])}) are listed in {backfill.checkpoint_path}")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\nInterrupted - rerun to resume from the last checkpoint.")
+        sys.exit(0)
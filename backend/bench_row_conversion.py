@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""Row Conversion Benchmark - per-cell isinstance chain vs per-column converters"""
+
+import os
+import sys
+import time
+import random
+from datetime import timedelta
+from decimal import Decimal
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+try:
+    from app.postgres_service import INTERVAL_OID, NUMERIC_OID, build_row_converter, format_interval
+except ImportError as e:
+    print(f"Error importing: {e}")
+    sys.exit(1)
+
+TEXT_OID = 25
+INT4_OID = 23
+
+
+class FakeColumn:
+    """Stand-in for a psycopg2 cursor.description entry."""
+    def __init__(self, name: str, type_code: int):
+        self.name = name
+        self.type_code = type_code
+
+
+def legacy_convert_value(value: Any) -> Any:
+    """The previous per-cell conversion: isinstance chain on every value."""
+    if value is None:
+        return None
+    if isinstance(value, timedelta):
+        return format_interval(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def legacy_rows_to_dicts(columns: List[str], rows: List[tuple]) -> List[Dict[str, Any]]:
+    data = []
+    for row in rows:
+        row_dict = {}
+        for i, column in enumerate(columns):
+            row_dict[column] = legacy_convert_value(row[i])
+        data.append(row_dict)
+    return data
+
+
+def make_rows(n_rows: int, n_cols: int, converted_every: int):
+    """Build synthetic rows; every `converted_every`-th column is numeric or interval."""
+    random.seed(42)
+    columns, description = [], []
+    for c in range(n_cols):
+        if converted_every and c % converted_every == 0:
+            type_code = NUMERIC_OID if (c // converted_every) % 2 == 0 else INTERVAL_OID
+        else:
+            type_code = INT4_OID if c % 2 else TEXT_OID
+        columns.append(f"col_{c}")
+        description.append(FakeColumn(f"col_{c}", type_code))
+
+    def cell(type_code: int):
+        if type_code == NUMERIC_OID:
+            return Decimal(f"{random.random() * 100:.3f}")
+        if type_code == INTERVAL_OID:
+            return timedelta(seconds=random.randint(0, 10000))
+        if type_code == INT4_OID:
+            return random.randint(0, 10**6)
+        return f"value-{random.randint(0, 999)}"
+
+    rows = [tuple(cell(d.type_code) for d in description) for _ in range(n_rows)]
+    return columns, description, rows
+
+
+def bench(label: str, fn, n_rows: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    rate = n_rows / best
+    print(f"  {label:<28} {best * 1000:8.1f} ms  {rate:12,.0f} rows/sec")
+    return rate
+
+
+def convert_all(columns, description, rows) -> List[Dict[str, Any]]:
+    row_to_dict = build_row_converter(columns, description, rows)
+    return [row_to_dict(row) for row in rows]
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--cols", type=int, default=30)
+    parser.add_argument("--converted-every", type=int, default=5,
+                        help="Every Nth column is numeric/interval (0 = none)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    columns, description, rows = make_rows(args.rows, args.cols, args.converted_every)
+    print(f"Rows: {args.rows}  Columns: {args.cols}  Converted every: {args.converted_every}")
+
+    legacy = legacy_rows_to_dicts(columns, rows)
+    if legacy != convert_all(columns, description, rows):
+        print("❌ Output mismatch between legacy and per-column conversion")
+        sys.exit(1)
+
+    before = bench("before (per-cell isinstance)", lambda: legacy_rows_to_dicts(columns, rows), args.rows, args.repeat)
+    after = bench("after (per-column)", lambda: convert_all(columns, description, rows), args.rows, args.repeat)
+    print(f"  speed-up: {after / before:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
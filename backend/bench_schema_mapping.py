@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Schema Mapping Benchmark - per-mapping regex passes vs the single-pass rewriter"""
+
+import os
+import sys
+import time
+import random
+import re
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+try:
+    from schema_mapping import (
+        COLUMN_MAPPINGS,
+        MLBFINAL_TABLES,
+        SEASON_SPECIFIC_MAPPINGS,
+        TABLE_MAPPINGS,
+        reference_transform_query_auto,
+        transform_query_auto,
+        validate_transformed_query,
+    )
+    from check_schema_mapping import iter_corpus
+except ImportError as e:
+    print(f"Error importing: {e}")
+    sys.exit(1)
+
+
+def legacy_validate_transformed_query(sql: str, mlbfinal_tables: set) -> List[str]:
+    errors = []
+    table_pattern = re.compile(r'\b(?:FROM|JOIN)\s+(\w+)', re.IGNORECASE)
+    for table in table_pattern.findall(sql):
+        if table.lower() not in {t.lower() for t in mlbfinal_tables}:
+            errors.append(f"Unknown table: {table}")
+    return errors
+
+
+def load_corpus(path: str) -> List[str]:
+    """Query strings from any export check_schema_mapping.py reads (.json, .ndjson/.jsonl, .gz, .zst)."""
+    return [doc["Query"] for doc in iter_corpus(path) if isinstance(doc.get("Query"), str) and doc["Query"]]
+
+
+def make_queries(n: int) -> List[str]:
+    """Synthetic mlb-schema queries mixing mapped and unmapped names."""
+    random.seed(42)
+    tables = list(TABLE_MAPPINGS) + ["games", "schedules", "umpires"]
+    columns = list(COLUMN_MAPPINGS) + ["player_id", "team_id", "hits", "at_bats", "opponent_team_id"]
+    queries = []
+    for _ in range(n):
+        table = random.choice(tables)
+        selected = ", ".join(random.sample(columns, 6))
+        where = random.choice([
+            f"{random.choice(columns)} = {random.randint(1, 3000)}",
+            f"season = {random.randint(2000, 2024)} AND team_abbreviation = 'NYY'",
+            f"name ILIKE '%{random.choice(['Judge', 'Ohtani', 'Betts'])}%'",
+        ])
+        join = ""
+        if random.random() < 0.5:
+            join = f" JOIN {random.choice(tables)} t2 ON t2.player_id = t1.player_id"
+        queries.append(
+            f"SELECT {selected} FROM {table} t1{join} WHERE {where} "
+            f"ORDER BY {random.choice(columns)} DESC LIMIT {random.randint(1, 50)}"
+        )
+    return queries
+
+
+def bench(label: str, fn, queries: List[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for sql in queries:
+            fn(sql)
+        best = min(best, time.perf_counter() - start)
+    rate = len(queries) / best
+    print(f"  {label:<36} {best * 1000:8.1f} ms  {rate:12,.0f} queries/sec")
+    return rate
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", default=None, help="Exported queries (.json, .ndjson/.jsonl, optionally .gz/.zst); synthetic if omitted")
+    parser.add_argument("--queries", type=int, default=5000, help="Synthetic query count")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    queries = load_corpus(args.corpus) if args.corpus else make_queries(args.queries)
+    print(f"Queries: {len(queries)}  Source: {args.corpus or 'synthetic'}")
+
+    # Outputs must match except where a mapped name sits inside a string literal,
+    # which the single-pass rewriter deliberately leaves alone
+    differing = [sql for sql in queries if reference_transform_query_auto(sql) != transform_query_auto(sql)]
+    unexplained = [sql for sql in differing if "'" not in sql]
+    print(f"  {len(differing)} queries differ (mapped names inside string literals)")
+    if unexplained:
+        print(f"❌ Output mismatch without string literals, e.g.: {unexplained[0]}")
+        sys.exit(1)
+
+    def legacy_pipeline(sql: str):
+        transformed, _ = reference_transform_query_auto(sql)
+        legacy_validate_transformed_query(transformed, MLBFINAL_TABLES)
+
+    def pipeline(sql: str):
+        transformed, _ = transform_query_auto(sql)
+        validate_transformed_query(transformed, MLBFINAL_TABLES)
+
+    before = bench("before (regex per mapping)", legacy_pipeline, queries, args.repeat)
+    after = bench("after (single pass)", pipeline, queries, args.repeat)
+    print(f"  speed-up: {after / before:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""Schema Mapping Check - transform and validate an exported query corpus in parallel"""
+
+import io
+import os
+import sys
+import gzip
+import json
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+try:
+    from schema_mapping import MLBFINAL_TABLES, transform_query_auto, validate_transformed_query
+except ImportError as e:
+    print(f"Error importing: {e}")
+    sys.exit(1)
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+READ_CHUNK_SIZE = 1 << 20
+MAX_EXAMPLES = 50
+
+
+def _open_text(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise SystemExit("Reading .zst corpora requires the zstandard package (pip install zstandard)")
+        # Streaming exports are written as one zstd frame per page
+        reader = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), read_across_frames=True)
+        return io.TextIOWrapper(reader, encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+class _JsonReader:
+    """Walks a JSON text stream token by token, decoding one value at a time."""
+
+    def __init__(self, f):
+        self.f = f
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _read_more(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.f.read(READ_CHUNK_SIZE)
+        self.eof = not chunk
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return bool(chunk)
+
+    def peek(self) -> str:
+        """The next non-whitespace character ("" at the end of the input), not consumed."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._read_more():
+                return ""
+
+    def expect(self, allowed: str) -> str:
+        char = self.peek()
+        if not char or char not in allowed:
+            raise ValueError(f"Malformed corpus: expected one of {allowed!r}, found {char or 'end of input'!r}")
+        self.pos += 1
+        return char
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except ValueError:
+                # The value continues past the buffer (or is invalid): read more
+                if not self._read_more():
+                    raise ValueError("Malformed or truncated JSON in corpus")
+                continue
+            # A number ending exactly at the buffer's end may continue in the next chunk
+            if end == len(self.buffer) and self._read_more():
+                continue
+            self.pos = end
+            return value
+
+
+def _iter_json_array(f, key: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the elements of the `key` array of a top-level JSON object, decoding one
+    element at a time. Other top-level values are decoded and skipped; a `key` nested
+    inside them is never mistaken for the array.
+    """
+    reader = _JsonReader(f)
+    reader.expect("{")
+    if reader.peek() == "}":
+        raise ValueError(f"Corpus has no top-level '{key}' array")
+    while True:
+        name = reader.value()
+        reader.expect(":")
+        if name == key:
+            break
+        reader.value()
+        if reader.expect(",}") == "}":
+            raise ValueError(f"Corpus has no top-level '{key}' array")
+
+    reader.expect("[")
+    if reader.peek() == "]":
+        return
+    while True:
+        yield reader.value()
+        if reader.expect(",]") == "]":
+            return
+
+
+def iter_corpus(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Stream documents from an export without loading it whole.
+
+    *.json is the object older extract_mlb_queries.py versions wrote (documents in its
+    "documents" array); *.ndjson / *.jsonl hold one document per line, as the streaming
+    export writes them. Either may be compressed (.gz, or .zst with the zstandard package).
+    """
+    name = path.rsplit(".", 1)[0] if path.endswith((".gz", ".zst")) else path
+    with _open_text(path) as f:
+        if name.endswith((".ndjson", ".jsonl")):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from _iter_json_array(f, "documents")
+
+
+def check_batch(batch: List[Tuple[str, str]]) -> Dict[str, Any]:
+    """Transform and validate (id, query) pairs; runs in a worker process."""
+    result = {
+        "queries": 0,
+        "changed": 0,
+        "with_warnings": 0,
+        "with_validation_errors": 0,
+        "warnings": Counter(),
+        "unknown_tables": Counter(),
+        "examples": [],
+        "crashed": [],
+    }
+    for doc_id, sql in batch:
+        result["queries"] += 1
+        try:
+            transformed, warnings = transform_query_auto(sql)
+            errors = validate_transformed_query(transformed, MLBFINAL_TABLES)
+        except Exception as e:
+            result["crashed"].append({"id": doc_id, "error": f"{type(e).__name__}: {e}"})
+            continue
+        if transformed != sql:
+            result["changed"] += 1
+        if warnings:
+            result["with_warnings"] += 1
+            result["warnings"].update(warnings)
+        if errors:
+            result["with_validation_errors"] += 1
+            result["unknown_tables"].update(error.split(": ", 1)[-1].lower() for error in errors)
+            if len(result["examples"]) < MAX_EXAMPLES:
+                result["examples"].append({"id": doc_id, "query": transformed, "errors": errors})
+    return result
+
+
+def merge(total: Dict[str, Any], part: Dict[str, Any]) -> None:
+    for key in ("queries", "changed", "with_warnings", "with_validation_errors"):
+        total[key] += part[key]
+    total["warnings"].update(part["warnings"])
+    total["unknown_tables"].update(part["unknown_tables"])
+    total["examples"].extend(part["examples"][: MAX_EXAMPLES - len(total["examples"])])
+    total["crashed"].extend(part["crashed"])
+
+
+def run(path: str, workers: int, batch_size: int) -> Dict[str, Any]:
+    total = check_batch([])
+    total["documents"] = 0
+    started = time.perf_counter()
+
+    def batches() -> Iterator[List[Tuple[str, str]]]:
+        batch = []
+        for doc in iter_corpus(path):
+            total["documents"] += 1
+            query = doc.get("Query")
+            if isinstance(query, str) and query:
+                batch.append((str(doc.get("id")), query))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Keep a couple of batches per worker in flight so the corpus is never fully in memory
+        in_flight = set()
+        for batch in batches():
+            if len(in_flight) >= workers * 2:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    merge(total, future.result())
+            in_flight.add(pool.submit(check_batch, batch))
+        for future in in_flight:
+            merge(total, future.result())
+
+    elapsed = time.perf_counter() - started
+    return {
+        "corpus": path,
+        "documents": total["documents"],
+        "queries": total["queries"],
+        "changed": total["changed"],
+        "with_warnings": total["with_warnings"],
+        "with_validation_errors": total["with_validation_errors"],
+        "crashed": total["crashed"],
+        "warnings": dict(total["warnings"].most_common()),
+        "unknown_tables": dict(total["unknown_tables"].most_common()),
+        "examples": total["examples"],
+        "workers": workers,
+        "seconds": round(elapsed, 2),
+        "queries_per_second": round(total["queries"] / elapsed) if elapsed else None,
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]) -> bool:
+    """Print changes against a previous report; False if validation got worse."""
+    print("\nAgainst baseline:")
+    for key in ("queries", "changed", "with_warnings", "with_validation_errors"):
+        delta = report[key] - baseline.get(key, 0)
+        if delta:
+            print(f"  {key}: {baseline.get(key, 0)} -> {report[key]} ({delta:+d})")
+    for section in ("warnings", "unknown_tables"):
+        old, new = baseline.get(section, {}), report[section]
+        for name in sorted(set(old) | set(new)):
+            if old.get(name, 0) != new.get(name, 0):
+                print(f"  {section}[{name}]: {old.get(name, 0)} -> {new.get(name, 0)}")
+    return report["with_validation_errors"] <= baseline.get("with_validation_errors", 0) and not report["crashed"]
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument("corpus", help="Export from extract_mlb_queries.py (.json, .ndjson/.jsonl, optionally .gz/.zst)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch-size", type=int, default=500, help="Queries per worker task")
+    parser.add_argument("--report", default=None, help="Write the JSON report here")
+    parser.add_argument("--baseline", default=None, help="Previous report to compare against")
+    args = parser.parse_args()
+
+    report = run(args.corpus, args.workers, args.batch_size)
+
+    print(f"Queries: {report['queries']} of {report['documents']} documents in {report['seconds']}s "
+          f"({report['queries_per_second']} queries/sec, {report['workers']} workers)")
+    print(f"  changed by mapping:     {report['changed']}")
+    print(f"  with warnings:          {report['with_warnings']}")
+    print(f"  with validation errors: {report['with_validation_errors']}")
+    if report["crashed"]:
+        print(f"  crashed:                {len(report['crashed'])}")
+    if report["unknown_tables"]:
+        print("\nUnknown tables:")
+        for table, count in list(report["unknown_tables"].items())[:20]:
+            print(f"  {count:8d}  {table}")
+    if report["warnings"]:
+        print("\nWarnings:")
+        for warning, count in report["warnings"].items():
+            print(f"  {count:8d}  {warning}")
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved report to {args.report}")
+
+    ok = not report["crashed"]
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            ok = compare(report, json.load(f))
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""Migrated Query Comparison - run original (mlb) and migrated (mlbfinal) SQL side by side and compare results"""
+
+import os
+import sys
+import json
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterator, Set, Tuple
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+load_dotenv()
+
+try:
+    from app.cosmos_service import get_container_client, resolve_cosmos_container_id
+    from app.postgres_service import postgres_service
+    from app.config import AVAILABLE_DATABASES
+except ImportError as e:
+    print(f"Error importing: {e}")
+    sys.exit(1)
+
+SOURCE_DATABASE = "mlb"
+TARGET_DATABASE = "mlbfinal"
+PAGE_SIZE = 500
+# Ids per ARRAY_CONTAINS lookup of original documents
+LOOKUP_CHUNK_SIZE = 100
+
+
+def iter_document_pairs(source_container, target_container) -> Iterator[Dict[str, Any]]:
+    """Yield migrated documents (target) with their original's Query attached, a page at a time."""
+    pages = target_container.query_items(
+        query="SELECT c.id, c.original_id, c.Query FROM c WHERE IS_DEFINED(c.original_id)",
+        enable_cross_partition_query=True,
+        max_item_count=PAGE_SIZE,
+    ).by_page()
+    for page in pages:
+        migrated = list(page)
+        original_ids = [doc["original_id"] for doc in migrated if doc.get("original_id")]
+        originals: Dict[str, str] = {}
+        for start in range(0, len(original_ids), LOOKUP_CHUNK_SIZE):
+            for doc in source_container.query_items(
+                query="SELECT c.id, c.Query FROM c WHERE ARRAY_CONTAINS(@ids, c.id)",
+                parameters=[{"name": "@ids", "value": original_ids[start:start + LOOKUP_CHUNK_SIZE]}],
+                enable_cross_partition_query=True,
+            ):
+                originals[doc["id"]] = doc.get("Query")
+        for doc in migrated:
+            yield {
+                "id": doc["id"],
+                "original_id": doc.get("original_id"),
+                "original_query": originals.get(doc.get("original_id")),
+                "query": doc.get("Query"),
+            }
+
+
+def compare_results(source: Dict[str, Any], target: Dict[str, Any]) -> Tuple[str, str]:
+    """(status, reason) for a pair of fingerprint_query results."""
+    if not source["success"] or not target["success"]:
+        failed = [name for name, result in ((SOURCE_DATABASE, source), (TARGET_DATABASE, target)) if not result["success"]]
+        return "error", f"query failed on {' and '.join(failed)}"
+    if len(source["columns"]) != len(target["columns"]):
+        return "mismatch", "column count"
+    if source["row_count"] != target["row_count"]:
+        return "mismatch", "row count"
+    if source["digest"] != target["digest"]:
+        return "mismatch", "values"
+    return "match", ""
+
+
+def load_done_ids(path: str) -> Set[str]:
+    done = set()
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    done.add(json.loads(line)["id"])
+                except (json.JSONDecodeError, KeyError):
+                    continue
+    return done
+
+
+def run(args) -> Dict[str, Any]:
+    source_id = resolve_cosmos_container_id(args.source_container)
+    target_id = resolve_cosmos_container_id(args.target_container)
+    if source_id == target_id:
+        # e.g. MLB_OFFICIAL_COSMOS_CONTAINER_ID pointing mlb-official at the original container
+        print(f"Error: --source-container {args.source_container} and --target-container {args.target_container} "
+              f"both resolve to Cosmos container '{source_id}'")
+        sys.exit(1)
+    source_container = get_container_client(source_id)
+    target_container = get_container_client(target_id)
+    done = load_done_ids(args.output) if args.resume else set()
+    if done:
+        print(f"Resuming: {len(done)} documents already compared")
+
+    statuses = Counter()
+    reasons = Counter()
+    started = time.perf_counter()
+    # Two queries per document, so the pool runs `concurrency` documents at once
+    pool = ThreadPoolExecutor(max_workers=args.concurrency * 2)
+    pending: Dict[str, Dict[str, Any]] = {}
+    futures: Dict[Any, Tuple[str, str]] = {}
+
+    with open(args.output, "a" if args.resume else "w", encoding="utf-8") as out:
+
+        def write(entry: Dict[str, Any]) -> None:
+            statuses[entry["status"]] += 1
+            if entry.get("reason"):
+                reasons[entry["reason"]] += 1
+            out.write(json.dumps(entry) + "\n")
+            total = sum(statuses.values())
+            if total % 100 == 0:
+                elapsed = time.perf_counter() - started
+                print(f"  compared={total} {dict(statuses)} ({total / elapsed:.1f} docs/s)")
+
+        def collect(done_futures) -> None:
+            for future in done_futures:
+                doc_id, side = futures.pop(future)
+                entry = pending[doc_id]
+                entry[side] = future.result()
+                if SOURCE_DATABASE in entry and TARGET_DATABASE in entry:
+                    del pending[doc_id]
+                    entry["status"], entry["reason"] = compare_results(entry[SOURCE_DATABASE], entry[TARGET_DATABASE])
+                    write(entry)
+
+        try:
+            for doc in iter_document_pairs(source_container, target_container):
+                if doc["id"] in done:
+                    continue
+                if args.limit and sum(statuses.values()) + len(pending) >= args.limit:
+                    break
+                entry = {"id": doc["id"], "original_id": doc["original_id"]}
+                if not doc["original_query"] or not doc["query"]:
+                    write({**entry, "status": "skipped", "reason": "original or migrated query missing"})
+                    continue
+                while len(pending) >= args.concurrency:
+                    finished, _ = wait(list(futures), return_when=FIRST_COMPLETED)
+                    collect(finished)
+                pending[doc["id"]] = entry
+                for side, database, query in (
+                    (SOURCE_DATABASE, SOURCE_DATABASE, doc["original_query"]),
+                    (TARGET_DATABASE, TARGET_DATABASE, doc["query"]),
+                ):
+                    future = pool.submit(postgres_service.fingerprint_query, database, query, args.timeout_ms)
+                    futures[future] = (doc["id"], side)
+            while futures:
+                finished, _ = wait(list(futures), return_when=FIRST_COMPLETED)
+                collect(finished)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "source": f"{args.source_container} ({SOURCE_DATABASE})",
+        "target": f"{args.target_container} ({TARGET_DATABASE})",
+        "compared": sum(statuses.values()),
+        "statuses": dict(statuses),
+        "reasons": dict(reasons.most_common()),
+        "results": args.output,
+        "seconds": round(elapsed, 1),
+    }
+
+
+def main():
+    import argparse
+    source_pool = AVAILABLE_DATABASES[SOURCE_DATABASE]["pool"]
+    target_pool = AVAILABLE_DATABASES[TARGET_DATABASE]["pool"]
+    default_concurrency = min(
+        source_pool["pool_size"] + source_pool["max_overflow"],
+        target_pool["pool_size"] + target_pool["max_overflow"],
+    )
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--source-container", default="mlb", help="Container holding the original documents")
+    parser.add_argument("--target-container", default="mlb-official", help="Container holding migrated documents")
+    parser.add_argument("--concurrency", type=int, default=default_concurrency,
+                        help="Documents compared at once (default: the smaller pool's size + overflow)")
+    parser.add_argument("--timeout-ms", type=int, default=60000, help="Per-statement timeout")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--output", default="migration_comparison.ndjson", help="Per-document results (NDJSON)")
+    parser.add_argument("--resume", action="store_true", help="Append to --output, skipping documents already in it")
+    parser.add_argument("--report", default="migration_comparison_summary.json", help="JSON summary path")
+    args = parser.parse_args()
+
+    summary = run(args)
+    with open(args.report, "w") as f:
+        json.dump(summary, f, indent=2)
+    print(f"\nCompared {summary['compared']} documents in {summary['seconds']}s: {summary['statuses']}")
+    for reason, count in summary["reasons"].items():
+        print(f"  {count:6d}  {reason}")
+    print(f"Per-document results in {args.output}, summary in {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -27,23 +27,20 @@ except ImportError:
 
 async def verify_documents_exist(doc_ids: List[str]) -> dict:
     """
-    Verify which documents exist in the index.
+    Verify which documents exist in the index (batched lookups, run concurrently).
     
     Returns:
         dict: {'existing': [...], 'not_found': [...]}
     """
-    existing = []
-    not_found = []
-    
     print(f"Verifying {len(doc_ids)} document(s)...")
     
+    found = await azure_search_service.get_existing_ids(doc_ids)
+    existing = [doc_id for doc_id in doc_ids if doc_id in found]
+    not_found = [doc_id for doc_id in doc_ids if doc_id not in found]
     for doc_id in doc_ids:
-        exists = await azure_search_service.verify_document_exists(doc_id)
-        if exists:
-            existing.append(doc_id)
+        if doc_id in found:
             print(f"  ✓ Found: {doc_id}")
         else:
-            not_found.append(doc_id)
             print(f"  ✗ Not found: {doc_id}")
     
     return {'existing': existing, 'not_found': not_found}
@@ -159,9 +156,16 @@ async def main():
     print("=" * 60)
 
 
+async def run():
+    try:
+        await main()
+    finally:
+        await azure_search_service.close()
+
+
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        asyncio.run(run())
     except KeyboardInterrupt:
         print("\n\nCancelled by user.")
         sys.exit(0)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Container Snapshot Export - write local, memory-mappable snapshots of Cosmos containers"""
+
+import os
+import sys
+import time
+from typing import Any, Dict, Iterator
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+load_dotenv()
+
+try:
+    from app.cosmos_service import get_container_client, resolve_cosmos_container_id
+    from app.config import SNAPSHOT_DIR
+    from app.snapshot_store import ContainerSnapshot, write_snapshot
+except ImportError as e:
+    print(f"Error importing: {e}")
+    sys.exit(1)
+
+PAGE_SIZE = 1000
+DEFAULT_CONTAINERS = ["mlb-official", "nba-official", "mlb-unofficial", "nba-unofficial"]
+
+
+def iter_container(container_name: str) -> Iterator[Dict[str, Any]]:
+    container = get_container_client(resolve_cosmos_container_id(container_name))
+    pages = container.query_items(
+        query="SELECT * FROM c",
+        enable_cross_partition_query=True,
+        max_item_count=PAGE_SIZE,
+    ).by_page()
+    for page in pages:
+        yield from page
+
+
+def export_container(container_name: str, output_dir: str, source=None) -> None:
+    started = time.perf_counter()
+    seen = [0]
+
+    def counted(documents: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        for doc in documents:
+            seen[0] += 1
+            if seen[0] % 10000 == 0:
+                print(f"  {container_name}: {seen[0]} documents")
+            yield doc
+
+    documents = source if source is not None else iter_container(container_name)
+    manifest = write_snapshot(output_dir, container_name, counted(documents))
+    elapsed = time.perf_counter() - started
+
+    path = os.path.join(output_dir, container_name)
+    total_bytes = sum(entry.stat().st_size for entry in os.scandir(path))
+    opened = time.perf_counter()
+    snapshot = ContainerSnapshot(path)
+    open_ms = (time.perf_counter() - opened) * 1000
+    snapshot.close()
+    vectors = ", ".join(f"{field}={dims}d" for field, dims in manifest["vector_fields"].items() if dims) or "none"
+    print(f"{container_name}: {manifest['count']} documents, vectors {vectors}, "
+          f"{total_bytes / 1e6:.1f} MB in {elapsed:.1f}s (opens in {open_ms:.1f}ms) -> {path}")
+    for field, dropped in manifest["dropped_vectors"].items():
+        if dropped:
+            print(f"  ⚠️  {dropped} {field} value(s) dropped: not {manifest['vector_fields'][field]}-dimensional")
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Write local container snapshots (see app/snapshot_store.py)")
+    parser.add_argument("--container", action="append",
+                        help=f"Container to snapshot (repeatable; default: {', '.join(DEFAULT_CONTAINERS)})")
+    parser.add_argument("--output-dir", default=SNAPSHOT_DIR, help="Snapshot directory (default: SNAPSHOT_DIR)")
+    parser.add_argument("--from-export", default=None,
+                        help="Build from an extract_mlb_queries.py export instead of Cosmos (needs one --container)")
+    args = parser.parse_args()
+
+    containers = args.container or DEFAULT_CONTAINERS
+    os.makedirs(args.output_dir, exist_ok=True)
+    if args.from_export:
+        if len(containers) != 1 or not args.container:
+            parser.error("--from-export needs exactly one --container to name the snapshot")
+        from check_schema_mapping import iter_corpus
+        export_container(containers[0], args.output_dir, source=iter_corpus(args.from_export))
+        return
+    for container_name in containers:
+        export_container(container_name, args.output_dir)
+
+
+if __name__ == "__main__":
+    main()
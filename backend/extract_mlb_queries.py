@@ -1,10 +1,16 @@
 #!/usr/bin/env python3
 """Extract MLB Queries from Cosmos DB"""
 
+import io
 import os
 import sys
+import gzip
 import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from typing import Any, Dict, List, Optional
 from dotenv import load_dotenv
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -18,11 +24,20 @@ except ImportError as e:
     print(f"Error importing: {e}")
     sys.exit(1)
 
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+PAGE_SIZE = 1000
+SAMPLE_FIELDS = ["id", "UserPrompt", "Query"]
+
+
 def get_cosmos_client():
     cosmos_connection_string = os.getenv("COSMOS_CONNECTION_STRING")
     cosmos_key = os.getenv("COSMOS_DB_KEY") or os.getenv("COSMOS_KEY") or os.getenv("AZURE_COSMOS_KEY")
     cosmos_endpoint = os.getenv("COSMOS_DB_ENDPOINT") or COSMOSDB_ENDPOINT
-    
+
     if cosmos_connection_string:
         return CosmosClient.from_connection_string(cosmos_connection_string)
     elif cosmos_key:
@@ -30,45 +45,311 @@ def get_cosmos_client():
     else:
         return CosmosClient(cosmos_endpoint, credential=DefaultAzureCredential())
 
-def extract_queries(container_name="mlb", output_file=None):
+
+def parse_timestamp(value: Optional[str]) -> Optional[int]:
+    """Epoch seconds from an integer or an ISO date/datetime string."""
+    if value is None:
+        return None
+    if value.lstrip("-").isdigit():
+        return int(value)
+    return int(datetime.fromisoformat(value).timestamp())
+
+
+def build_query(fields: Optional[List[str]], since: Optional[int], until: Optional[int]):
+    projection = ", ".join(f'c["{field}"]' for field in fields) if fields else "*"
+    conditions, parameters = [], []
+    if since is not None:
+        conditions.append("c._ts >= @since")
+        parameters.append({"name": "@since", "value": since})
+    if until is not None:
+        conditions.append("c._ts < @until")
+        parameters.append({"name": "@until", "value": until})
+    query = f"SELECT {projection} FROM c"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    return query, parameters
+
+
+def compress_page(data: bytes, path: str) -> bytes:
+    """
+    Encode one page for the output file.
+
+    Every page is a complete gzip member / zstd frame, so a file truncated back to a
+    page boundary is still valid and a resumed export simply appends more members.
+    """
+    if path.endswith(".gz"):
+        return gzip.compress(data, compresslevel=6)
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError("Writing .zst exports requires the zstandard package (pip install zstandard)")
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    return data
+
+
+class ExportWriter:
+    """
+    Appends encoded pages to the output and checkpoints after each one.
+
+    The checkpoint (<output>.checkpoint.json) holds the output size and the Cosmos
+    continuation(s) that produced it; on resume the output is truncated back to that
+    size, so a page written but not checkpointed before a crash is written again
+    rather than duplicated. Safe to share between threads.
+    """
+
+    def __init__(self, output_file: str, settings: Dict[str, Any], restart: bool = False):
+        self.output_file = output_file
+        self.checkpoint_file = f"{output_file}.checkpoint.json"
+        self.settings = settings
+        self.lock = threading.Lock()
+        self.state: Dict[str, Any] = {
+            "settings": settings,
+            "offset": 0,
+            "documents": 0,
+            "continuations": {},
+            "finished": [],
+            "completed": False,
+        }
+        if not restart and os.path.exists(self.checkpoint_file):
+            with open(self.checkpoint_file, "r") as f:
+                saved = json.load(f)
+            if saved.get("settings") != settings:
+                raise SystemExit(
+                    f"{self.checkpoint_file} was written with different settings; use --restart to start over"
+                )
+            self.state = saved
+        elif os.path.exists(self.output_file) and not restart:
+            raise SystemExit(f"{self.output_file} exists without a checkpoint; use --restart to overwrite it")
+
+        mode = "r+b" if os.path.exists(self.output_file) and self.state["offset"] else "wb"
+        self.file = open(self.output_file, mode)
+        self.file.truncate(self.state["offset"])
+        self.file.seek(self.state["offset"])
+
+    @property
+    def resumed(self) -> bool:
+        return self.state["documents"] > 0 or bool(self.state["continuations"])
+
+    def continuation(self, key: str) -> Optional[str]:
+        return self.state["continuations"].get(key)
+
+    def is_finished(self, key: str) -> bool:
+        return key in self.state["finished"]
+
+    def write_page(self, key: str, documents: List[Dict[str, Any]], continuation: Optional[str]) -> None:
+        payload = b""
+        if documents:
+            data = "".join(json.dumps(doc, default=str) + "\n" for doc in documents).encode("utf-8")
+            payload = compress_page(data, self.output_file)
+        with self.lock:
+            if payload:
+                self.file.write(payload)
+                self.file.flush()
+                os.fsync(self.file.fileno())
+            self.state["offset"] = self.file.tell()
+            self.state["documents"] += len(documents)
+            if continuation is None:
+                self.state["continuations"].pop(key, None)
+                self.state["finished"].append(key)
+            else:
+                self.state["continuations"][key] = continuation
+            self._save_checkpoint()
+
+    def _save_checkpoint(self) -> None:
+        # Write-then-rename so an interruption never leaves a truncated checkpoint
+        self.state["updated_at"] = time.time()
+        tmp_path = f"{self.checkpoint_file}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.checkpoint_file)
+
+    def close(self, completed: bool) -> None:
+        with self.lock:
+            self.file.close()
+            self.state["completed"] = completed
+            self._save_checkpoint()
+
+
+def export_sequential(container, writer: ExportWriter, query: str, parameters: List[Dict[str, Any]],
+                      page_size: int, report) -> None:
+    """One cross-partition query; the gateway's continuation token resumes it."""
+    if writer.is_finished("query"):
+        return
+    pager = container.query_items(
+        query=query,
+        parameters=parameters or None,
+        enable_cross_partition_query=True,
+        max_item_count=page_size,
+    ).by_page(writer.continuation("query"))
+    for page in pager:
+        documents = list(page)
+        writer.write_page("query", documents, pager.continuation_token)
+        report()
+    if not writer.is_finished("query"):
+        writer.write_page("query", [], None)
+
+
+def read_partition_key_ranges(container) -> List[str]:
+    # azure-cosmos 4.5 has no public feed-range API; the connection's range listing is the same call it uses
+    ranges = container.client_connection._ReadPartitionKeyRanges(container.container_link)
+    return sorted((r["id"] for r in ranges), key=int)
+
+
+def export_range(container_for_thread, writer: ExportWriter, range_id: str, fields: Optional[List[str]],
+                 since: Optional[int], until: Optional[int], page_size: int, report) -> None:
+    """
+    Read one partition key range through the change feed (latest version of every document).
+
+    The change feed takes neither a projection nor a filter, so both are applied here; each
+    page's ETag is the continuation for the range.
+    """
+    if writer.is_finished(range_id):
+        return
+    etag: Dict[str, Optional[str]] = {}
+    continuation = writer.continuation(range_id)
+    pager = container_for_thread().query_items_change_feed(
+        partition_key_range_id=range_id,
+        is_start_from_beginning=continuation is None,
+        continuation=continuation,
+        max_item_count=page_size,
+        response_hook=lambda response_headers, _: etag.update(value=response_headers.get("etag")),
+    ).by_page()
+    for page in pager:
+        documents = []
+        for doc in page:
+            ts = doc.get("_ts", 0)
+            if (since is not None and ts < since) or (until is not None and ts >= until):
+                continue
+            documents.append({field: doc[field] for field in fields if field in doc} if fields else doc)
+        writer.write_page(range_id, documents, etag.get("value"))
+        report()
+    writer.write_page(range_id, [], None)
+
+
+def extract_queries(container_name="mlb", output_file=None, fields=None, since=None, until=None,
+                    parallel=1, page_size=PAGE_SIZE, restart=False):
     if output_file is None:
-        output_file = f"mlb_queries_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-    
+        output_file = f"mlb_queries_{datetime.now().strftime('%Y%m%d_%H%M%S')}.ndjson"
+
     print(f"Extracting from container: {container_name}")
-    
+
     cosmos_client = get_cosmos_client()
     database = cosmos_client.get_database_client(DATABASE_NAME)
     container = database.get_container_client(container_name)
-    
-    items = list(container.query_items("SELECT * FROM c", enable_cross_partition_query=True))
-    print(f"Found {len(items)} documents")
-    
-    output_data = {
-        "extracted_at": datetime.now().isoformat(),
+
+    query, parameters = build_query(fields, since, until)
+    settings = {
         "container": container_name,
-        "total_documents": len(items),
-        "documents": items
+        "query": query,
+        "parameters": parameters,
+        "mode": "feed_ranges" if parallel > 1 else "query",
     }
-    
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(output_data, f, indent=2, default=str)
-    
-    print(f"Saved to {output_file}")
-    
-    if items:
-        print("\nSample document:")
-        sample = items[0]
-        for key in ["id", "UserPrompt", "Query"]:
-            if key in sample:
-                value = str(sample[key])[:200]
-                print(f"  {key}: {value}...")
-    
-    return items
+    writer = ExportWriter(output_file, settings, restart=restart)
+    if writer.state["completed"]:
+        print(f"{output_file} is already complete ({writer.state['documents']} documents); use --restart to export again")
+        writer.file.close()
+        return writer.state
+    if writer.resumed:
+        print(f"Resuming: {writer.state['documents']} documents already in {output_file}")
+
+    started = time.perf_counter()
+    last_report = [started]
+
+    def report() -> None:
+        now = time.perf_counter()
+        if now - last_report[0] >= 5:
+            last_report[0] = now
+            print(f"  {writer.state['documents']} documents, {writer.state['offset'] / 1e6:.1f} MB")
+
+    completed = False
+    try:
+        if parallel > 1:
+            range_ids = read_partition_key_ranges(container)
+            known = set(writer.state["continuations"]) | set(writer.state["finished"])
+            if known and not known <= set(range_ids):
+                # A range split since the checkpoint; its continuation no longer applies
+                raise SystemExit("Partition key ranges changed since the checkpoint; use --restart")
+            print(f"Reading {len(range_ids)} partition key ranges, {parallel} at a time")
+            # The sync client keeps change feed continuations in shared response headers, so each
+            # worker thread reads through its own client
+            local = threading.local()
+
+            def container_for_thread():
+                if not hasattr(local, "container"):
+                    local.container = (
+                        get_cosmos_client().get_database_client(DATABASE_NAME).get_container_client(container_name)
+                    )
+                return local.container
+
+            with ThreadPoolExecutor(max_workers=parallel) as pool:
+                futures = [
+                    pool.submit(export_range, container_for_thread, writer, range_id, fields, since, until,
+                                page_size, report)
+                    for range_id in range_ids
+                ]
+                for future in futures:
+                    future.result()
+        else:
+            export_sequential(container, writer, query, parameters, page_size, report)
+        completed = True
+    finally:
+        writer.close(completed)
+
+    elapsed = time.perf_counter() - started
+    print(f"Saved {writer.state['documents']} documents to {output_file} "
+          f"({writer.state['offset'] / 1e6:.1f} MB, {elapsed:.1f}s)")
+    if writer.state["documents"]:
+        print_sample(output_file)
+    return writer.state
+
+
+def print_sample(output_file):
+    if output_file.endswith(".gz"):
+        f = gzip.open(output_file, "rt", encoding="utf-8")
+    elif output_file.endswith(".zst"):
+        reader = zstandard.ZstdDecompressor().stream_reader(open(output_file, "rb"), read_across_frames=True)
+        f = io.TextIOWrapper(reader, encoding="utf-8")
+    else:
+        f = open(output_file, "r", encoding="utf-8")
+    with f:
+        line = f.readline()
+    if not line:
+        return
+    sample = json.loads(line)
+    print("\nSample document:")
+    for key in SAMPLE_FIELDS:
+        if key in sample:
+            value = str(sample[key])[:200]
+            print(f"  {key}: {value}...")
+
 
 if __name__ == "__main__":
     import argparse
-    parser = argparse.ArgumentParser()
+    parser = argparse.ArgumentParser(
+        description="Stream a container to NDJSON (.ndjson, .ndjson.gz or .ndjson.zst), resumable via a checkpoint"
+    )
     parser.add_argument("--container", default="mlb")
     parser.add_argument("--output", default=None)
+    parser.add_argument("--fields", default=None,
+                        help="Comma-separated top-level fields to export (default: whole documents)")
+    parser.add_argument("--since", default=None, help="Only documents with _ts >= this (epoch seconds or ISO date)")
+    parser.add_argument("--until", default=None, help="Only documents with _ts < this (epoch seconds or ISO date)")
+    parser.add_argument("--parallel", type=int, default=1,
+                        help="Read this many partition key ranges at once via the change feed")
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE)
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint and overwrite the output")
     args = parser.parse_args()
-    extract_queries(args.container, args.output)
+
+    if args.output and args.output.endswith(".zst") and zstandard is None:
+        print("Writing .zst exports requires the zstandard package (pip install zstandard)")
+        sys.exit(1)
+    fields = [field.strip() for field in args.fields.split(",") if field.strip()] if args.fields else None
+    extract_queries(
+        args.container,
+        args.output,
+        fields=fields,
+        since=parse_timestamp(args.since),
+        until=parse_timestamp(args.until),
+        parallel=args.parallel,
+        page_size=args.page_size,
+        restart=args.restart,
+    )
@@ -4,9 +4,10 @@
 import os
 import sys
 import json
+import time
 import asyncio
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 from uuid import uuid4
 from dotenv import load_dotenv
 
@@ -15,22 +16,140 @@ load_dotenv()
 
 try:
     from azure.cosmos import CosmosClient
+    from azure.cosmos import exceptions as cosmos_exceptions
     from azure.identity import DefaultAzureCredential
     from openai import AsyncAzureOpenAI
-    from app.config import COSMOSDB_ENDPOINT, DATABASE_NAME, OPENAI_ENDPOINT, OPENAI_API_VERSION
+    from app.config import COSMOSDB_ENDPOINT, DATABASE_NAME, OPENAI_ENDPOINT, OPENAI_API_VERSION, OPENAI_DEPLOYMENT
+    from app.bulk_operations import cosmos_call_with_retry
+    from app.embedding_cache import embedding_cache
+    from app.rate_limit import retry_after_seconds
     from schema_mapping import transform_query_auto, validate_transformed_query, MLBFINAL_TABLES
 except ImportError as e:
     print(f"Error importing: {e}")
     sys.exit(1)
 
+class MigrationJournal:
+    """
+    Append-only NDJSON log of each source document's latest migration outcome.
+
+    Lines are {"source_id", "target_id", "outcome": "migrated"|"failed", "error", "at"};
+    the last line for a source id wins. Appends are fsynced in batches, and the file is
+    rewritten with one line per document once superseded lines dominate it.
+    """
+
+    FSYNC_EVERY = 200
+    COMPACT_MIN_LINES = 1000
+    COMPACT_RATIO = 2
+
+    def __init__(self, path: str, legacy_progress_file: Optional[str] = None):
+        self.path = path
+        self.entries: Dict[str, Dict] = {}
+        self.completed: Set[str] = set()
+        self.lines = 0
+        self._unsynced = 0
+        self._file = None
+        needs_rewrite = self._load(legacy_progress_file)
+        if needs_rewrite or self._should_compact():
+            self.compact()
+        else:
+            self._file = open(self.path, "a", encoding="utf-8")
+
+    def _load(self, legacy_progress_file: Optional[str]) -> bool:
+        """Replay the journal; returns True if the file must be rewritten."""
+        if os.path.exists(self.path):
+            torn = False
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A crash mid-append leaves a partial last line
+                        torn = True
+                        continue
+                    self._apply(entry)
+                    self.lines += 1
+            return torn
+        if legacy_progress_file and os.path.exists(legacy_progress_file):
+            with open(legacy_progress_file, "r") as f:
+                for source_id in json.load(f).get("migrated_ids", []):
+                    self._apply({"source_id": source_id, "target_id": None, "outcome": "migrated", "at": None})
+            print(f"Imported {len(self.completed)} migrated ids from {legacy_progress_file}")
+            return True
+        return False
+
+    def _apply(self, entry: Dict) -> None:
+        source_id = entry["source_id"]
+        self.entries[source_id] = entry
+        if entry["outcome"] == "migrated":
+            self.completed.add(source_id)
+        else:
+            self.completed.discard(source_id)
+
+    def _should_compact(self) -> bool:
+        return self.lines > max(self.COMPACT_MIN_LINES, self.COMPACT_RATIO * len(self.entries))
+
+    def record(self, source_id: str, target_id: Optional[str], outcome: str, error: Optional[str] = None) -> None:
+        entry = {"source_id": source_id, "target_id": target_id, "outcome": outcome, "at": datetime.now().isoformat()}
+        if error:
+            entry["error"] = error
+        self._apply(entry)
+        self._file.write(json.dumps(entry) + "\n")
+        self.lines += 1
+        self._unsynced += 1
+        if self._unsynced >= self.FSYNC_EVERY:
+            self.sync()
+
+    def sync(self) -> None:
+        if self._unsynced:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+        if self._should_compact():
+            self.compact()
+
+    def compact(self) -> None:
+        # Write-then-rename so a crash leaves either the old or the new journal
+        if self._file is not None:
+            self._file.close()
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for entry in self.entries.values():
+                f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self.lines = len(self.entries)
+        self._unsynced = 0
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def close(self) -> None:
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def failed_ids(self) -> Set[str]:
+        return {source_id for source_id, entry in self.entries.items() if entry["outcome"] == "failed"}
+
+    def target_id(self, source_id: str) -> Optional[str]:
+        entry = self.entries.get(source_id)
+        return entry.get("target_id") if entry else None
+
+
 class QueryMigrator:
+    EMBED_MAX_ATTEMPTS = 6
+    # Seconds an embed worker waits for more documents before sending a partial batch
+    EMBED_BATCH_LINGER = 0.2
+    REPORT_INTERVAL = 5
+
     def __init__(self):
         self.cosmos_client = None
         self.source_container = None
         self.target_container = None
         self.openai_client = None
         self.progress_file = "migration_progress.json"
-        self.migrated_ids = set()
+        self.journal_file = "migration_journal.jsonl"
+        self.journal: Optional[MigrationJournal] = None
         
     def initialize(self):
         print("Initializing connections...")
@@ -65,29 +184,36 @@ class QueryMigrator:
         self._load_progress()
         
     def _load_progress(self):
-        if os.path.exists(self.progress_file):
-            with open(self.progress_file, 'r') as f:
-                self.migrated_ids = set(json.load(f).get("migrated_ids", []))
-            print(f"Loaded progress: {len(self.migrated_ids)} already migrated")
+        self.journal = MigrationJournal(self.journal_file, legacy_progress_file=self.progress_file)
+        print(f"Loaded progress: {len(self.journal.completed)} already migrated, {len(self.journal.failed_ids())} failed")
     
     def _save_progress(self):
-        with open(self.progress_file, 'w') as f:
-            json.dump({"migrated_ids": list(self.migrated_ids), "last_updated": datetime.now().isoformat()}, f)
+        self.journal.sync()
     
     async def get_embedding(self, text: str) -> Optional[List[float]]:
         if not self.openai_client:
             return None
+        cached = await asyncio.to_thread(embedding_cache.get, OPENAI_DEPLOYMENT, text)
+        if cached is not None:
+            embedding_cache.record_saved_call()
+            return cached
         try:
-            response = await self.openai_client.embeddings.create(model="text-embedding-ada-002", input=text)
-            return response.data[0].embedding
+            response = await self.openai_client.embeddings.create(model=OPENAI_DEPLOYMENT, input=text)
+            embedding = response.data[0].embedding
+            await asyncio.to_thread(embedding_cache.put, OPENAI_DEPLOYMENT, text, embedding)
+            return embedding
         except Exception as e:
             print(f"Embedding error: {e}")
             return None
     
-    def fetch_source_documents(self) -> List[Dict]:
+    def fetch_source_documents(self, only_failed: bool = False) -> List[Dict]:
         print("Fetching documents from 'mlb' container...")
         items = list(self.source_container.query_items("SELECT * FROM c", enable_cross_partition_query=True))
-        pending = [item for item in items if item.get("id") not in self.migrated_ids]
+        if only_failed:
+            failed = self.journal.failed_ids()
+            pending = [item for item in items if item.get("id") in failed]
+        else:
+            pending = [item for item in items if item.get("id") not in self.journal.completed]
         print(f"Found {len(items)} total, {len(pending)} pending migration")
         return pending
     
@@ -103,7 +229,9 @@ class QueryMigrator:
             errors = validate_transformed_query(transformed_query, MLBFINAL_TABLES)
             warnings.extend([f"VALIDATION: {e}" for e in errors])
         
-        transformed["id"] = str(uuid4())
+        # A retried document keeps the target id of its failed attempt, so a write that
+        # actually landed shows up as a conflict instead of a duplicate
+        transformed["id"] = self.journal.target_id(doc.get("id")) or str(uuid4())
         transformed["original_id"] = doc.get("id")
         transformed["migrated_at"] = datetime.now().isoformat()
         transformed.pop("UserPromptVector", None)
@@ -127,14 +255,165 @@ class QueryMigrator:
                 vectorized["QueryVector"] = embedding
         return vectorized
     
-    def upload_document(self, doc: Dict) -> bool:
+    def upload_document(self, doc: Dict) -> Optional[str]:
+        """Create the document in the target container; returns the error, or None on success."""
         try:
             self.target_container.create_item(doc)
-            return True
+            return None
+        except cosmos_exceptions.CosmosResourceExistsError:
+            return None
         except Exception as e:
             print(f"Upload error: {e}")
-            return False
+            return str(e)
     
+    async def _embed_batch(self, texts: List[str], stats: Dict) -> Dict[str, List[float]]:
+        vectors = await asyncio.to_thread(embedding_cache.get_many, OPENAI_DEPLOYMENT, texts)
+        found = {text: vector for text, vector in zip(texts, vectors) if vector is not None}
+        missing = [text for text in dict.fromkeys(texts) if text not in found]
+        stats["cache_hits"] += len(texts) - len(missing)
+        if not missing:
+            return found
+        # Client retries are disabled so a 429's retry-after pauses every embed worker, not just this one
+        client = self.openai_client.with_options(max_retries=0)
+        for attempt in range(1, self.EMBED_MAX_ATTEMPTS + 1):
+            await asyncio.sleep(max(self._embed_resume_at - time.monotonic(), 0))
+            try:
+                response = await client.embeddings.create(model=OPENAI_DEPLOYMENT, input=missing)
+                stats["embed_requests"] += 1
+                fresh = {missing[item.index]: item.embedding for item in response.data}
+                await asyncio.to_thread(embedding_cache.put_many, OPENAI_DEPLOYMENT, list(fresh), list(fresh.values()))
+                found.update(fresh)
+                return found
+            except Exception as e:
+                wait = retry_after_seconds(e)
+                if wait is not None:
+                    stats["throttled"] += 1
+                    self._embed_resume_at = max(self._embed_resume_at, time.monotonic() + wait)
+                else:
+                    wait = min(2 ** attempt, 60)
+                    print(f"Embedding error (attempt {attempt}/{self.EMBED_MAX_ATTEMPTS}): {e}")
+                if attempt == self.EMBED_MAX_ATTEMPTS:
+                    break
+                await asyncio.sleep(wait)
+        stats["embed_failed"] += len(missing)
+        return found
+
+    async def migrate_pipeline(self, documents: List[Dict], transform_workers: int = 2, embed_workers: int = 4,
+                               upload_workers: int = 8, embed_batch_size: int = 64, queue_size: int = 256) -> Dict:
+        """
+        Migrate documents through three concurrent stages joined by bounded queues:
+        transform -> batched embedding -> upload. A full queue slows the stage feeding it.
+        """
+        # Two texts per document; Azure OpenAI accepts at most 2048 inputs per request
+        embed_batch_size = min(embed_batch_size, 1024)
+        transform_q: asyncio.Queue = asyncio.Queue(queue_size)
+        embed_q: asyncio.Queue = asyncio.Queue(queue_size)
+        upload_q: asyncio.Queue = asyncio.Queue(queue_size)
+        stats = {"transformed": 0, "embedded": 0, "uploaded": 0, "upload_failed": 0, "embed_failed": 0,
+                 "embed_requests": 0, "cache_hits": 0, "throttled": 0}
+        self._embed_resume_at = 0.0
+
+        async def feed():
+            for doc in documents:
+                await transform_q.put(doc)
+            for _ in range(transform_workers):
+                await transform_q.put(None)
+
+        async def transform_worker():
+            while (doc := await transform_q.get()) is not None:
+                transformed, _ = await asyncio.to_thread(self.transform_document, doc)
+                stats["transformed"] += 1
+                await embed_q.put((doc.get("id"), transformed))
+
+        async def embed_worker():
+            done = False
+            while not done:
+                item = await embed_q.get()
+                if item is None:
+                    return
+                batch = [item]
+                for _ in range(2):
+                    while len(batch) < embed_batch_size and not embed_q.empty():
+                        item = embed_q.get_nowait()
+                        if item is None:
+                            done = True
+                            break
+                        batch.append(item)
+                    if done or len(batch) >= embed_batch_size:
+                        break
+                    await asyncio.sleep(self.EMBED_BATCH_LINGER)
+                if self.openai_client:
+                    texts = [doc[field] for _, doc in batch for field in ("UserPrompt", "Query") if doc.get(field)]
+                    vectors = await self._embed_batch(texts, stats)
+                    for _, doc in batch:
+                        for field in ("UserPrompt", "Query"):
+                            if doc.get(field) and doc[field] in vectors:
+                                doc[f"{field}Vector"] = vectors[doc[field]]
+                stats["embedded"] += len(batch)
+                for entry in batch:
+                    await upload_q.put(entry)
+
+        async def upload_worker():
+            while (item := await upload_q.get()) is not None:
+                source_id, doc = item
+                try:
+                    await cosmos_call_with_retry(self.target_container.create_item, doc)
+                except cosmos_exceptions.CosmosResourceExistsError:
+                    pass
+                except Exception as e:
+                    stats["upload_failed"] += 1
+                    print(f"Upload error ({source_id}): {e}")
+                    self.journal.record(source_id, doc["id"], "failed", str(e))
+                    continue
+                self.journal.record(source_id, doc["id"], "migrated")
+                stats["uploaded"] += 1
+
+        # A stage whose workers have all stopped tells each worker of the next stage to stop
+        async def run_stage(worker, count: int, next_q: Optional[asyncio.Queue], next_count: int):
+            await asyncio.gather(*(worker() for _ in range(count)))
+            if next_q is not None:
+                for _ in range(next_count):
+                    await next_q.put(None)
+
+        async def report():
+            last_uploaded, last_time = 0, started
+            while True:
+                await asyncio.sleep(self.REPORT_INTERVAL)
+                now = time.monotonic()
+                rate = (stats["uploaded"] - last_uploaded) / (now - last_time)
+                last_uploaded, last_time = stats["uploaded"], now
+                self._save_progress()
+                print(
+                    f"  transformed={stats['transformed']} embedded={stats['embedded']} "
+                    f"uploaded={stats['uploaded']}/{len(documents)} failed={stats['upload_failed']} "
+                    f"| {rate:.1f} docs/s | queues t={transform_q.qsize()} e={embed_q.qsize()} u={upload_q.qsize()} "
+                    f"| embed requests={stats['embed_requests']} cache hits={stats['cache_hits']} "
+                    f"throttled={stats['throttled']}"
+                )
+
+        started = time.monotonic()
+        tasks = [
+            asyncio.create_task(feed()),
+            asyncio.create_task(run_stage(transform_worker, transform_workers, embed_q, embed_workers)),
+            asyncio.create_task(run_stage(embed_worker, embed_workers, upload_q, upload_workers)),
+            asyncio.create_task(run_stage(upload_worker, upload_workers, None, 0)),
+        ]
+        reporter = asyncio.create_task(report())
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks + [reporter]:
+                task.cancel()
+            self._save_progress()
+        elapsed = time.monotonic() - started
+        stats["seconds"] = round(elapsed, 1)
+        print(
+            f"\nMigrated {stats['uploaded']}/{len(documents)} in {elapsed:.1f}s "
+            f"({stats['uploaded'] / elapsed if elapsed else 0:.1f} docs/s), {stats['upload_failed']} failed, "
+            f"{stats['embed_failed']} texts without embeddings"
+        )
+        return stats
+
     def display_document(self, doc: Dict, transformed: Dict, warnings: List[str]):
         print("\n" + "=" * 70)
         print(f"ID: {doc.get('id')}")
@@ -147,8 +426,8 @@ class QueryMigrator:
             for w in warnings:
                 print(f"  - {w}")
     
-    async def migrate_interactive(self, limit: Optional[int] = None):
-        documents = self.fetch_source_documents()
+    async def migrate_interactive(self, limit: Optional[int] = None, only_failed: bool = False):
+        documents = self.fetch_source_documents(only_failed)
         if limit:
             documents = documents[:limit]
         
@@ -168,10 +447,11 @@ class QueryMigrator:
                     print("  Vectorizing...")
                     vectorized = await self.vectorize_document(transformed)
                     print("  Uploading...")
-                    if self.upload_document(vectorized):
+                    error = self.upload_document(vectorized)
+                    self.journal.record(doc.get("id"), vectorized["id"], "failed" if error else "migrated", error)
+                    self._save_progress()
+                    if not error:
                         print("  Success!")
-                        self.migrated_ids.add(doc.get("id"))
-                        self._save_progress()
                         migrated_count += 1
                     break
                 elif response == 'e':
@@ -188,14 +468,8 @@ class QueryMigrator:
                     return
                 elif response == 'a':
                     print("\nAuto-migrating remaining...")
-                    for j, d in enumerate(documents[i-1:], 1):
-                        print(f"  [{j}/{len(documents)-i+1}] {d.get('id')[:8]}...")
-                        t, _ = self.transform_document(d)
-                        v = await self.vectorize_document(t)
-                        if self.upload_document(v):
-                            self.migrated_ids.add(d.get("id"))
-                            self._save_progress()
-                            migrated_count += 1
+                    stats = await self.migrate_pipeline(documents[i-1:])
+                    migrated_count += stats["uploaded"]
                     print(f"\nSummary: {migrated_count} migrated, {skipped_count} skipped")
                     return
         
@@ -206,24 +480,34 @@ async def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--limit", type=int, default=None)
     parser.add_argument("--auto", action="store_true")
+    parser.add_argument("--retry-failed", action="store_true", help="Only documents whose last attempt failed")
+    parser.add_argument("--transform-workers", type=int, default=2)
+    parser.add_argument("--embed-workers", type=int, default=4, help="Embedding requests in flight")
+    parser.add_argument("--upload-workers", type=int, default=8, help="Cosmos writes in flight")
+    parser.add_argument("--embed-batch-size", type=int, default=64, help="Documents per embedding request")
+    parser.add_argument("--queue-size", type=int, default=256, help="Capacity of each queue between stages")
     args = parser.parse_args()
     
     migrator = QueryMigrator()
     migrator.initialize()
     
-    if args.auto:
-        documents = migrator.fetch_source_documents()
-        if args.limit:
-            documents = documents[:args.limit]
-        for i, doc in enumerate(documents, 1):
-            print(f"[{i}/{len(documents)}] {doc.get('id')[:8]}...")
-            transformed, _ = migrator.transform_document(doc)
-            vectorized = await migrator.vectorize_document(transformed)
-            if migrator.upload_document(vectorized):
-                migrator.migrated_ids.add(doc.get("id"))
-                migrator._save_progress()
-    else:
-        await migrator.migrate_interactive(limit=args.limit)
+    try:
+        if args.auto:
+            documents = migrator.fetch_source_documents(only_failed=args.retry_failed)
+            if args.limit:
+                documents = documents[:args.limit]
+            await migrator.migrate_pipeline(
+                documents,
+                transform_workers=args.transform_workers,
+                embed_workers=args.embed_workers,
+                upload_workers=args.upload_workers,
+                embed_batch_size=args.embed_batch_size,
+                queue_size=args.queue_size,
+            )
+        else:
+            await migrator.migrate_interactive(limit=args.limit, only_failed=args.retry_failed)
+    finally:
+        migrator.journal.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -74,33 +74,51 @@ MLBFINAL_TABLES = {
 import re
 from typing import Tuple, List
 
+# Every mapped name, longest first, in one alternation. A single-quoted string literal
+# ('' escapes included; an unterminated one runs to the end) is matched first so its
+# contents are skipped rather than rewritten.
+_MAPPED_NAMES = sorted(
+    set(TABLE_MAPPINGS) | set(COLUMN_MAPPINGS) | set(SEASON_SPECIFIC_MAPPINGS), key=len, reverse=True
+)
+_REWRITE_PATTERN = re.compile(
+    r"'[^']*(?:''[^']*)*(?:'|\Z)|\b(" + "|".join(re.escape(name) for name in _MAPPED_NAMES) + r")\b",
+    re.IGNORECASE,
+)
+_COLUMN_MAPPINGS_SEASON = {**COLUMN_MAPPINGS, **SEASON_SPECIFIC_MAPPINGS}
+_RENAMES = {**TABLE_MAPPINGS, **COLUMN_MAPPINGS}
+_RENAMES_SEASON = {**TABLE_MAPPINGS, **_COLUMN_MAPPINGS_SEASON}
+_HARDCODED_ID_PATTERN = re.compile(r'\b\w+_id\s*=\s*\d+', re.IGNORECASE)
+_TABLE_REFERENCE_PATTERN = re.compile(r'\b(?:FROM|JOIN)\s+(\w+)', re.IGNORECASE)
+_MLBFINAL_TABLES_LOWER = {t.lower() for t in MLBFINAL_TABLES}
+
 def transform_query_auto(sql: str) -> Tuple[str, List[str]]:
     """Transform a SQL query from mlb schema to mlbfinal schema."""
     warnings = []
-    transformed = sql
     is_season = "statsseason" in sql.lower()
+    renames = _RENAMES_SEASON if is_season else _RENAMES
+    column_map = _COLUMN_MAPPINGS_SEASON if is_season else COLUMN_MAPPINGS
+    matched = set()
     
-    # Apply table mappings
-    for old_table, new_table in TABLE_MAPPINGS.items():
-        pattern = re.compile(r'\b' + re.escape(old_table) + r'\b', re.IGNORECASE)
-        if pattern.search(transformed):
-            transformed = pattern.sub(new_table, transformed)
-            warnings.append(f"Table: {old_table} -> {new_table}")
+    def rename(match: "re.Match[str]") -> str:
+        name = match.group(1)
+        if name is None:
+            return match.group(0)
+        key = name.lower()
+        matched.add(key)
+        return renames[key]
     
-    # Apply column mappings
-    column_map = COLUMN_MAPPINGS.copy()
-    if is_season:
-        column_map.update(SEASON_SPECIFIC_MAPPINGS)
+    # Tables and columns are rewritten in one scan
+    transformed = _REWRITE_PATTERN.sub(rename, sql)
     
+    for old_table, new_table in TABLE_MAPPINGS.items():
+        if old_table in matched:
+            warnings.append(f"Table: {old_table} -> {new_table}")
     for old_col, new_col in column_map.items():
-        pattern = re.compile(r'(?<!_)\b' + re.escape(old_col) + r'\b(?!_)', re.IGNORECASE)
-        if pattern.search(transformed):
-            transformed = pattern.sub(new_col, transformed)
-            if old_col != new_col:
-                warnings.append(f"Column: {old_col} -> {new_col}")
+        if old_col in matched and old_col != new_col:
+            warnings.append(f"Column: {old_col} -> {new_col}")
     
     # Check for hardcoded integer IDs
-    if re.search(r'\b\w+_id\s*=\s*\d+', sql, re.IGNORECASE):
+    if _HARDCODED_ID_PATTERN.search(sql):
         warnings.append("WARNING: Query uses hardcoded integer IDs - mlbfinal uses UUIDs")
     
     return transformed, warnings
@@ -108,10 +126,9 @@ def transform_query_auto(sql: str) -> Tuple[str, List[str]]:
 def validate_transformed_query(sql: str, mlbfinal_tables: set) -> List[str]:
     """Validate that transformed query references valid mlbfinal tables."""
     errors = []
-    table_pattern = re.compile(r'\b(?:FROM|JOIN)\s+(\w+)', re.IGNORECASE)
-    matches = table_pattern.findall(sql)
-    for table in matches:
-        if table.lower() not in {t.lower() for t in mlbfinal_tables}:
+    known_tables = _MLBFINAL_TABLES_LOWER if mlbfinal_tables is MLBFINAL_TABLES else {t.lower() for t in mlbfinal_tables}
+    for table in _TABLE_REFERENCE_PATTERN.findall(sql):
+        if table.lower() not in known_tables:
             errors.append(f"Unknown table: {table}")
     return errors
 
@@ -122,3 +139,30 @@ if __name__ == "__main__":
     print(f"Transformed: {result}")
     for w in warnings:
         print(f"  - {w}")
+
+def reference_transform_query_auto(sql: str) -> Tuple[str, List[str]]:
+    """
+    The original transform: compile, search and sub once per mapping.
+
+    Kept as the reference transform_query_auto is checked against (tests and
+    bench_schema_mapping.py); outputs only differ where a mapped name sits inside a
+    string literal, which the single-pass rewriter leaves alone.
+    """
+    warnings = []
+    transformed = sql
+    is_season = "statsseason" in sql.lower()
+    for old_table, new_table in TABLE_MAPPINGS.items():
+        pattern = re.compile(r'\b' + re.escape(old_table) + r'\b', re.IGNORECASE)
+        if pattern.search(transformed):
+            transformed = pattern.sub(new_table, transformed)
+            warnings.append(f"Table: {old_table} -> {new_table}")
+    column_map = _COLUMN_MAPPINGS_SEASON if is_season else COLUMN_MAPPINGS
+    for old_col, new_col in column_map.items():
+        pattern = re.compile(r'(?<!_)\b' + re.escape(old_col) + r'\b(?!_)', re.IGNORECASE)
+        if pattern.search(transformed):
+            transformed = pattern.sub(new_col, transformed)
+            if old_col != new_col:
+                warnings.append(f"Column: {old_col} -> {new_col}")
+    if re.search(r'\b\w+_id\s*=\s*\d+', sql, re.IGNORECASE):
+        warnings.append("WARNING: Query uses hardcoded integer IDs - mlbfinal uses UUIDs")
+    return transformed, warnings
@@ -2,15 +2,29 @@
 """
 Azure Search Index Sync Script
 
-This script compares documents between the NBA Official CosmosDB container and the 
-blitz-nba-index Azure Search index. It identifies orphaned documents that exist in
-the search index but not in CosmosDB, and allows you to selectively remove them.
+This script compares documents between the official CosmosDB containers and their
+Azure Search indexes (nba-official ↔ blitz-nba-index by default; mlb-official ↔ the
+MLB index with --container mlb-official).
+It identifies orphaned documents that exist in a search index but not in CosmosDB,
+and allows you to selectively remove them.
+
+With --apply it runs non-interactively: orphans are deleted and documents missing
+from the index are uploaded from CosmosDB in concurrent batches, and a JSON report
+is written for scheduled jobs.
+
+With --checksum both sides are summarised as per-bucket digests over (id, content
+hash), kept up to date from the documents changed since the previous run, and only
+buckets whose digests differ are compared document by document (see checksum_diff).
 """
 
 import os
 import sys
+import json
+import time
 import asyncio
-from typing import Dict, List, Set
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 from dotenv import load_dotenv
 
 # Add the current directory to Python path so we can import from app
@@ -19,14 +33,24 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 load_dotenv()
 
 try:
-    from azure.cosmos import CosmosClient
-    from azure.identity import DefaultAzureCredential
-    from azure.search.documents import SearchClient
+    from azure.search.documents import IndexDocumentsBatch, SearchClient
     from azure.core.credentials import AzureKeyCredential
+    from app.azure_search_service import azure_search_service
+    from app.cosmos_service import get_container_client, resolve_cosmos_container_id
+    from app.search_outbox import (
+        CONTENT_HASH_FIELD,
+        INDEXED_AT_FIELD,
+        RETRIABLE_STATUS_CODES,
+        content_hash,
+        to_index_document,
+    )
     from app.config import (
-        COSMOSDB_ENDPOINT,
-        DATABASE_NAME,
-        NBA_OFFICIAL_DOCUMENTS_CONTAINER_NAME
+        BACKEND_ROOT,
+        MLB_OFFICIAL_DOCUMENTS_CONTAINER_NAME,
+        NBA_OFFICIAL_DOCUMENTS_CONTAINER_NAME,
+        SEARCH_INDEX_BY_CONTAINER,
+        SEARCH_INDEX_FIELDS,
+        SEARCH_INDEX_FIELDS_BY_INDEX,
     )
 except ImportError as e:
     print(f"Error: Could not import required modules: {e}")
@@ -34,30 +58,45 @@ except ImportError as e:
     sys.exit(1)
 
 
+OFFICIAL_CONTAINERS = [NBA_OFFICIAL_DOCUMENTS_CONTAINER_NAME, MLB_OFFICIAL_DOCUMENTS_CONTAINER_NAME]
+# Synced when no --container is given; MLB is opt-in
+DEFAULT_CONTAINERS = [NBA_OFFICIAL_DOCUMENTS_CONTAINER_NAME]
+DEFAULT_REPORT_PATH = BACKEND_ROOT / "search_sync_report.json"
+
+
+def _odata_string(value: str) -> str:
+    """Quote a value as an OData string literal."""
+    return "'{}'".format(value.replace("'", "''"))
+
+
 class SearchIndexSyncer:
-    """Syncs Azure Search index with CosmosDB container."""
-    
-    def __init__(self):
+    """Syncs an Azure Search index with its CosmosDB container."""
+
+    # Azure Search accepts at most 1000 actions per indexing request
+    DELETE_BATCH_SIZE = 1000
+    # Uploads carry two embedding vectors per document; smaller batches stay under the request size limit
+    UPLOAD_BATCH_SIZE = 200
+    MAX_ATTEMPTS = 4
+    MAX_FAILURES_REPORTED = 1000
+
+    def __init__(self, container_name: str = NBA_OFFICIAL_DOCUMENTS_CONTAINER_NAME, index_name: Optional[str] = None):
         """Initialize clients for CosmosDB and Azure Search."""
         self.cosmos_client = None
         self.search_client = None
-        self.container_name = NBA_OFFICIAL_DOCUMENTS_CONTAINER_NAME
+        self.container_name = container_name
+        self.index_name = index_name or SEARCH_INDEX_BY_CONTAINER[container_name]
         
         # Initialize CosmosDB client
         try:
-            credential = DefaultAzureCredential()
-            self.cosmos_client = CosmosClient(COSMOSDB_ENDPOINT, credential=credential)
-            self.database = self.cosmos_client.get_database_client(DATABASE_NAME)
-            self.container = self.database.get_container_client(self.container_name)
+            self.container = get_container_client(resolve_cosmos_container_id(self.container_name))
             print(f"✓ Connected to CosmosDB container: {self.container_name}")
         except Exception as e:
-            print(f"❌ Failed to connect to CosmosDB: {e}")
+            print(f"❌ Failed to connect to CosmosDB: {getattr(e, 'detail', e)}")
             sys.exit(1)
         
         # Initialize Azure Search client
         search_endpoint = os.getenv('AZURE_SEARCH_ENDPOINT')
         search_api_key = os.getenv('AZURE_SEARCH_API_KEY') or os.getenv('AZURE_SEARCH_KEY')
-        search_index = 'blitz-nba-index'
         
         if not search_endpoint or not search_api_key:
             print("❌ Azure Search credentials not configured.")
@@ -69,72 +108,105 @@ class SearchIndexSyncer:
         try:
             self.search_client = SearchClient(
                 endpoint=search_endpoint,
-                index_name=search_index,
+                index_name=self.index_name,
                 credential=AzureKeyCredential(search_api_key)
             )
-            print(f"✓ Connected to Azure Search index: {search_index}")
+            print(f"✓ Connected to Azure Search index: {self.index_name}")
         except Exception as e:
             print(f"❌ Failed to connect to Azure Search: {e}")
             sys.exit(1)
     
-    def get_cosmos_document_ids(self) -> Set[str]:
-        """Get all document IDs from the CosmosDB container."""
-        print(f"\n📄 Fetching documents from CosmosDB container: {self.container_name}")
-        
-        try:
-            query = "SELECT c.id FROM c"
-            items = list(self.container.query_items(
-                query=query,
-                enable_cross_partition_query=True
-            ))
-            
-            doc_ids = {item['id'] for item in items}
-            print(f"✓ Found {len(doc_ids)} documents in CosmosDB")
-            return doc_ids
-            
-        except Exception as e:
-            print(f"❌ Error fetching CosmosDB documents: {e}")
-            return set()
-    
-    def get_search_documents(self) -> Dict[str, Dict]:
-        """Get all documents from Azure Search index with their details."""
-        print(f"\n🔍 Fetching documents from Azure Search index")
-        
-        try:
-            documents = {}
-            skip = 0
-            batch_size = 1000
-            
-            while True:
-                # Search for documents in batches to handle large indexes
-                results = self.search_client.search(
-                    "*", 
-                    select="id", 
-                    top=batch_size,
-                    skip=skip
+    PAGE_SIZE = 1000
+
+    def iter_cosmos_ids(self) -> Iterator[str]:
+        """Yield every document id in the CosmosDB container in ascending id order."""
+        query = "SELECT VALUE c.id FROM c ORDER BY c.id"
+        for page in self.container.query_items(
+            query=query,
+            enable_cross_partition_query=True,
+            max_item_count=self.PAGE_SIZE,
+        ).by_page():
+            yield from page
+
+    def iter_search_documents(self, fields: Iterable[str] = ("id",),
+                              filter: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield search documents (optionally matching an OData filter) in ascending id order.
+
+        Pages by key (id gt <last id seen>) rather than skip, which Azure Search caps
+        at 100,000 and which gets slower with depth.
+        """
+        last_id: Optional[str] = None
+        while True:
+            clauses = [f"({filter})"] if filter else []
+            if last_id is not None:
+                clauses.append(f"id gt {_odata_string(last_id)}")
+            results = self.search_client.search(
+                "*",
+                select=list(fields),
+                filter=" and ".join(clauses) or None,
+                order_by=["id asc"],
+                top=self.PAGE_SIZE,
+            )
+            page = [result for result in results if result.get('id')]
+            yield from page
+            if len(page) < self.PAGE_SIZE:
+                return
+            last_id = page[-1]['id']
+
+    def iter_search_ids(self) -> Iterator[str]:
+        """Yield every document id in the search index in ascending id order."""
+        for doc in self.iter_search_documents():
+            yield doc['id']
+
+    @staticmethod
+    def _ensure_sorted(ids: Iterator[str], source: str) -> Iterator[str]:
+        """Pass ids through, failing loudly if a source does not return them in order."""
+        previous = None
+        for doc_id in ids:
+            if previous is not None and doc_id <= previous:
+                raise RuntimeError(
+                    f"{source} returned ids out of order ({previous!r} then {doc_id!r}); "
+                    "cannot merge-join"
                 )
-                
-                batch_count = 0
-                for result in results:
-                    doc_id = result.get('id')
-                    if doc_id:
-                        documents[doc_id] = result
-                        batch_count += 1
-                
-                # If we got fewer results than batch_size, we're done
-                if batch_count < batch_size:
-                    break
-                    
-                skip += batch_size
-                print(f"  ... fetched {len(documents)} documents so far")
-            
-            print(f"✓ Found {len(documents)} documents in Azure Search (checked all)")
-            return documents
-            
-        except Exception as e:
-            print(f"❌ Error fetching search documents: {e}")
-            return {}
-    
+            previous = doc_id
+            yield doc_id
+
+    def diff_documents(self) -> Tuple[List[str], List[str], Dict[str, int]]:
+        """
+        Merge-join the sorted id streams of both sides.
+
+        Only the differences are kept in memory. Returns (orphaned ids — in search
+        only, missing ids — in CosmosDB only, counts).
+        """
+        print(f"\n📄 Streaming ids from CosmosDB container {self.container_name} and the search index (sorted by id)")
+        cosmos_ids = self._ensure_sorted(self.iter_cosmos_ids(), "CosmosDB")
+        search_ids = self._ensure_sorted(self.iter_search_ids(), "Azure Search")
+        orphaned: List[str] = []
+        missing: List[str] = []
+        counts = {"cosmos": 0, "search": 0}
+
+        cosmos_id = next(cosmos_ids, None)
+        search_id = next(search_ids, None)
+        while cosmos_id is not None or search_id is not None:
+            if search_id is None or (cosmos_id is not None and cosmos_id < search_id):
+                missing.append(cosmos_id)
+                counts["cosmos"] += 1
+                cosmos_id = next(cosmos_ids, None)
+            elif cosmos_id is None or search_id < cosmos_id:
+                orphaned.append(search_id)
+                counts["search"] += 1
+                search_id = next(search_ids, None)
+            else:
+                counts["cosmos"] += 1
+                counts["search"] += 1
+                cosmos_id = next(cosmos_ids, None)
+                search_id = next(search_ids, None)
+            compared = counts["cosmos"] + counts["search"]
+            if compared and compared % 20000 == 0:
+                print(f"  ... compared {counts['cosmos']} CosmosDB / {counts['search']} search ids so far")
+        return orphaned, missing, counts
+
     def get_search_document_details(self, doc_id: str) -> Dict:
         """Get full details of a specific document from Azure Search."""
         try:
@@ -162,35 +234,416 @@ class SearchIndexSyncer:
             print(f"❌ Error deleting document {doc_id}: {e}")
             return False
     
-    def find_orphaned_documents(self) -> List[str]:
+    # Bucketed checksums: documents are grouped by the first hex characters of a hash of
+    # their id, so buckets stay even whatever the id scheme.
+    BUCKET_PREFIX_LENGTH = 2
+    # Re-read changes this far behind the watermark to absorb clock skew between partitions
+    WATERMARK_OVERLAP_SECONDS = 60
+    STATE_VERSION = 3
+    DIGEST_MODULUS = 1 << 128
+
+    @classmethod
+    def bucket_of(cls, doc_id: str) -> str:
+        return hashlib.sha1(doc_id.encode("utf-8")).hexdigest()[:cls.BUCKET_PREFIX_LENGTH]
+
+    @staticmethod
+    def _leaf(doc_id: str, text_hash: str) -> str:
+        data = f"{doc_id}\0{text_hash}".encode("utf-8")
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+    @classmethod
+    def leaf_hash(cls, doc: Dict[str, Any]) -> str:
+        """Per-document hash over (id, content hash) from the document's text."""
+        return cls._leaf(doc["id"], content_hash(doc))
+
+    @classmethod
+    def stored_leaf_hash(cls, doc: Dict[str, Any]) -> str:
+        """Leaf hash of an index document from its stored content hash (none stored never matches)."""
+        return cls._leaf(doc["id"], doc.get(CONTENT_HASH_FIELD) or "")
+
+    @classmethod
+    def bucket_digests(cls, leaves: Iterable[Tuple[str, str]]) -> Dict[str, Tuple[int, int]]:
+        """
+        (count, digest) per bucket from (id, leaf hash) pairs.
+
+        The digest is the sum of the leaf hashes modulo 2**128, so it does not depend on
+        the order documents are read in.
+        """
+        buckets: Dict[str, List[int]] = {}
+        for doc_id, leaf in leaves:
+            entry = buckets.setdefault(cls.bucket_of(doc_id), [0, 0])
+            entry[0] += 1
+            entry[1] = (entry[1] + int(leaf, 16)) % cls.DIGEST_MODULUS
+        return {bucket: (count, digest) for bucket, (count, digest) in buckets.items()}
+
+    def count_cosmos_documents(self) -> int:
+        result = self.container.query_items(
+            query="SELECT VALUE COUNT(1) FROM c",
+            enable_cross_partition_query=True,
+        )
+        return next(iter(result), 0)
+
+    def iter_cosmos_text(self, since: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """id, _ts and the indexed text of every document (or of those changed at or after `since`)."""
+        query = "SELECT c.id, c._ts, c.UserPrompt, c.Query FROM c"
+        parameters = None
+        if since is not None:
+            query += " WHERE c._ts >= @since"
+            parameters = [{"name": "@since", "value": since}]
+        for page in self.container.query_items(
+            query=query,
+            parameters=parameters,
+            enable_cross_partition_query=True,
+            max_item_count=self.PAGE_SIZE,
+        ).by_page():
+            yield from page
+
+    def fetch_cosmos_text(self, doc_ids: List[str]) -> List[Dict[str, Any]]:
+        return list(self.container.query_items(
+            query="SELECT c.id, c._ts, c.UserPrompt, c.Query FROM c WHERE ARRAY_CONTAINS(@ids, c.id)",
+            parameters=[{"name": "@ids", "value": doc_ids}],
+            enable_cross_partition_query=True,
+        ))
+
+    def refresh_cosmos_leaves(self, state: Dict[str, Any], full: bool = False) -> None:
+        """
+        Bring the persisted CosmosDB leaf hashes (state["leaves"], id -> hash) up to date.
+
+        Documents changed since the watermark are re-hashed. Deletes leave no _ts behind,
+        so the stored ids are re-listed (ids only) when their number no longer matches
+        the container's document count.
+        """
+        leaves: Dict[str, str] = state["leaves"]
+        watermark = state["watermark"]
+        if full or watermark is None:
+            leaves.clear()
+            documents = self.iter_cosmos_text()
+        else:
+            documents = self.iter_cosmos_text(max(watermark - self.WATERMARK_OVERLAP_SECONDS, 0))
+        max_ts = watermark or 0
+        for doc in documents:
+            leaves[doc["id"]] = self.leaf_hash(doc)
+            max_ts = max(max_ts, doc.get("_ts") or 0)
+
+        if self.count_cosmos_documents() != len(leaves):
+            ids = set(self.iter_cosmos_ids())
+            for doc_id in leaves.keys() - ids:
+                del leaves[doc_id]
+            unseen = sorted(ids - leaves.keys())
+            for start in range(0, len(unseen), 100):
+                for doc in self.fetch_cosmos_text(unseen[start:start + 100]):
+                    leaves[doc["id"]] = self.leaf_hash(doc)
+                    max_ts = max(max_ts, doc.get("_ts") or 0)
+        state["watermark"] = max_ts or None
+
+    @property
+    def index_has_sync_fields(self) -> bool:
+        """Whether documents are written to this index with a content hash and IndexedAt."""
+        fields = SEARCH_INDEX_FIELDS_BY_INDEX.get(self.index_name, SEARCH_INDEX_FIELDS)
+        return CONTENT_HASH_FIELD in fields and INDEXED_AT_FIELD in fields
+
+    def count_search_documents(self) -> int:
+        return self.search_client.get_document_count()
+
+    def fetch_search_hashes(self, doc_ids: List[str]) -> List[Dict[str, Any]]:
+        ids = _odata_string("|".join(doc_ids))
+        return list(self.iter_search_documents(
+            ("id", CONTENT_HASH_FIELD, INDEXED_AT_FIELD),
+            f"search.in(id, {ids}, '|')",
+        ))
+
+    def refresh_search_leaves(self, state: Dict[str, Any], full: bool = False) -> None:
+        """
+        Bring the persisted index leaf hashes (state["index_leaves"]) up to date.
+
+        Same scheme as the CosmosDB side, using the stored content hash and IndexedAt
+        instead of the text and _ts. An index written without those fields is hashed
+        from a read of its text (no vectors) on every run instead.
+        """
+        leaves: Dict[str, str] = state["index_leaves"]
+        if not self.index_has_sync_fields:
+            leaves.clear()
+            for doc in self.iter_search_documents(("id", "UserPrompt", "Query")):
+                leaves[doc["id"]] = self.leaf_hash(doc)
+            state["index_watermark"] = None
+            return
+
+        fields = ("id", CONTENT_HASH_FIELD, INDEXED_AT_FIELD)
+        watermark = state["index_watermark"]
+        if full or watermark is None:
+            leaves.clear()
+            documents = self.iter_search_documents(fields)
+        else:
+            since = max(watermark - self.WATERMARK_OVERLAP_SECONDS, 0)
+            documents = self.iter_search_documents(fields, f"{INDEXED_AT_FIELD} ge {since}")
+        max_ts = watermark or 0
+        for doc in documents:
+            leaves[doc["id"]] = self.stored_leaf_hash(doc)
+            max_ts = max(max_ts, doc.get(INDEXED_AT_FIELD) or 0)
+
+        # Deletes, and documents indexed without IndexedAt, only show up in the count
+        if self.count_search_documents() != len(leaves):
+            ids = set(self.iter_search_ids())
+            for doc_id in leaves.keys() - ids:
+                del leaves[doc_id]
+            unseen = sorted(ids - leaves.keys())
+            for start in range(0, len(unseen), 100):
+                for doc in self.fetch_search_hashes(unseen[start:start + 100]):
+                    leaves[doc["id"]] = self.stored_leaf_hash(doc)
+                    max_ts = max(max_ts, doc.get(INDEXED_AT_FIELD) or 0)
+        state["index_watermark"] = max_ts or None
+
+    @property
+    def checksum_state_path(self) -> Path:
+        return BACKEND_ROOT / f"search_sync_state_{self.container_name}.json"
+
+    def load_checksum_state(self) -> Dict[str, Any]:
+        empty = {"watermark": None, "leaves": {}, "index_watermark": None, "index_leaves": {}}
+        if not self.checksum_state_path.exists():
+            return empty
+        with open(self.checksum_state_path, "r") as f:
+            state = json.load(f)
+        if state.get("index") != self.index_name or state.get("version") != self.STATE_VERSION:
+            return empty
+        return state
+
+    def save_checksum_state(self, state: Dict[str, Any]) -> None:
+        state.update(
+            container=self.container_name,
+            index=self.index_name,
+            version=self.STATE_VERSION,
+            updated_at=time.time(),
+        )
+        # Write-then-rename so an interruption never leaves a truncated state file
+        tmp_path = self.checksum_state_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.checksum_state_path)
+
+    def checksum_diff(self, full: bool = False) -> Tuple[List[str], List[str], List[str], Dict[str, int]]:
+        """
+        Incremental diff driven by per-bucket digests.
+
+        Every document hashes to a leaf over (id, hash of UserPrompt/Query); a bucket's
+        digest combines the leaves of the documents whose id hash falls in it. The leaves
+        of both sides are persisted between runs: CosmosDB documents changed since the
+        _ts watermark and index documents sent since the IndexedAt watermark are re-read,
+        plus an id listing when a side's document count no longer matches. Only buckets
+        whose digests differ are compared document by document, from those same leaves.
+
+        full=True rebuilds the leaves of both sides from scratch.
+
+        Returns (orphaned ids, missing ids, stale ids — content differs, counts).
+        """
+        state = self.load_checksum_state()
+        print(f"\n🧮 Summarising {self.container_name} and {self.index_name} "
+              f"in {16 ** self.BUCKET_PREFIX_LENGTH} id-hash buckets")
+        self.refresh_cosmos_leaves(state, full)
+        self.refresh_search_leaves(state, full)
+        leaves: Dict[str, str] = state["leaves"]
+        index_leaves: Dict[str, str] = state["index_leaves"]
+        cosmos_buckets = self.bucket_digests(leaves.items())
+        search_buckets = self.bucket_digests(index_leaves.items())
+
+        differing = {
+            bucket for bucket in cosmos_buckets.keys() | search_buckets.keys()
+            if cosmos_buckets.get(bucket) != search_buckets.get(bucket)
+        }
+        print(f"  {len(differing)} of {16 ** self.BUCKET_PREFIX_LENGTH} buckets differ")
+
+        orphaned: List[str] = []
+        missing: List[str] = []
+        stale: List[str] = []
+        if differing:
+            cosmos_leaves = {doc_id: leaf for doc_id, leaf in leaves.items() if self.bucket_of(doc_id) in differing}
+            search_leaves = {
+                doc_id: leaf for doc_id, leaf in index_leaves.items() if self.bucket_of(doc_id) in differing
+            }
+            orphaned = sorted(search_leaves.keys() - cosmos_leaves.keys())
+            missing = sorted(cosmos_leaves.keys() - search_leaves.keys())
+            stale = sorted(
+                doc_id for doc_id in cosmos_leaves.keys() & search_leaves.keys()
+                if cosmos_leaves[doc_id] != search_leaves[doc_id]
+            )
+        self.save_checksum_state(state)
+
+        counts = {
+            "cosmos": len(leaves),
+            "search": len(index_leaves),
+            "buckets": 16 ** self.BUCKET_PREFIX_LENGTH,
+            "buckets_drilled": len(differing),
+        }
+        return orphaned, missing, stale, counts
+
+    def compare(self, checksum: bool = False, full: bool = False) -> Tuple[List[str], List[str], List[str], Dict[str, int]]:
+        """(orphaned, missing, stale, counts) using either the bucketed checksums or a full merge-join."""
+        if checksum:
+            return self.checksum_diff(full)
+        orphaned_ids, missing_ids, counts = self.diff_documents()
+        return orphaned_ids, missing_ids, [], counts
+
+    def find_orphaned_documents(self, checksum: bool = False, full: bool = False) -> List[str]:
         """Find documents that exist in search index but not in CosmosDB."""
         print("\n" + "=" * 60)
         print("ANALYZING DOCUMENT DIFFERENCES")
         print("=" * 60)
         
-        cosmos_ids = self.get_cosmos_document_ids()
-        search_documents = self.get_search_documents()
+        try:
+            orphaned_ids, missing_ids, stale_ids, counts = self.compare(checksum, full)
+        except Exception as e:
+            print(f"❌ Error comparing documents: {e}")
+            return []
         
-        if not cosmos_ids and not search_documents:
+        if not counts["cosmos"] and not counts["search"]:
             print("⚠ No documents found in either system")
             return []
         
-        search_ids = set(search_documents.keys())
-        
-        # Find orphaned documents (in search but not in cosmos)
-        orphaned_ids = search_ids - cosmos_ids
-        
         print(f"\n📊 COMPARISON RESULTS:")
-        print(f"  CosmosDB documents: {len(cosmos_ids)}")
-        print(f"  Search index documents: {len(search_ids)}")
+        print(f"  CosmosDB documents: {counts['cosmos']}")
+        print(f"  Search index documents: {counts['search']}")
         print(f"  Orphaned documents (in search only): {len(orphaned_ids)}")
         
-        if cosmos_ids - search_ids:
-            missing_count = len(cosmos_ids - search_ids)
-            print(f"  Missing from search: {missing_count} (not handled by this script)")
+        if "buckets" in counts:
+            print(f"  Buckets compared document by document: {counts['buckets_drilled']}/{counts['buckets']}")
+        
+        if missing_ids:
+            print(f"  Missing from search: {len(missing_ids)} (uploaded with --apply)")
+        
+        if stale_ids:
+            print(f"  Out of date in search: {len(stale_ids)} (uploaded with --apply)")
         
-        return list(orphaned_ids)
+        return orphaned_ids
     
+    def fetch_cosmos_documents(self, doc_ids: List[str]) -> List[Dict[str, Any]]:
+        """Read a batch of documents from CosmosDB by id (ids deleted meanwhile are absent)."""
+        return list(self.container.query_items(
+            query="SELECT * FROM c WHERE ARRAY_CONTAINS(@ids, c.id)",
+            parameters=[{"name": "@ids", "value": doc_ids}],
+            enable_cross_partition_query=True,
+        ))
+
+    async def _index_with_retry(self, client, action: str, documents: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+        """
+        Send one batch of delete/upload actions, retrying throttled or transient failures.
+
+        Returns the documents that still failed as [{'id', 'error'}].
+        """
+        pending = {doc["id"]: doc for doc in documents}
+        errors: Dict[str, str] = {}
+        for attempt in range(1, self.MAX_ATTEMPTS + 1):
+            batch = IndexDocumentsBatch()
+            if action == "delete":
+                batch.add_delete_actions(list(pending.values()))
+            else:
+                batch.add_merge_or_upload_actions(list(pending.values()))
+            try:
+                results = await client.index_documents(batch)
+            except Exception as e:
+                errors = {doc_id: str(e) for doc_id in pending}
+            else:
+                retry = {}
+                for result in results:
+                    if result.succeeded:
+                        errors.pop(result.key, None)
+                        continue
+                    errors[result.key] = result.error_message or f"status {result.status_code}"
+                    if result.status_code in RETRIABLE_STATUS_CODES:
+                        retry[result.key] = pending[result.key]
+                pending = retry
+            if not pending:
+                break
+            if attempt < self.MAX_ATTEMPTS:
+                await asyncio.sleep(2 ** attempt)
+        return [{"id": doc_id, "error": error} for doc_id, error in errors.items()]
+
+    async def apply_changes(self, orphaned_ids: List[str], missing_ids: List[str],
+                            concurrency: int = 8) -> Dict[str, Any]:
+        """
+        Delete orphaned ids from the index and upload missing documents from CosmosDB.
+
+        Both run as concurrent batches, at most `concurrency` requests in flight.
+        """
+        client = azure_search_service.get_client(self.index_name)
+        semaphore = asyncio.Semaphore(concurrency)
+        result: Dict[str, Any] = {
+            "deleted": 0,
+            "delete_failed": 0,
+            "uploaded": 0,
+            "upload_failed": 0,
+            "uploaded_without_vectors": 0,
+            "missing_gone_from_cosmos": 0,
+            "failures": [],
+        }
+
+        def record_failures(kind: str, failures: List[Dict[str, str]]) -> None:
+            result[f"{kind}_failed"] += len(failures)
+            room = self.MAX_FAILURES_REPORTED - len(result["failures"])
+            result["failures"].extend({"action": kind, **failure} for failure in failures[:max(room, 0)])
+
+        async def delete_batch(chunk: List[str]) -> None:
+            async with semaphore:
+                failures = await self._index_with_retry(client, "delete", [{"id": doc_id} for doc_id in chunk])
+            result["deleted"] += len(chunk) - len(failures)
+            record_failures("delete", failures)
+
+        async def upload_batch(chunk: List[str]) -> None:
+            async with semaphore:
+                try:
+                    docs = await asyncio.to_thread(self.fetch_cosmos_documents, chunk)
+                except Exception as e:
+                    record_failures("upload", [{"id": doc_id, "error": f"CosmosDB read failed: {e}"} for doc_id in chunk])
+                    return
+                documents = [to_index_document(doc, self.index_name) for doc in docs]
+                result["missing_gone_from_cosmos"] += len(chunk) - len(documents)
+                if not documents:
+                    return
+                failures = await self._index_with_retry(client, "upload", documents)
+            failed_ids = {failure["id"] for failure in failures}
+            result["uploaded"] += len(documents) - len(failed_ids)
+            result["uploaded_without_vectors"] += sum(
+                1 for doc in documents
+                if doc["id"] not in failed_ids and not ("UserPromptVector" in doc and "QueryVector" in doc)
+            )
+            record_failures("upload", failures)
+
+        await asyncio.gather(
+            *(delete_batch(orphaned_ids[i:i + self.DELETE_BATCH_SIZE])
+              for i in range(0, len(orphaned_ids), self.DELETE_BATCH_SIZE)),
+            *(upload_batch(missing_ids[i:i + self.UPLOAD_BATCH_SIZE])
+              for i in range(0, len(missing_ids), self.UPLOAD_BATCH_SIZE)),
+        )
+        return result
+
+    async def reconcile(self, concurrency: int = 8, checksum: bool = False, full: bool = False) -> Dict[str, Any]:
+        """Diff this container against its index and fix both directions; returns a report entry."""
+        report: Dict[str, Any] = {"container": self.container_name, "index": self.index_name}
+        started = time.time()
+        try:
+            orphaned_ids, missing_ids, stale_ids, counts = await asyncio.to_thread(self.compare, checksum, full)
+        except Exception as e:
+            print(f"❌ Error comparing documents: {e}")
+            report.update(error=f"{type(e).__name__}: {e}", duration_seconds=round(time.time() - started, 1))
+            return report
+        report.update(
+            cosmos_documents=counts["cosmos"],
+            search_documents=counts["search"],
+            orphaned=len(orphaned_ids),
+            missing=len(missing_ids),
+            stale=len(stale_ids),
+            diff_seconds=round(time.time() - started, 1),
+        )
+        if "buckets" in counts:
+            report.update(buckets=counts["buckets"], buckets_drilled=counts["buckets_drilled"])
+        print(f"  CosmosDB: {counts['cosmos']}  Search: {counts['search']}  "
+              f"Orphaned: {len(orphaned_ids)}  Missing: {len(missing_ids)}  Stale: {len(stale_ids)}")
+
+        report.update(await self.apply_changes(orphaned_ids, missing_ids + stale_ids, concurrency))
+        report["duration_seconds"] = round(time.time() - started, 1)
+        print(f"  Deleted {report['deleted']} (failed {report['delete_failed']}), "
+              f"uploaded {report['uploaded']} (failed {report['upload_failed']}, "
+              f"{report['uploaded_without_vectors']} without vectors) in {report['duration_seconds']}s")
+        return report
+
     async def interactive_cleanup(self, orphaned_ids: List[str]) -> None:
         """Interactively review and delete orphaned documents."""
         if not orphaned_ids:
@@ -281,38 +734,100 @@ class SearchIndexSyncer:
         
         if deleted > 0:
             print(f"\n🎉 Search index cleanup completed!")
-            print(f"   Removed {deleted} orphaned document(s) from blitz-nba-index")
+            print(f"   Removed {deleted} orphaned document(s) from {self.index_name}")
         
         print("=" * 60)
 
 
+async def run_interactive(container_name: str, checksum: bool = False, full: bool = False) -> None:
+    """Review and delete orphaned documents for one container, one prompt per document."""
+    syncer = SearchIndexSyncer(container_name)
+    
+    # Find orphaned documents
+    orphaned_ids = syncer.find_orphaned_documents(checksum, full)
+    
+    if not orphaned_ids:
+        print("\n✅ Search index is perfectly synchronized with CosmosDB!")
+        return
+    
+    print(f"\n⚠️  Found {len(orphaned_ids)} orphaned documents in search index")
+    print("These documents will be reviewed for deletion.")
+    
+    confirm = input(f"\nProceed with interactive cleanup? [y/N]: ").lower().strip()
+    if confirm not in ['y', 'yes']:
+        print("🚫 Operation cancelled")
+        return
+    
+    # Interactive cleanup
+    await syncer.interactive_cleanup(orphaned_ids)
+
+
+async def run_apply(container_names: List[str], concurrency: int, report_path: str,
+                    checksum: bool = False, full: bool = False) -> bool:
+    """Reconcile every container non-interactively and write the JSON report; True if nothing failed."""
+    report: Dict[str, Any] = {"started_at": time.time(), "concurrency": concurrency, "containers": []}
+    try:
+        for container_name in container_names:
+            print(f"\n🔄 Reconciling {container_name} ↔ {SEARCH_INDEX_BY_CONTAINER[container_name]}")
+            syncer = SearchIndexSyncer(container_name)
+            report["containers"].append(await syncer.reconcile(concurrency, checksum, full))
+    finally:
+        await azure_search_service.close()
+        report["finished_at"] = time.time()
+        report["ok"] = all(
+            not entry.get("error") and not entry.get("delete_failed") and not entry.get("upload_failed")
+            for entry in report["containers"]
+        )
+        with open(report_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n📝 Report written to {report_path}")
+    return report["ok"]
+
+
 async def main():
     """Main function to run the sync script."""
+    import argparse
+    parser = argparse.ArgumentParser(description="Sync Azure Search indexes with the official CosmosDB containers")
+    parser.add_argument(
+        "--container",
+        action="append",
+        choices=OFFICIAL_CONTAINERS,
+        help=f"Container to sync (repeatable; default: {', '.join(DEFAULT_CONTAINERS)})",
+    )
+    parser.add_argument(
+        "--apply",
+        action="store_true",
+        help="Non-interactive: delete orphans and upload missing documents, then write a report",
+    )
+    parser.add_argument("--concurrency", type=int, default=8, help="Index batches in flight with --apply")
+    parser.add_argument("--report", default=str(DEFAULT_REPORT_PATH), help="JSON report path for --apply")
+    parser.add_argument(
+        "--checksum",
+        action="store_true",
+        help="Compare per-bucket digests and only drill into buckets whose digests differ",
+    )
+    parser.add_argument(
+        "--full-rescan",
+        action="store_true",
+        help="With --checksum, rebuild the saved CosmosDB hashes instead of updating them",
+    )
+    args = parser.parse_args()
+    container_names = args.container or DEFAULT_CONTAINERS
+
     print("=" * 60)
     print("AZURE SEARCH INDEX SYNC TOOL")
-    print("NBA Official CosmosDB ↔ blitz-nba-index")
+    for container_name in container_names:
+        print(f"{container_name} CosmosDB ↔ {SEARCH_INDEX_BY_CONTAINER[container_name]}")
     print("=" * 60)
     
-    syncer = SearchIndexSyncer()
+    if args.apply:
+        if not await run_apply(container_names, args.concurrency, args.report, args.checksum, args.full_rescan):
+            sys.exit(1)
+        return
     
     try:
-        # Find orphaned documents
-        orphaned_ids = syncer.find_orphaned_documents()
-        
-        if not orphaned_ids:
-            print("\n✅ Search index is perfectly synchronized with CosmosDB!")
-            return
-        
-        print(f"\n⚠️  Found {len(orphaned_ids)} orphaned documents in search index")
-        print("These documents will be reviewed for deletion.")
-        
-        confirm = input(f"\nProceed with interactive cleanup? [y/N]: ").lower().strip()
-        if confirm not in ['y', 'yes']:
-            print("🚫 Operation cancelled")
-            return
-        
-        # Interactive cleanup
-        await syncer.interactive_cleanup(orphaned_ids)
+        for container_name in container_names:
+            await run_interactive(container_name, args.checksum, args.full_rescan)
         
     except KeyboardInterrupt:
         print("\n\n🚫 Operation cancelled by user")
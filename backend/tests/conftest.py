@@ -0,0 +1,10 @@
+import os
+import sys
+
+# Tests import app modules and the backend scripts the same way the scripts do
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Keep the suite off external services and shared state: no Redis, no on-disk embedding cache
+os.environ.pop("REDIS_URL", None)
+os.environ["EMBEDDING_CACHE_PATH"] = ""
@@ -0,0 +1,49 @@
+import gzip
+import io
+import json
+
+import pytest
+
+import check_schema_mapping
+from check_schema_mapping import _iter_json_array, iter_corpus
+
+DOCUMENTS = [{"id": "a", "Query": "SELECT 1"}, {"id": "b", "Query": "SELECT 22", "n": 123456}]
+
+
+@pytest.fixture(autouse=True)
+def small_reads(monkeypatch):
+    # Tiny reads put token and number boundaries across chunks
+    monkeypatch.setattr(check_schema_mapping, "READ_CHUNK_SIZE", 3)
+
+
+def test_documents_key_found_among_top_level_keys():
+    text = json.dumps({
+        "metadata": {"note": "documents", "documents": ["nested, not this one"]},
+        "count": 2,
+        "documents": DOCUMENTS,
+        "finished": True,
+    })
+    assert list(_iter_json_array(io.StringIO(text), "documents")) == DOCUMENTS
+
+
+def test_empty_array():
+    assert list(_iter_json_array(io.StringIO('{"documents": [ ]}'), "documents")) == []
+
+
+def test_missing_key_raises():
+    with pytest.raises(ValueError, match="no top-level 'documents'"):
+        list(_iter_json_array(io.StringIO('{"metadata": {"documents": []}}'), "documents"))
+
+
+def test_truncated_array_raises():
+    with pytest.raises(ValueError):
+        list(_iter_json_array(io.StringIO('{"documents": [{"id": "a"}, {"id"'), "documents"))
+
+
+def test_iter_corpus_formats(tmp_path):
+    ndjson = "".join(json.dumps(doc) + "\n" for doc in DOCUMENTS)
+    (tmp_path / "export.json").write_text(json.dumps({"documents": DOCUMENTS}))
+    (tmp_path / "export.ndjson").write_text(ndjson)
+    (tmp_path / "export.ndjson.gz").write_bytes(gzip.compress(ndjson.encode()))
+    for name in ("export.json", "export.ndjson", "export.ndjson.gz"):
+        assert list(iter_corpus(str(tmp_path / name))) == DOCUMENTS, name
@@ -0,0 +1,36 @@
+import pytest
+
+from app.config import AVAILABLE_DATABASES
+from app.postgres_service import postgres_service
+from validate_stored_queries import is_cacheable
+
+
+class PgError(Exception):
+    def __init__(self, message, pgcode):
+        super().__init__(message)
+        self.pgcode = pgcode
+
+
+@pytest.mark.parametrize("query", ["SELECT 1; SELECT 2", "  ;  "])
+def test_rejected_statements_are_invalid_not_transient(query):
+    result = postgres_service.explain_query(next(iter(AVAILABLE_DATABASES)), query)
+    assert not result["success"]
+    assert result["transient"] is False
+    assert is_cacheable(result)
+
+
+@pytest.mark.parametrize("error, transient", [
+    (PgError('relation "gmes" does not exist', "42P01"), False),
+    (PgError("canceling statement due to statement timeout", "57014"), True),
+    (PgError("could not connect to server", "08006"), True),
+    (ConnectionError("pool exhausted"), True),
+])
+def test_query_errors_classified_by_sqlstate(error, transient):
+    result = postgres_service._query_error(error)
+    assert result["transient"] is transient
+    assert is_cacheable(result) is not transient
+
+
+def test_valid_and_legacy_cached_results_are_cacheable():
+    assert is_cacheable({"success": True})
+    assert is_cacheable({"success": False, "error": "syntax error", "sqlstate": "42601"})
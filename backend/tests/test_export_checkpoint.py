@@ -0,0 +1,121 @@
+import gzip
+import json
+
+import pytest
+
+from extract_mlb_queries import ExportWriter, export_sequential
+
+SETTINGS = {"container": "mlb", "fields": None}
+DOCUMENTS = [{"id": str(i), "Query": f"SELECT {i}"} for i in range(10)]
+
+
+class FakePager:
+    """by_page() over fixed pages; the continuation token is the next page's index."""
+
+    def __init__(self, pages, start, fail_after=None):
+        self.pages = pages
+        self.index = int(start or 0)
+        self.fail_after = fail_after
+        self.served = 0
+        self.continuation_token = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.index >= len(self.pages):
+            raise StopIteration
+        if self.fail_after is not None and self.served == self.fail_after:
+            raise ConnectionError("connection reset")
+        page = self.pages[self.index]
+        self.index += 1
+        self.served += 1
+        self.continuation_token = str(self.index) if self.index < len(self.pages) else None
+        return iter(page)
+
+
+class FakeContainer:
+    def __init__(self, page_size=3, fail_after=None):
+        self.pages = [DOCUMENTS[i:i + page_size] for i in range(0, len(DOCUMENTS), page_size)]
+        self.fail_after = fail_after
+        self.started_from = []
+
+    def query_items(self, **kwargs):
+        container = self
+
+        class Query:
+            def by_page(self, continuation=None):
+                container.started_from.append(continuation)
+                return FakePager(container.pages, continuation, container.fail_after)
+
+        return Query()
+
+
+def read_output(path):
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def run_export(output, container, restart=False):
+    writer = ExportWriter(output, SETTINGS, restart=restart)
+    try:
+        export_sequential(container, writer, "SELECT * FROM c", [], 3, lambda: None)
+    except ConnectionError:
+        writer.close(completed=False)
+        raise
+    writer.close(completed=True)
+    return writer
+
+
+@pytest.mark.parametrize("suffix", ["ndjson", "ndjson.gz"])
+def test_resume_after_failure_exports_each_document_once(tmp_path, suffix):
+    output = str(tmp_path / f"export.{suffix}")
+    with pytest.raises(ConnectionError):
+        run_export(output, FakeContainer(fail_after=2))
+    assert len(read_output(output)) == 6
+
+    container = FakeContainer()
+    writer = run_export(output, container)
+    assert container.started_from == ["2"]
+    assert writer.state["completed"] is True
+    assert writer.state["documents"] == len(DOCUMENTS)
+    assert read_output(output) == DOCUMENTS
+
+
+def test_unrecorded_tail_is_truncated_on_resume(tmp_path):
+    output = str(tmp_path / "export.ndjson.gz")
+    with pytest.raises(ConnectionError):
+        run_export(output, FakeContainer(fail_after=1))
+    # A page written after the last checkpoint (crash before it was saved)
+    with open(output, "ab") as f:
+        f.write(gzip.compress(b'{"id": "duplicate"}\n'))
+
+    run_export(output, FakeContainer())
+    assert read_output(output) == DOCUMENTS
+
+
+def test_finished_export_is_not_queried_again(tmp_path):
+    output = str(tmp_path / "export.ndjson")
+    run_export(output, FakeContainer())
+    container = FakeContainer()
+    run_export(output, container)
+    assert container.started_from == []
+    assert read_output(output) == DOCUMENTS
+
+
+def test_changed_settings_refuse_to_resume(tmp_path):
+    output = str(tmp_path / "export.ndjson")
+    with pytest.raises(ConnectionError):
+        run_export(output, FakeContainer(fail_after=1))
+    with pytest.raises(SystemExit):
+        ExportWriter(output, {**SETTINGS, "fields": ["id"]})
+
+
+def test_output_without_checkpoint_needs_restart(tmp_path):
+    output = tmp_path / "export.ndjson"
+    output.write_text('{"id": "old"}\n')
+    with pytest.raises(SystemExit):
+        ExportWriter(str(output), SETTINGS)
+    run_export(str(output), FakeContainer(), restart=True)
+    assert read_output(str(output)) == DOCUMENTS
@@ -0,0 +1,74 @@
+import json
+
+from migrate_mlb_queries import MigrationJournal
+
+
+def journal_lines(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_replay_keeps_last_outcome_per_document(tmp_path):
+    path = str(tmp_path / "journal.ndjson")
+    journal = MigrationJournal(path)
+    journal.record("a", "t-a", "migrated")
+    journal.record("b", None, "failed", "boom")
+    journal.record("c", None, "failed", "boom")
+    journal.record("c", "t-c", "migrated")
+    journal.record("a", None, "failed", "rerun failed")
+    journal.close()
+
+    replayed = MigrationJournal(path)
+    assert replayed.completed == {"c"}
+    assert replayed.failed_ids() == {"a", "b"}
+    assert replayed.target_id("c") == "t-c"
+    assert replayed.entries["b"]["error"] == "boom"
+    assert replayed.lines == 5
+    replayed.close()
+
+
+def test_torn_last_line_is_dropped_and_rewritten(tmp_path):
+    path = tmp_path / "journal.ndjson"
+    journal = MigrationJournal(str(path))
+    journal.record("a", "t-a", "migrated")
+    journal.close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"source_id": "b", "outc')
+
+    replayed = MigrationJournal(str(path))
+    assert replayed.completed == {"a"}
+    replayed.close()
+    assert [entry["source_id"] for entry in journal_lines(path)] == ["a"]
+
+
+def test_compaction_rewrites_one_line_per_document(tmp_path, monkeypatch):
+    monkeypatch.setattr(MigrationJournal, "COMPACT_MIN_LINES", 4)
+    path = str(tmp_path / "journal.ndjson")
+    journal = MigrationJournal(path)
+    for attempt in range(5):
+        journal.record("a", None, "failed", f"attempt {attempt}")
+    journal.record("b", "t-b", "migrated")
+    journal.sync()
+
+    assert journal.lines == 2
+    lines = journal_lines(path)
+    assert [(entry["source_id"], entry["outcome"]) for entry in lines] == [("a", "failed"), ("b", "migrated")]
+    assert lines[0]["error"] == "attempt 4"
+
+    # Appends after a compaction land in the rewritten file
+    journal.record("a", "t-a", "migrated")
+    journal.close()
+    reopened = MigrationJournal(path)
+    assert reopened.completed == {"a", "b"}
+    reopened.close()
+
+
+def test_legacy_progress_file_is_imported(tmp_path):
+    legacy = tmp_path / "migration_progress.json"
+    legacy.write_text(json.dumps({"migrated_ids": ["x", "y"]}))
+    path = tmp_path / "journal.ndjson"
+
+    journal = MigrationJournal(str(path), legacy_progress_file=str(legacy))
+    assert journal.completed == {"x", "y"}
+    journal.close()
+    assert {entry["source_id"] for entry in journal_lines(path)} == {"x", "y"}
@@ -0,0 +1,116 @@
+import asyncio
+import gzip
+import zlib
+
+import pytest
+
+from app.bulk_operations import PayloadTooLarge, iter_ndjson
+
+BODY = b'{"a": 1}\n\n{"b": 2}\n{"c": 3}'
+LINES = [(1, b'{"a": 1}'), (3, b'{"b": 2}'), (4, b'{"c": 3}')]
+
+
+async def chunked(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def read(data: bytes, size: int = 5, **kwargs):
+    async def collect():
+        return [line async for line in iter_ndjson(chunked(data, size), **kwargs)]
+
+    return asyncio.run(collect())
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 1024])
+def test_lines_split_across_chunks(size):
+    assert read(BODY, size) == LINES
+
+
+def test_trailing_newline_and_blank_lines_are_counted():
+    assert read(b'\n{"a": 1}\n\n') == [(2, b'{"a": 1}')]
+
+
+@pytest.mark.parametrize("size", [1, 16, 4096])
+def test_gzip_body(size):
+    assert read(gzip.compress(BODY), size, gzipped=True) == LINES
+
+
+def test_concatenated_gzip_members():
+    data = gzip.compress(BODY[:12]) + gzip.compress(BODY[12:])
+    assert read(data, 10, gzipped=True) == LINES
+
+
+def test_corrupt_gzip_raises_zlib_error():
+    with pytest.raises(zlib.error):
+        read(b"definitely not gzip", gzipped=True)
+
+
+def test_raw_bytes_over_cap():
+    with pytest.raises(PayloadTooLarge):
+        read(BODY, max_bytes=len(BODY) - 1)
+    assert read(BODY, max_bytes=len(BODY)) == LINES
+
+
+def test_decompressed_bytes_over_cap():
+    bomb = gzip.compress(b"x" * 5_000_000)
+    assert len(bomb) < 100_000
+    with pytest.raises(PayloadTooLarge):
+        read(bomb, 4096, gzipped=True, max_bytes=100_000)
+
+
+def test_gzip_within_cap():
+    data = gzip.compress(BODY)
+    assert read(data, 8, gzipped=True, max_bytes=max(len(data), len(BODY))) == LINES
+
+
+class FakeContainer:
+    def __init__(self):
+        self.items = {}
+
+    def upsert_item(self, body):
+        self.items[body["id"]] = dict(body)
+        return body
+
+    def create_item(self, body):
+        self.items[body["id"]] = dict(body)
+        return body
+
+
+@pytest.fixture
+def import_client(monkeypatch):
+    from fastapi.testclient import TestClient
+    from app import main
+
+    container = FakeContainer()
+    monkeypatch.setattr(main, "get_container_client", lambda name: container)
+    monkeypatch.setattr(main, "get_partition_key_field", lambda client: "sport")
+    monkeypatch.setattr(main, "_should_defer_embeddings", lambda name, requested: False)
+    monkeypatch.setattr(main, "OFFICIAL_EMBEDDING_CONTAINERS", set())
+    return TestClient(main.app), container, main
+
+
+def test_import_keeps_fields_the_model_does_not_declare(import_client):
+    client, container, _ = import_client
+    body = b'{"id": "d1", "UserPrompt": "p", "Query": "q", "sport": "mlb", "tags": ["x"]}\n{"UserPrompt": "p"}\n'
+    response = client.post("/api/feedback/documents/import?container=mlb-unofficial", content=body)
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["succeeded"], result["failed"]) == (1, 1)
+    assert container.items["d1"] == {"id": "d1", "UserPrompt": "p", "Query": "q", "sport": "mlb", "tags": ["x"]}
+
+
+def test_import_over_cap_is_413(import_client, monkeypatch):
+    client, container, main = import_client
+    monkeypatch.setattr(main, "IMPORT_MAX_BYTES", 64)
+    line = b'{"UserPrompt": "p", "Query": "q", "sport": "mlb"}\n'
+
+    def stream():
+        # No Content-Length: only the streaming cap can stop this body
+        for _ in range(10):
+            yield line
+
+    response = client.post("/api/feedback/documents/import?container=mlb-unofficial", content=stream())
+    assert response.status_code == 413
+    assert response.json()["detail"]["error"] == "Request too large"
+    assert container.items == {}
@@ -0,0 +1,55 @@
+import pytest
+from sqlalchemy.exc import DBAPIError
+
+from app.postgres_service import is_retry_safe, postgres_service
+
+
+@pytest.mark.parametrize("query", [
+    "SELECT 1",
+    "  -- leading comment\nselect * from games;",
+    "/* c */ WITH recent AS (SELECT * FROM games) SELECT * FROM recent",
+    "select updated_at from t",
+    "EXPLAIN SELECT * FROM games",
+])
+def test_read_only_statements_are_retry_safe(query):
+    assert is_retry_safe(query)
+
+
+@pytest.mark.parametrize("query", [
+    "UPDATE games SET a = 1",
+    "INSERT INTO t VALUES (1)",
+    "WITH gone AS (DELETE FROM t RETURNING *) SELECT * FROM gone",
+    "SELECT * INTO t2 FROM t",
+    "SELECT nextval('s')",
+    "SELECT * FROM t FOR UPDATE",
+    "SELECT 1; DROP TABLE t",
+    "EXPLAIN ANALYZE DELETE FROM t",
+    "CALL refresh_stats()",
+])
+def test_writes_are_not_retry_safe(query):
+    assert not is_retry_safe(query)
+
+
+class DeadConnection:
+    def __init__(self):
+        self.calls = 0
+
+    def execute(self, statement):
+        self.calls += 1
+        if self.calls == 1:
+            raise DBAPIError("stmt", {}, Exception("server closed the connection"), connection_invalidated=True)
+        return "result"
+
+    def rollback(self):
+        pass
+
+
+def test_execute_retries_only_when_marked_safe():
+    connection = DeadConnection()
+    assert postgres_service._execute(connection, "SELECT 1", retry_safe=True) == "result"
+    assert connection.calls == 2
+
+    connection = DeadConnection()
+    with pytest.raises(DBAPIError):
+        postgres_service._execute(connection, "UPDATE t SET a = 1")
+    assert connection.calls == 1
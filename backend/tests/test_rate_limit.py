@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from app import rate_limit
+from app.rate_limit import TokenBucket, estimate_tokens, retry_after_seconds
+
+
+class FakeClock:
+    """Stands in for time.monotonic and asyncio.sleep so waits are recorded, not slept."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(rate_limit.asyncio, "sleep", clock.sleep)
+    return clock
+
+
+def test_starts_full_and_waits_for_refill(clock):
+    bucket = TokenBucket(rate_per_minute=60)  # one token per second
+
+    async def run():
+        await bucket.acquire(60)
+        await bucket.acquire(3)
+
+    asyncio.run(run())
+    assert clock.sleeps == [pytest.approx(3.0)]
+    assert bucket.tokens == pytest.approx(0)
+
+
+def test_refill_is_capped_at_capacity(clock):
+    bucket = TokenBucket(rate_per_minute=60, capacity=10)
+    asyncio.run(bucket.acquire(10))
+    clock.now += 3600
+    asyncio.run(bucket.acquire(1))
+    assert clock.sleeps == []
+    assert bucket.tokens == pytest.approx(9)
+
+
+def test_oversized_request_passes_once_bucket_is_full(clock):
+    bucket = TokenBucket(rate_per_minute=60, capacity=10)
+    asyncio.run(bucket.acquire(500))
+    assert clock.sleeps == []
+    assert bucket.tokens == pytest.approx(0)
+
+
+def test_penalize_pauses_callers(clock):
+    bucket = TokenBucket(rate_per_minute=60, capacity=10)
+    bucket.penalize(5)
+    asyncio.run(bucket.acquire(1))
+    # Drained to -5 tokens: 5s to get back to zero plus 1s for the requested token
+    assert sum(clock.sleeps) == pytest.approx(6.0)
+
+
+class Throttled(Exception):
+    def __init__(self, status_code, headers):
+        super().__init__("throttled")
+        self.status_code = status_code
+        self.headers = headers
+
+
+def test_retry_after_seconds():
+    assert retry_after_seconds(Throttled(429, {"retry-after-ms": "250"})) == pytest.approx(0.25)
+    assert retry_after_seconds(Throttled(429, {"x-ms-retry-after-ms": "1500"})) == pytest.approx(1.5)
+    assert retry_after_seconds(Throttled(429, {"retry-after": "3"})) == pytest.approx(3.0)
+    assert retry_after_seconds(Throttled(429, {"retry-after": "soon"}), default=2.0) == 2.0
+    assert retry_after_seconds(Throttled(500, {"retry-after": "3"})) is None
+    assert retry_after_seconds(ValueError("not an HTTP error")) is None
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 1
+    assert estimate_tokens("x" * 400) == 100
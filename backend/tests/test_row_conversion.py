@@ -0,0 +1,47 @@
+from collections import namedtuple
+from datetime import date, timedelta
+from decimal import Decimal
+
+from app.postgres_service import INTERVAL_OID, NUMERIC_OID, build_row_converter, format_interval
+
+Column = namedtuple("Column", ["name", "type_code"])
+TEXT_OID = 25
+INT4_OID = 23
+
+
+def test_unconverted_columns_pass_through():
+    columns = ["id", "name"]
+    rows = [(1, "a"), (2, "b")]
+    convert = build_row_converter(columns, [Column("id", INT4_OID), Column("name", TEXT_OID)], rows)
+    assert [convert(row) for row in rows] == [{"id": 1, "name": "a"}, {"id": 2, "name": "b"}]
+
+
+def test_converters_picked_from_type_oids():
+    columns = ["avg", "duration"]
+    rows = [(Decimal("0.315"), timedelta(hours=1, minutes=5, seconds=3))]
+    convert = build_row_converter(columns, [Column("avg", NUMERIC_OID), Column("duration", INTERVAL_OID)], rows)
+    assert convert(rows[0]) == {"avg": 0.315, "duration": "1h 5m 3s"}
+
+
+def test_converters_picked_from_first_non_null_value_without_description():
+    columns = ["avg", "day"]
+    rows = [(None, date(2024, 4, 1)), (Decimal("2.5"), None)]
+    convert = build_row_converter(columns, None, rows)
+    assert [convert(row) for row in rows] == [
+        {"avg": None, "day": date(2024, 4, 1)},
+        {"avg": 2.5, "day": None},
+    ]
+
+
+def test_nulls_are_not_converted():
+    rows = [(None,), (Decimal("1.5"),)]
+    convert = build_row_converter(["avg"], [Column("avg", NUMERIC_OID)], rows)
+    assert [convert(row) for row in rows] == [{"avg": None}, {"avg": 1.5}]
+
+
+def test_format_interval():
+    assert format_interval(timedelta(seconds=42)) == "42s"
+    assert format_interval(timedelta(minutes=5)) == "5m"
+    assert format_interval(timedelta(minutes=5, seconds=1)) == "5m 1s"
+    assert format_interval(timedelta(hours=2)) == "2h"
+    assert format_interval(timedelta(hours=2, minutes=3)) == "2h 3m"
@@ -0,0 +1,59 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.postgres_service import postgres_service
+
+DATABASE = "mlb"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    catalog = {
+        "success": True,
+        "database": DATABASE,
+        "schema": "public",
+        "tables": [{"name": "games"}],
+        "table_count": 1,
+        "fingerprint": "f1",
+        "etag": "abc123",
+    }
+    monkeypatch.setitem(postgres_service._schema_cache, DATABASE, {"catalog": catalog, "fetched_at": time.time()})
+    return TestClient(app)
+
+
+def test_schema_carries_etag(client):
+    response = client.get(f"/api/databases/{DATABASE}/schema")
+    assert response.status_code == 200
+    assert response.headers["etag"] == '"abc123"'
+    assert response.headers["cache-control"] == "no-cache"
+    assert response.json()["tables"] == [{"name": "games"}]
+
+
+def test_matching_if_none_match_returns_304(client):
+    response = client.get(f"/api/databases/{DATABASE}/schema", headers={"If-None-Match": '"abc123"'})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == '"abc123"'
+
+
+def test_stale_if_none_match_returns_catalog(client):
+    response = client.get(f"/api/databases/{DATABASE}/schema", headers={"If-None-Match": '"old"'})
+    assert response.status_code == 200
+    assert response.json()["etag"] == "abc123"
+
+
+def test_failed_refresh_serves_cached_catalog(client, monkeypatch):
+    def fail(database):
+        raise RuntimeError("connection refused")
+
+    monkeypatch.setattr(postgres_service, "_fetch_schema", fail)
+    response = client.get(f"/api/databases/{DATABASE}/schema", params={"refresh": "true"},
+                          headers={"If-None-Match": '"abc123"'})
+    assert response.status_code == 304
+
+
+def test_unknown_database_is_rejected(client):
+    assert client.get("/api/databases/nope/schema").status_code == 400
@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+from schema_mapping import (
+    COLUMN_MAPPINGS,
+    MLBFINAL_TABLES,
+    SEASON_SPECIFIC_MAPPINGS,
+    TABLE_MAPPINGS,
+    reference_transform_query_auto,
+    transform_query_auto,
+    validate_transformed_query,
+)
+
+
+def sample_queries(n):
+    """Queries over mapped and unmapped names (no string literals), in mixed case."""
+    rng = random.Random(42)
+    tables = list(TABLE_MAPPINGS) + ["games", "umpires"]
+    columns = list(COLUMN_MAPPINGS) + list(SEASON_SPECIFIC_MAPPINGS) + ["player_id", "hits", "season_year"]
+    for _ in range(n):
+        names = [rng.choice(columns) for _ in range(5)]
+        names = [name.upper() if rng.random() < 0.2 else name for name in names]
+        yield (
+            f"SELECT {', '.join(names[:3])} FROM {rng.choice(tables)} t1 "
+            f"JOIN {rng.choice(tables)} t2 ON t2.{names[3]} = t1.{names[3]} "
+            f"WHERE {names[4]} = {rng.randint(1, 3000)} ORDER BY {names[0]} DESC"
+        )
+
+
+def test_tables_and_columns_renamed():
+    sql, warnings = transform_query_auto("SELECT name, homeruns FROM battingstatsgame WHERE season = 2024")
+    assert sql == "SELECT player_full_name, home_runs FROM playerstatsgame_batting WHERE season_year = 2024"
+    assert "Table: battingstatsgame -> playerstatsgame_batting" in warnings
+    assert "Column: homeruns -> home_runs" in warnings
+
+
+def test_season_tables_use_season_specific_columns():
+    sql, _ = transform_query_auto("SELECT name, rbis FROM battingstatsseason")
+    assert sql == "SELECT player_name, rbi FROM playerstatsseason_batting"
+
+
+def test_matching_is_case_insensitive():
+    sql, _ = transform_query_auto("SELECT Name FROM BattingStatsGame")
+    assert sql == "SELECT player_full_name FROM playerstatsgame_batting"
+
+
+def test_whole_words_only():
+    sql, warnings = transform_query_auto("SELECT seasonal, season_year, player_name FROM games")
+    assert sql == "SELECT seasonal, season_year, player_name FROM games"
+    assert warnings == []
+
+
+@pytest.mark.parametrize("literal", ["'season'", "'O''Neil name'", "'name"])
+def test_string_literals_are_not_rewritten(literal):
+    sql, _ = transform_query_auto(f"SELECT name FROM players WHERE note = {literal}")
+    assert sql == f"SELECT player_full_name FROM players WHERE note = {literal}"
+
+
+def test_hardcoded_ids_are_flagged():
+    _, warnings = transform_query_auto("SELECT * FROM games WHERE team_id = 147")
+    assert "WARNING: Query uses hardcoded integer IDs - mlbfinal uses UUIDs" in warnings
+
+
+def test_single_pass_matches_reference_transform():
+    for query in sample_queries(500):
+        assert transform_query_auto(query) == reference_transform_query_auto(query), query
+
+
+def test_validate_transformed_query():
+    assert validate_transformed_query("SELECT * FROM players p JOIN Teams t ON p.team_id = t.id", MLBFINAL_TABLES) == []
+    assert validate_transformed_query("SELECT * FROM battingstatsgame", MLBFINAL_TABLES) == [
+        "Unknown table: battingstatsgame"
+    ]
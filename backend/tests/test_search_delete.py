@@ -0,0 +1,12 @@
+import asyncio
+
+from app.azure_search_service import AzureSearchService
+
+
+def test_unconfigured_delete_reports_failures_like_configured_path(monkeypatch):
+    service = AzureSearchService()
+    monkeypatch.setattr(service, "endpoint", None)
+    result = asyncio.run(service.delete_documents(["a", "b"]))
+    assert result["succeeded"] == []
+    assert [failure["id"] for failure in result["failed"]] == ["a", "b"]
+    assert all(failure["error"] for failure in result["failed"])
@@ -0,0 +1,121 @@
+import re
+
+import pytest
+
+import sync_search_index
+from app.search_outbox import content_hash
+from sync_search_index import SearchIndexSyncer
+
+
+class FakeSyncer(SearchIndexSyncer):
+    """SearchIndexSyncer over in-memory CosmosDB documents and index documents."""
+
+    def __init__(self, cosmos, index):
+        self.container_name = "nba-official"
+        self.index_name = "test-index"
+        self.cosmos = cosmos
+        self.index = index
+        self.text_reads = []
+        self.index_reads = []
+
+    def count_cosmos_documents(self):
+        return len(self.cosmos)
+
+    def iter_cosmos_text(self, since=None):
+        self.text_reads.append(since)
+        return [dict(doc) for doc in self.cosmos.values() if since is None or doc["_ts"] >= since]
+
+    def fetch_cosmos_text(self, doc_ids):
+        return [dict(self.cosmos[doc_id]) for doc_id in doc_ids if doc_id in self.cosmos]
+
+    def iter_cosmos_ids(self):
+        return iter(sorted(self.cosmos))
+
+    def count_search_documents(self):
+        return len(self.index)
+
+    def fetch_search_hashes(self, doc_ids):
+        return [dict(self.index[doc_id]) for doc_id in doc_ids if doc_id in self.index]
+
+    def iter_search_documents(self, fields=("id",), filter=None):
+        since = int(re.fullmatch(r"IndexedAt ge (\d+)", filter).group(1)) if filter else None
+        if fields != ("id",):
+            self.index_reads.append(since)
+        for doc_id in sorted(self.index):
+            doc = self.index[doc_id]
+            if since is None or doc.get("IndexedAt", 0) >= since:
+                yield {field: doc.get(field) for field in fields}
+
+
+def index_document(doc, indexed_at):
+    return {"id": doc["id"], "UserPrompt": doc["UserPrompt"], "Query": doc["Query"],
+            "ContentHash": content_hash(doc), "IndexedAt": indexed_at}
+
+
+@pytest.fixture
+def syncer(tmp_path, monkeypatch):
+    monkeypatch.setattr(sync_search_index, "BACKEND_ROOT", tmp_path)
+    cosmos = {
+        f"doc-{i}": {"id": f"doc-{i}", "_ts": 1000 + i, "UserPrompt": f"prompt {i}", "Query": f"SELECT {i}"}
+        for i in range(300)
+    }
+    index = {doc_id: index_document(doc, 2000 + i) for i, (doc_id, doc) in enumerate(cosmos.items())}
+    return FakeSyncer(cosmos, index)
+
+
+def test_in_sync_drills_no_buckets(syncer):
+    orphaned, missing, stale, counts = syncer.checksum_diff()
+    assert (orphaned, missing, stale) == ([], [], [])
+    assert counts["buckets_drilled"] == 0
+    assert counts["cosmos"] == counts["search"] == 300
+
+
+def test_differences_found_in_drilled_buckets_only(syncer):
+    syncer.checksum_diff()
+
+    syncer.index["doc-1"] = index_document({"id": "doc-1", "UserPrompt": "prompt 1", "Query": "edited"}, 5000)
+    del syncer.index["doc-2"]
+    syncer.index["ghost"] = index_document({"id": "ghost", "UserPrompt": "p", "Query": "q"}, 5000)
+    syncer.cosmos["doc-3"].update(Query="SELECT new", _ts=5000)
+    del syncer.cosmos["doc-4"]
+    del syncer.index["doc-4"]
+
+    orphaned, missing, stale, counts = syncer.checksum_diff()
+    assert orphaned == ["ghost"]
+    assert missing == ["doc-2"]
+    assert stale == ["doc-1", "doc-3"]
+    assert 0 < counts["buckets_drilled"] <= 4
+    assert counts["cosmos"] == counts["search"] == 299
+
+
+def test_second_run_reads_only_changes_since_watermark(syncer):
+    syncer.checksum_diff()
+    syncer.checksum_diff()
+    assert syncer.text_reads == [None, 1299 - SearchIndexSyncer.WATERMARK_OVERLAP_SECONDS]
+    assert syncer.index_reads == [None, 2299 - SearchIndexSyncer.WATERMARK_OVERLAP_SECONDS]
+
+
+def test_documents_indexed_without_hash_are_stale(syncer):
+    del syncer.index["doc-5"]["ContentHash"]
+    assert syncer.checksum_diff()[2] == ["doc-5"]
+
+
+def test_index_without_sync_fields_is_hashed_from_text(syncer, monkeypatch):
+    monkeypatch.setattr(sync_search_index, "SEARCH_INDEX_FIELDS", ["id", "UserPrompt", "Query"])
+    for doc in syncer.index.values():
+        del doc["ContentHash"], doc["IndexedAt"]
+    syncer.index["doc-1"]["Query"] = "edited in the index"
+    assert syncer.checksum_diff()[2] == ["doc-1"]
+
+
+def test_full_rescan_catches_edits_without_ts_change(syncer):
+    syncer.checksum_diff()
+    syncer.cosmos["doc-7"]["Query"] = "restored from backup"
+    assert syncer.checksum_diff()[2] == []
+    assert syncer.checksum_diff(full=True)[2] == ["doc-7"]
+
+
+def test_buckets_follow_id_hash():
+    assert SearchIndexSyncer.bucket_of("doc-1") == SearchIndexSyncer.bucket_of("doc-1")
+    buckets = {SearchIndexSyncer.bucket_of(f"doc-{i}") for i in range(2000)}
+    assert len(buckets) == 16 ** SearchIndexSyncer.BUCKET_PREFIX_LENGTH
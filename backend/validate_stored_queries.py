@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""Stored Query Validation - EXPLAIN every official document's Query against its live Postgres schema"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, List
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+load_dotenv()
+
+try:
+    from app.cosmos_service import get_container_client, resolve_cosmos_container_id
+    from app.postgres_service import postgres_service
+    from app.config import AVAILABLE_DATABASES, BACKEND_ROOT, POSTGRES_DATABASE_BY_CONTAINER
+except ImportError as e:
+    print(f"Error importing: {e}")
+    sys.exit(1)
+
+CACHE_PATH = BACKEND_ROOT / "explain_cache.json"
+PAGE_SIZE = 1000
+MAX_FAILURES_REPORTED = 5000
+
+
+def query_hash(query: str) -> str:
+    return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+
+def is_cacheable(result: Dict[str, Any]) -> bool:
+    """Valid, or rejected for the query's own sake (transient failures are re-checked next run)."""
+    return result["success"] or not result.get("transient")
+
+
+class ExplainCache:
+    """EXPLAIN outcomes per database, keyed by query hash and dropped when the schema fingerprint changes."""
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self.databases: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                self.databases = json.load(f)
+
+    def results_for(self, database: str, fingerprint: str) -> Dict[str, Dict[str, Any]]:
+        entry = self.databases.get(database)
+        if entry is None or entry.get("fingerprint") != fingerprint:
+            entry = {"fingerprint": fingerprint, "results": {}}
+            self.databases[database] = entry
+        return entry["results"]
+
+    def save(self) -> None:
+        # Write-then-rename so an interruption never leaves a truncated cache
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.databases, f)
+        os.replace(tmp_path, self.path)
+
+
+def validate_container(container_name: str, cache: ExplainCache, concurrency: int, timeout_ms: int,
+                       recheck: bool) -> Dict[str, Any]:
+    database = POSTGRES_DATABASE_BY_CONTAINER[container_name]
+    fingerprint = postgres_service.get_schema_fingerprint(database)
+    cached = cache.results_for(database, fingerprint)
+    if recheck:
+        cached.clear()
+    container = get_container_client(resolve_cosmos_container_id(container_name))
+    print(f"\n{container_name} -> {database} (schema {fingerprint[:12]}, {len(cached)} cached results)")
+
+    stats = Counter()
+    failures: List[Dict[str, Any]] = []
+    errors = Counter()
+    transient_errors = Counter()
+    # Documents waiting on an EXPLAIN already in flight for the same query text
+    waiting: Dict[str, List[str]] = {}
+    started = time.perf_counter()
+
+    def record(doc_id: str, result: Dict[str, Any]) -> None:
+        if result["success"]:
+            stats["valid"] += 1
+            return
+        if not is_cacheable(result):
+            # Connection drop, timeout or similar: the query was not judged either way
+            stats["transient"] += 1
+            transient_errors[result["error"]] += 1
+            return
+        stats["invalid"] += 1
+        errors[result["error"]] += 1
+        if len(failures) < MAX_FAILURES_REPORTED:
+            failures.append({"id": doc_id, "error": result["error"], "sqlstate": result.get("sqlstate")})
+
+    def finish(future) -> None:
+        key, result = future.result()
+        if is_cacheable(result):
+            cached[key] = result
+        for doc_id in waiting.pop(key):
+            record(doc_id, result)
+
+    def explain(key: str, query: str):
+        return key, postgres_service.explain_query(database, query, timeout_ms)
+
+    pager = container.query_items(
+        query="SELECT c.id, c.Query FROM c",
+        enable_cross_partition_query=True,
+        max_item_count=PAGE_SIZE,
+    ).by_page()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            in_flight = set()
+            for page in pager:
+                for doc in page:
+                    stats["documents"] += 1
+                    query = doc.get("Query")
+                    if not isinstance(query, str) or not query.strip():
+                        stats["no_query"] += 1
+                        continue
+                    key = query_hash(query)
+                    if key in cached:
+                        stats["cached"] += 1
+                        record(doc["id"], cached[key])
+                        continue
+                    if key in waiting:
+                        waiting[key].append(doc["id"])
+                        continue
+                    waiting[key] = [doc["id"]]
+                    if len(in_flight) >= concurrency * 2:
+                        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            finish(future)
+                    in_flight.add(pool.submit(explain, key, query))
+                    stats["explained"] += 1
+                print(f"  documents={stats['documents']} explained={stats['explained']} cached={stats['cached']} "
+                      f"invalid={stats['invalid']} transient={stats['transient']}")
+            for future in in_flight:
+                finish(future)
+    finally:
+        cache.save()
+    elapsed = time.perf_counter() - started
+    return {
+        "container": container_name,
+        "database": database,
+        "schema_fingerprint": fingerprint,
+        **{key: stats[key] for key in ("documents", "no_query", "valid", "invalid", "explained", "cached", "transient")},
+        "errors": dict(errors.most_common()),
+        "transient_errors": dict(transient_errors.most_common()),
+        "failures": failures,
+        "seconds": round(elapsed, 1),
+    }
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--container",
+        action="append",
+        choices=list(POSTGRES_DATABASE_BY_CONTAINER),
+        help="Container to check (repeatable; default: all official containers)",
+    )
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help="EXPLAINs in flight (default: the database's pool size + overflow)")
+    parser.add_argument("--timeout-ms", type=int, default=5000, help="Per-statement timeout")
+    parser.add_argument("--recheck", action="store_true", help="Ignore cached results")
+    parser.add_argument("--report", default="stored_query_validation.json", help="JSON report path")
+    args = parser.parse_args()
+
+    cache = ExplainCache()
+    report: Dict[str, Any] = {"started_at": time.time(), "containers": []}
+    try:
+        for container_name in args.container or list(POSTGRES_DATABASE_BY_CONTAINER):
+            pool = AVAILABLE_DATABASES[POSTGRES_DATABASE_BY_CONTAINER[container_name]]["pool"]
+            concurrency = args.concurrency or pool["pool_size"] + pool["max_overflow"]
+            report["containers"].append(
+                validate_container(container_name, cache, concurrency, args.timeout_ms, args.recheck)
+            )
+    finally:
+        report["finished_at"] = time.time()
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved report to {args.report}")
+
+    for entry in report["containers"]:
+        print(f"{entry['container']}: {entry['valid']} valid, {entry['invalid']} invalid, "
+              f"{entry['transient']} not checked (transient errors), {entry['no_query']} without a query ({entry['explained']} explained, {entry['cached']} cached, "
+              f"{entry['seconds']}s)")
+        for error, count in list(entry["errors"].items())[:10]:
+            print(f"  {count:6d}  {error}")
+
+
+if __name__ == "__main__":
+    main()
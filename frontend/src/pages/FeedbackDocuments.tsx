@@ -55,9 +55,11 @@ import {
   searchFeedbackDocuments,
   createFeedbackDocument,
   updateFeedbackDocument,
-  deleteFeedbackDocument
+  deleteFeedbackDocument,
+  bulkReplaceFeedbackDocuments,
+  streamFeedbackDocumentsMulti
 } from '../services/api';
-import type { QueryResult } from '../types/api';
+import type { QueryResult, BulkEditField } from '../types/api';
 
 type ContainerType = 
   | 'mlb-official'
@@ -70,8 +72,6 @@ interface ContainerOption {
   label: string;
 }
 
-type BulkEditField = 'UserPrompt' | 'Query';
-
 interface BulkEditPreview {
   id: string;
   field: BulkEditField;
@@ -97,7 +97,6 @@ function FeedbackDocuments() {
   const [replaceText, setReplaceText] = useState('');
   const [previewChanges, setPreviewChanges] = useState<BulkEditPreview[]>([]);
   const [selectAll, setSelectAll] = useState(true);
-  const [matchedDocuments, setMatchedDocuments] = useState<FeedbackDocument[]>([]);
   const [showingResults, setShowingResults] = useState<Set<string>>(new Set());
   const [queryResults, setQueryResults] = useState<Record<string, QueryResult>>(() => {
     // Load cached results from localStorage on component mount
@@ -262,29 +261,35 @@ function FeedbackDocuments() {
     }
   };
 
-  // Preload documents for a container in the background
-  const preloadDocuments = async (container: ContainerType) => {
-    if (preloadingContainers.has(container) || documentCache[container]?.length > 0) {
+  // Preload documents for containers in the background (one request, loaded concurrently server-side)
+  const preloadDocuments = async (containersToLoad: ContainerType[]) => {
+    const pending = containersToLoad.filter(
+      container => !preloadingContainers.has(container) && !(documentCache[container]?.length > 0)
+    );
+    if (pending.length === 0) {
       return; // Already preloading or already cached
     }
     
-    setPreloadingContainers(prev => new Set([...prev, container]));
+    setPreloadingContainers(prev => new Set([...prev, ...pending]));
     
     try {
-      const allDocs = await getAllFeedbackDocuments(container);
-      
-      setDocumentCache(prev => ({
-        ...prev,
-        [container]: allDocs
-      }));
-      
-      console.log(`Preloaded ${allDocs.length} documents for ${container}`);
+      await streamFeedbackDocumentsMulti(pending, ({ container, documents, error }) => {
+        if (error || !documents) {
+          console.warn(`Failed to preload documents for ${container}:`, error);
+          return;
+        }
+        setDocumentCache(prev => ({
+          ...prev,
+          [container]: documents
+        }));
+        console.log(`Preloaded ${documents.length} documents for ${container}`);
+      });
     } catch (error) {
-      console.warn(`Failed to preload documents for ${container}:`, error);
+      console.warn(`Failed to preload documents for ${pending.join(', ')}:`, error);
     } finally {
       setPreloadingContainers(prev => {
         const newSet = new Set(prev);
-        newSet.delete(container);
+        pending.forEach(container => newSet.delete(container));
         return newSet;
       });
     }
@@ -292,13 +297,6 @@ function FeedbackDocuments() {
 
   useEffect(() => {
     loadContainers();
-    
-    // Preload NBA Official documents after initial load
-    const preloadTimer = setTimeout(() => {
-      preloadDocuments('nba-official');
-    }, 1000); // Wait 1 second after component mount
-    
-    return () => clearTimeout(preloadTimer);
   }, []);
 
   // Persist query results to localStorage with size limit
@@ -379,12 +377,7 @@ function FeedbackDocuments() {
     const otherContainers: ContainerType[] = ['nba-official', 'nba-unofficial', 'mlb-official', 'mlb-unofficial'];
     const containersToPreload = otherContainers.filter(c => c !== selectedContainer);
     
-    // Staggered preloading to avoid overwhelming the server
-    containersToPreload.forEach((container, index) => {
-      setTimeout(() => {
-        preloadDocuments(container);
-      }, (index + 1) * 2000); // 2 second intervals
-    });
+    preloadDocuments(containersToPreload);
   }, [selectedContainer]);
 
   const handleCreate = async () => {
@@ -564,27 +557,18 @@ function FeedbackDocuments() {
     [selectedContainer]
   );
 
-  // Function to generate preview of changes
+  // Function to generate preview of changes (computed by the server)
   const handlePreviewChanges = async () => {
     if (!findText) return;
 
     try {
-      const response = await fetch(
-        `/api/feedback/documents/search?q=${encodeURIComponent(findText)}&container=${selectedContainer}&field=${bulkEditField}`
+      const result = await bulkReplaceFeedbackDocuments(
+        { field: bulkEditField, find: findText, replace: replaceText },
+        selectedContainer
       );
 
-      if (!response.ok) {
-        throw new Error('Failed to fetch documents');
-      }
-
-      const matched = await response.json();
-      setMatchedDocuments(matched);
-
-      const previews: BulkEditPreview[] = matched.map((doc: FeedbackDocument) => ({
-        id: doc.id!,
-        field: bulkEditField,
-        oldValue: doc[bulkEditField] || '',
-        newValue: (doc[bulkEditField] || '').split(findText).join(replaceText),
+      const previews: BulkEditPreview[] = (result.changes || []).map(change => ({
+        ...change,
         selected: true
       }));
 
@@ -600,46 +584,41 @@ function FeedbackDocuments() {
     }
   };
 
-  // Function to apply bulk changes
+  // Function to apply bulk changes in one server-side request
   const handleApplyBulkChanges = async () => {
     const selectedPreviews = previewChanges.filter(preview => preview.selected);
     if (selectedPreviews.length === 0) return;
 
     try {
-      const updates = selectedPreviews.map(preview => {
-        const doc = matchedDocuments.find(d => d.id === preview.id) || documents.find(d => d.id === preview.id);
-        if (!doc) return null;
-        return {
-          ...doc,
-          [preview.field]: preview.newValue
-        };
-      }).filter((doc): doc is FeedbackDocument => doc !== null);
-
-      // Update each document
-      await Promise.all(
-        updates.filter(doc => doc.id).map(doc =>
-          updateFeedbackDocument(doc.id!, doc, selectedContainer)
-        )
+      const result = await bulkReplaceFeedbackDocuments(
+        {
+          field: bulkEditField,
+          find: findText,
+          replace: replaceText,
+          apply: true,
+          ids: selectedPreviews.map(preview => preview.id),
+          // Send the preview values so edits made in the preview are kept
+          overrides: Object.fromEntries(selectedPreviews.map(preview => [preview.id, preview.newValue]))
+        },
+        selectedContainer
       );
 
       // Update local state
+      const updatedById = new Map((result.documents || []).map(doc => [doc.id, doc]));
       setDocuments(docs =>
         docs.map(doc => {
-          const update = updates.find(u => u.id === doc.id);
-          return update || doc;
-        })
-      );
-      setMatchedDocuments(docs =>
-        docs.map(doc => {
-          const update = updates.find(u => u.id === doc.id);
-          return update || doc;
+          const update = updatedById.get(doc.id);
+          return update ? { ...doc, ...update } : doc;
         })
       );
 
+      const skipped = (result.conflicts?.length || 0) + (result.failed?.length || 0);
       toast({
-        title: 'Bulk update successful',
-        description: `Updated ${selectedPreviews.length} documents`,
-        status: 'success',
+        title: skipped ? 'Bulk update partially applied' : 'Bulk update successful',
+        description: skipped
+          ? `Updated ${result.updated} documents; ${skipped} changed since preview or failed`
+          : `Updated ${result.updated} documents`,
+        status: skipped ? 'warning' : 'success',
         duration: 3000,
         isClosable: true,
       });
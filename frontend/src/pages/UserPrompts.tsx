@@ -32,7 +32,7 @@ import {
   Textarea,
 } from '@chakra-ui/react';
 import { CopyIcon, DownloadIcon } from '@chakra-ui/icons';
-import { containers, getAllFeedbackDocuments } from '../services/api';
+import { containers, streamFeedbackDocumentsMulti } from '../services/api';
 import type { ContainerType, FeedbackDocument } from '../types/api';
 
 interface UserPrompt {
@@ -60,25 +60,28 @@ function UserPrompts() {
 
     setLoading(true);
     try {
-      const allPrompts: UserPrompt[] = [];
-      
-      for (const container of selectedContainers) {
-        try {
-          const data = await getAllFeedbackDocuments(container);
-          const containerPrompts: UserPrompt[] = data.map((doc: FeedbackDocument) => ({
+      // Containers arrive as the server finishes each one; keep them in selection order
+      const byContainer: Partial<Record<ContainerType, UserPrompt[]>> = {};
+      await streamFeedbackDocumentsMulti(
+        selectedContainers,
+        ({ container, documents, error }) => {
+          if (error || !documents) {
+            console.error(`Error fetching from container ${container}:`, error);
+            return;
+          }
+          byContainer[container] = documents.map((doc: FeedbackDocument) => ({
             id: doc.id || '',
             UserPrompt: doc.UserPrompt,
             container,
             Query: doc.Query,
             AssistantPrompt: doc.AssistantPrompt,
           }));
-          allPrompts.push(...containerPrompts);
-        } catch (error) {
-          console.error(`Error fetching from container ${container}:`, error);
-        }
-      }
-      
-      setUserPrompts(allPrompts);
+          setUserPrompts(selectedContainers.flatMap(name => byContainer[name] || []));
+        },
+        ['id', 'UserPrompt', 'Query', 'AssistantPrompt']
+      );
+
+      setUserPrompts(selectedContainers.flatMap(name => byContainer[name] || []));
     } catch (error) {
       console.error('Error fetching user prompts:', error);
       toast({
@@ -1,5 +1,5 @@
 import axios from 'axios';
-import type { GenerateInsightsRequest, ConversationRequest, ApiResponse, QueryRequest, QueryResult, DatabaseInfo, ContainersResponse, ContainerType } from '../types/api';
+import type { GenerateInsightsRequest, ConversationRequest, ApiResponse, QueryRequest, QueryResult, DatabaseInfo, DatabaseSchema, ContainersResponse, ContainerType, BulkReplaceRequest, BulkReplaceResponse, BatchDocumentResponse, ContainerDocumentsChunk } from '../types/api';
 
 function resolveApiBaseUrl(): string {
   const fromEnv = (import.meta as ImportMeta & { env?: { VITE_API_BASE_URL?: string } }).env
@@ -60,6 +60,11 @@ export const getDatabaseTables = async (database: string): Promise<QueryResult>
   return response.data;
 };
 
+export const getDatabaseSchema = async (database: string, refresh: boolean = false): Promise<DatabaseSchema> => {
+  const response = await api.get<DatabaseSchema>(`/databases/${database}/schema${refresh ? '?refresh=true' : ''}`);
+  return response.data;
+};
+
 // Feedback Containers API
 export const getFeedbackContainers = async (): Promise<ContainersResponse> => {
   const response = await api.get<ContainersResponse>('/feedback/containers');
@@ -77,6 +82,37 @@ export const getAllFeedbackDocuments = async (container: string) => {
   return response.data;
 };
 
+/**
+ * Fetch documents from several containers in one request. The server loads the
+ * containers concurrently and streams one NDJSON line per container; onContainer is
+ * called as each one arrives.
+ */
+export const streamFeedbackDocumentsMulti = async (
+  containerNames: string[],
+  onContainer: (chunk: ContainerDocumentsChunk) => void,
+  fields: string[] = ['id', 'UserPrompt', 'Query', '_ts']
+): Promise<void> => {
+  const params = new URLSearchParams({ containers: containerNames.join(','), fields: fields.join(',') });
+  const response = await fetch(`${API_BASE_URL}/feedback/documents/multi?${params}`);
+  if (!response.ok || !response.body) {
+    throw new Error(`Failed to fetch documents (${response.status})`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  for (;;) {
+    const { done, value } = await reader.read();
+    buffer += decoder.decode(value, { stream: !done });
+    const lines = buffer.split('\n');
+    buffer = done ? '' : lines.pop() || '';
+    for (const line of lines) {
+      if (line.trim()) onContainer(JSON.parse(line));
+    }
+    if (done) break;
+  }
+};
+
 export const searchFeedbackDocuments = async (query: string, container: string, field: string = 'UserPrompt') => {
   const response = await api.get(`/feedback/documents/search?q=${encodeURIComponent(query)}&container=${container}&field=${field}`);
   return response.data;
@@ -92,11 +128,33 @@ export const updateFeedbackDocument = async (docId: string, document: any, conta
   return response.data;
 };
 
+export const bulkReplaceFeedbackDocuments = async (request: BulkReplaceRequest, container: string): Promise<BulkReplaceResponse> => {
+  const response = await api.post<BulkReplaceResponse>(`/feedback/documents/bulk-replace?container=${container}`, request);
+  return response.data;
+};
+
 export const deleteFeedbackDocument = async (docId: string, container: string) => {
   const response = await api.delete(`/feedback/documents/${docId}?container=${container}`);
   return response.data;
 };
 
+export const transferFeedbackDocuments = async (
+  ids: string[],
+  sourceContainer: string,
+  targetContainer: string
+): Promise<BatchDocumentResponse> => {
+  const response = await api.post<BatchDocumentResponse>(
+    `/feedback/documents/transfer-batch?source_container=${sourceContainer}&target_container=${targetContainer}`,
+    { ids }
+  );
+  return response.data;
+};
+
+export const deleteFeedbackDocuments = async (ids: string[], container: string): Promise<BatchDocumentResponse> => {
+  const response = await api.post<BatchDocumentResponse>(`/feedback/documents/delete-batch?container=${container}`, { ids });
+  return response.data;
+};
+
 // Container definitions for UI
 export const containers: { id: ContainerType; name: string; description: string }[] = [
   { id: 'mlb-official', name: 'MLB Official', description: 'Official MLB feedback documents' },
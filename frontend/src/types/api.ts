@@ -44,6 +44,40 @@ export interface DatabaseInfo {
   databases: string[];
 }
 
+export interface SchemaColumn {
+  name: string;
+  type: string;
+  nullable: boolean;
+  position: number;
+}
+
+export interface SchemaIndex {
+  name: string;
+  unique: boolean;
+  primary: boolean;
+  definition: string;
+}
+
+export interface SchemaTable {
+  name: string;
+  kind: string;
+  row_estimate: number | null;
+  columns: SchemaColumn[];
+  indexes: SchemaIndex[];
+}
+
+export interface DatabaseSchema {
+  success: boolean;
+  database: string;
+  schema: string;
+  tables: SchemaTable[];
+  table_count: number;
+  fingerprint: string;
+  etag: string;
+  generated_at: string;
+  error?: string;
+}
+
 export interface ContainerOption {
   value: string;
   label: string;
@@ -71,4 +105,56 @@ export interface FeedbackDocument {
   QueryVector?: number[];
   AssistantPromptVector?: number[];
   _ts?: number;
-} 
\ No newline at end of file
+} 
+
+export type BulkEditField = 'UserPrompt' | 'Query';
+
+export interface BulkReplaceRequest {
+  field: BulkEditField;
+  find: string;
+  replace: string;
+  apply?: boolean;
+  ids?: string[];
+  overrides?: Record<string, string>;
+}
+
+export interface BulkReplaceChange {
+  id: string;
+  field: BulkEditField;
+  oldValue: string;
+  newValue: string;
+}
+
+export interface BulkReplaceResponse {
+  applied: boolean;
+  field: BulkEditField;
+  matched: number;
+  changes?: BulkReplaceChange[];
+  updated?: number;
+  documents?: Pick<FeedbackDocument, 'id' | 'UserPrompt' | 'Query' | '_ts'>[];
+  conflicts?: { id: string; reason: string }[];
+  failed?: { id: string; error: string }[];
+}
+
+export interface BatchDocumentResult {
+  id: string;
+  status: 'transferred' | 'copied' | 'deleted' | 'not_found' | 'error';
+  new_id?: string;
+  error?: string;
+}
+
+export interface BatchDocumentResponse {
+  requested: number;
+  statuses: Record<string, number>;
+  search_index: { deleted: number; failed: { id: string; error: string }[] } | null;
+  results: BatchDocumentResult[];
+}
+
+export interface ContainerDocumentsChunk {
+  container: ContainerType;
+  count?: number;
+  cached?: boolean;
+  elapsed_ms?: number;
+  documents?: FeedbackDocument[];
+  error?: string;
+}